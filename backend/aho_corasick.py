@@ -0,0 +1,87 @@
+"""
+Aho-Corasick multi-pattern matcher.
+
+Compiles a set of literal patterns once into an automaton, then finds every
+occurrence of every pattern in a single left-to-right pass over the text.
+Matching cost is O(len(text) + matches) no matter how many patterns there
+are, which is what the project router and the injection scanner need.
+"""
+
+from collections import deque
+
+
+class AhoCorasick:
+    """Compiled automaton over a fixed list of literal patterns"""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Empty patterns are not allowed")
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] = self._out[state] + (pattern_id,)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Merge outputs so every match is reported without walking fail links
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def __len__(self):
+        return len(self.patterns)
+
+    @property
+    def state_count(self):
+        return len(self._goto)
+
+    def tables(self):
+        """(goto, fail, outputs) arrays for callers that inline the matching loop"""
+        return self._goto, self._fail, self._out
+
+    def step(self, state, ch):
+        """Advance one character; returns the new state"""
+        goto = self._goto
+        while state and ch not in goto[state]:
+            state = self._fail[state]
+        return goto[state].get(ch, 0)
+
+    def outputs(self, state):
+        """Pattern ids that end at this state"""
+        return self._out[state]
+
+    def iter_matches(self, text):
+        """Yield (start, end, pattern_id) for every occurrence, end exclusive"""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        patterns = self.patterns
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in out[state]:
+                yield i + 1 - len(patterns[pattern_id]), i + 1, pattern_id
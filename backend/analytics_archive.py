@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Columnar archive, compaction and retention for the analytics event store.
+
+Raw events land in events.sqlite3 (analytics_store.py). A maintenance job
+moves closed time ranges out of SQLite into compressed columnar segment
+files and deletes segments older than the retention window:
+
+    ANALYTICS_DIR/archive/segment-<first id>-<last id>-<min ts>-<max ts>.npz
+
+Segments cover contiguous id ranges (ids keep increasing across segments,
+which the export cursor relies on). Inside a segment every column is its
+own array:
+
+- id (int64), received_at (float64)
+- event_name, portfolio, session_id, user_id: dictionary encoded as
+  <col>_codes (uint32) + the sorted distinct values as a UTF-8 blob +
+  offsets (<col>_dict_data, <col>_dict_offsets), so a long id costs its
+  own length once rather than the longest value times every row
+- client_ts: float64 where the client sent a number (NaN otherwise), with
+  any other text kept in client_ts_text like properties
+- properties: UTF-8 blob + offsets + null mask
+
+so a scan only decompresses the columns it touches and filters with NumPy
+comparisons on integer codes instead of parsing rows.
+
+    ANALYTICS_SEGMENT_SECONDS=86400    # time span of a segment; only closed spans are compacted
+    ANALYTICS_SEGMENT_MAX_ROWS=500000  # rows per segment file
+    ANALYTICS_RETENTION_DAYS=90        # archived segments older than this are deleted
+    ANALYTICS_COMPACT_INTERVAL=600     # seconds between maintenance passes
+    ANALYTICS_SCAN_CACHE_MB=128        # decompressed columns kept in memory for repeat scans
+
+    python analytics_archive.py compact          # run one compaction + retention pass
+    python analytics_archive.py scan --portfolio gaming --count-by event_name
+"""
+
+import argparse
+import fcntl
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from analytics_store import ANALYTICS_DIR, DB_FILE, connect
+from app_logging import get_logger
+
+log = get_logger("analytics")
+
+ARCHIVE_SUBDIR = "archive"
+LOCK_FILE = ".maintenance.lock"
+
+DICT_COLUMNS = ("event_name", "portfolio", "session_id", "user_id")
+COLUMNS = ("id", "received_at") + DICT_COLUMNS + ("client_ts", "properties")
+FILTER_COLUMNS = ("event_name", "portfolio", "session_id", "user_id")
+
+SEGMENT_SECONDS = int(os.getenv('ANALYTICS_SEGMENT_SECONDS', '86400'))
+SEGMENT_MAX_ROWS = int(os.getenv('ANALYTICS_SEGMENT_MAX_ROWS', '500000'))
+RETENTION_DAYS = float(os.getenv('ANALYTICS_RETENTION_DAYS', '90'))
+COMPACT_INTERVAL = int(os.getenv('ANALYTICS_COMPACT_INTERVAL', '600'))
+SCAN_CACHE_BYTES = int(os.getenv('ANALYTICS_SCAN_CACHE_MB', '128')) * 1024 * 1024
+# Rows this recent are never compacted, so in-flight batches can land first
+COMPACT_GRACE_SECONDS = 300
+
+
+def archive_dir(directory=ANALYTICS_DIR):
+    return os.path.join(directory, ARCHIVE_SUBDIR)
+
+
+# ============================================
+# SEGMENT FILES
+# ============================================
+
+class _ArrayCache:
+    """LRU of decompressed segment columns, bounded by bytes.
+
+    Segment files are immutable once written (the name is the id range), so
+    a column never has to be invalidated, only evicted.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._arrays = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is not None:
+                self._arrays.move_to_end(key)
+                return array
+        array = load()
+        size = _nbytes(array)
+        if size > self.max_bytes:
+            return array
+        with self._lock:
+            if key not in self._arrays:
+                self._arrays[key] = array
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, evicted = self._arrays.popitem(last=False)
+                    self.bytes -= _nbytes(evicted)
+        return array
+
+
+def _nbytes(array):
+    # Object arrays (decoded dictionaries) hold str objects outside the buffer
+    if array.dtype == object:
+        return array.nbytes + sum(len(value) + 49 for value in array)
+    return array.nbytes
+
+
+_ARRAYS = _ArrayCache(SCAN_CACHE_BYTES)
+
+
+class Segment:
+    """One archived id range; columns are decompressed on first access"""
+
+    def __init__(self, path, first_id, last_id, min_ts, max_ts):
+        self.path = path
+        self.first_id = first_id
+        self.last_id = last_id
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self._npz = None
+
+    @classmethod
+    def parse(cls, directory, filename):
+        if not (filename.startswith("segment-") and filename.endswith(".npz")):
+            return None
+        parts = filename[len("segment-"):-len(".npz")].split("-")
+        if len(parts) != 4 or not all(p.isdigit() for p in parts):
+            return None
+        first_id, last_id, min_ts, max_ts = (int(p) for p in parts)
+        return cls(os.path.join(directory, filename), first_id, last_id, min_ts, max_ts)
+
+    def _data(self):
+        if self._npz is None:
+            self._npz = np.load(self.path, allow_pickle=False)
+        return self._npz
+
+    def array(self, name):
+        return _ARRAYS.get((self.path, name), lambda: self._data()[name])
+
+    def codes(self, column):
+        return self.array(f"{column}_codes")
+
+    def dictionary(self, column):
+        """Sorted distinct values of a dictionary column; codes index into it"""
+        return _ARRAYS.get((self.path, f"{column}_dict"), lambda: _decode_strings(
+            self._data()[f"{column}_dict_data"], self._data()[f"{column}_dict_offsets"]
+        ))
+
+    def code_for(self, column, value):
+        """Dictionary code for `value`, or None if the segment never saw it"""
+        dictionary = self.dictionary(column)
+        index = int(np.searchsorted(dictionary, value))
+        if index < len(dictionary) and dictionary[index] == value:
+            return index
+        return None
+
+    def column(self, name, mask=None):
+        """Decoded column (optionally only the rows in `mask`: booleans or row indexes)"""
+        if name in ("id", "received_at"):
+            values = self.array(name)
+            return values if mask is None else values[mask]
+        if name == "properties":
+            return self._text("properties", mask)
+        if name == "client_ts":
+            return self._client_ts(mask)
+        codes = self.codes(name)
+        if mask is not None:
+            codes = codes[mask]
+        return self.dictionary(name)[codes]
+
+    def _text(self, prefix, mask):
+        """Nullable text column stored as <prefix>_data / _offsets / _null"""
+        blob = self.array(f"{prefix}_data")
+        offsets = self.array(f"{prefix}_offsets")
+        nulls = self.array(f"{prefix}_null")
+        if mask is None:
+            rows = range(len(nulls))
+        else:
+            rows = np.flatnonzero(mask) if mask.dtype == bool else mask
+        return [None if nulls[row] else blob[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8") for row in rows]
+
+    def _client_ts(self, mask):
+        numbers = self.array("client_ts")
+        if mask is not None:
+            numbers = numbers[mask]
+        texts = self._text("client_ts_text", mask)
+        values = np.empty(len(texts), dtype=object)
+        values[:] = [_format_number(number) if text is None else text for number, text in zip(numbers.tolist(), texts)]
+        return values
+
+    def close(self):
+        if self._npz is not None:
+            self._npz.close()
+            self._npz = None
+
+
+def list_segments(directory=ANALYTICS_DIR):
+    """Archived segments in id order"""
+    path = archive_dir(directory)
+    if not os.path.isdir(path):
+        return []
+    segments = [Segment.parse(path, name) for name in os.listdir(path)]
+    return sorted((s for s in segments if s), key=lambda s: s.first_id)
+
+
+def archive_stats(directory=ANALYTICS_DIR):
+    segments = list_segments(directory)
+    return {
+        "segments": len(segments),
+        "archived_through_id": segments[-1].last_id if segments else 0,
+        "bytes": sum(os.path.getsize(s.path) for s in segments),
+        "oldest": segments[0].min_ts if segments else None,
+    }
+
+
+def _encode_text(values):
+    """(UTF-8 blob, offsets, null mask) for a list of str / None"""
+    chunks = []
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    nulls = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        if value is None:
+            nulls[i] = True
+            encoded = b""
+        else:
+            encoded = value.encode("utf-8")
+            chunks.append(encoded)
+        offsets[i + 1] = offsets[i] + len(encoded)
+    return np.frombuffer(b"".join(chunks), dtype=np.uint8), offsets, nulls
+
+
+def _decode_strings(blob, offsets):
+    data = blob.tobytes()
+    values = np.empty(len(offsets) - 1, dtype=object)
+    values[:] = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(values))]
+    return values
+
+
+def _encode_dictionary(values):
+    """(codes, sorted distinct values) built with a dict, never a fixed-width array"""
+    index = {}
+    codes = np.fromiter((index.setdefault("" if v is None else v, len(index)) for v in values),
+                        dtype=np.uint32, count=len(values))
+    distinct = list(index)
+    order = sorted(range(len(distinct)), key=distinct.__getitem__)
+    rank = np.empty(len(distinct), dtype=np.uint32)
+    rank[order] = np.arange(len(distinct), dtype=np.uint32)
+    return rank[codes], [distinct[i] for i in order]
+
+
+def _format_number(value):
+    return str(int(value)) if value.is_integer() and abs(value) < 2 ** 53 else repr(value)
+
+
+def _encode_client_ts(values):
+    """float64 column for numeric client timestamps; other text kept aside exactly"""
+    numbers = np.full(len(values), np.nan)
+    texts = [None] * len(values)
+    for i, value in enumerate(values):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = math.nan
+        # Only when the text comes back byte-identical ("1.50" or "1e3" stay text)
+        if math.isfinite(number) and _format_number(number) == value:
+            numbers[i] = number
+        else:
+            texts[i] = "" if value is None else value
+    return numbers, _encode_text(texts)
+
+
+def write_segment(directory, rows):
+    """Write rows (COLUMNS order, id ascending) as one compressed columnar segment"""
+    path = archive_dir(directory)
+    os.makedirs(path, exist_ok=True)
+
+    columns = list(zip(*rows))
+    arrays = {
+        "id": np.asarray(columns[0], dtype=np.int64),
+        "received_at": np.asarray(columns[1], dtype=np.float64),
+    }
+    for offset, name in enumerate(DICT_COLUMNS, start=2):
+        arrays[f"{name}_codes"], distinct = _encode_dictionary(columns[offset])
+        arrays[f"{name}_dict_data"], arrays[f"{name}_dict_offsets"], _ = _encode_text(distinct)
+    arrays["client_ts"], client_ts_text = _encode_client_ts(columns[COLUMNS.index("client_ts")])
+    arrays["client_ts_text_data"], arrays["client_ts_text_offsets"], arrays["client_ts_text_null"] = client_ts_text
+    arrays["properties_data"], arrays["properties_offsets"], arrays["properties_null"] = _encode_text(columns[-1])
+
+    received_at = arrays["received_at"]
+    filename = "segment-{:012d}-{:012d}-{:010d}-{:010d}.npz".format(
+        int(arrays["id"][0]), int(arrays["id"][-1]), int(received_at.min()), int(np.ceil(received_at.max()))
+    )
+    fd, tmp_path = tempfile.mkstemp(dir=path, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.savez_compressed(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    final_path = os.path.join(path, filename)
+    os.replace(tmp_path, final_path)
+    return Segment.parse(path, filename)
+
+
+# ============================================
+# COMPACTION + RETENTION
+# ============================================
+
+def _chunks(cursor, size=10000):
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _archive(conn, directory, rows, stats):
+    segment = write_segment(directory, rows)
+    # The segment is durable before its rows leave SQLite
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("DELETE FROM events WHERE id >= ? AND id <= ?", (segment.first_id, segment.last_id))
+    conn.execute("COMMIT")
+    stats["segments"] += 1
+    stats["rows"] += len(rows)
+
+
+def compact(directory=ANALYTICS_DIR, now=None, segment_seconds=SEGMENT_SECONDS,
+            max_rows=SEGMENT_MAX_ROWS, retention_days=RETENTION_DAYS):
+    """Move closed time ranges from SQLite into segments, then apply retention.
+
+    Returns {"segments": n, "rows": n, "expired_segments": n, "expired_rows": n}.
+    """
+    now = time.time() if now is None else now
+    cutoff = (now - COMPACT_GRACE_SECONDS) // segment_seconds * segment_seconds
+    stats = {"segments": 0, "rows": 0, "expired_segments": 0, "expired_rows": 0}
+
+    conn = connect(os.path.join(directory, DB_FILE))
+    try:
+        row = conn.execute("SELECT MAX(id) FROM events WHERE received_at < ?", (cutoff,)).fetchone()
+        last_id = row[0] if row else None
+        if last_id is not None:
+            archived_through = max((s.last_id for s in list_segments(directory)), default=0)
+            # Rows left behind by a pass that died between writing a segment and deleting them
+            conn.execute("DELETE FROM events WHERE id <= ?", (archived_through,))
+            cursor = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM events WHERE id > ? AND id <= ? ORDER BY id",
+                (archived_through, last_id)
+            )
+            # One segment per closed time bucket (split further at max_rows), so
+            # retention can drop whole files
+            pending = []
+            for row in _chunks(cursor):
+                bucket = row[1] // segment_seconds
+                if pending and (len(pending) >= max_rows or bucket != pending[0][1] // segment_seconds):
+                    _archive(conn, directory, pending, stats)
+                    pending = []
+                pending.append(row)
+            if pending:
+                _archive(conn, directory, pending, stats)
+
+        expire_before = now - retention_days * 86400
+        for segment in list_segments(directory):
+            if segment.max_ts < expire_before:
+                os.remove(segment.path)
+                stats["expired_segments"] += 1
+
+        # Anything still in SQLite past retention (e.g. compaction was off) goes too
+        conn.execute("BEGIN IMMEDIATE")
+        stats["expired_rows"] = conn.execute("DELETE FROM events WHERE received_at < ?", (expire_before,)).rowcount
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return stats
+
+
+def run_maintenance(directory=ANALYTICS_DIR):
+    """One compaction pass, unless another worker is already running one"""
+    os.makedirs(archive_dir(directory), exist_ok=True)
+    with open(os.path.join(archive_dir(directory), LOCK_FILE), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+        stats = compact(directory)
+        if any(stats.values()):
+            log.info("analytics_compaction", extra=stats)
+        return stats
+
+
+def start_maintenance(directory=ANALYTICS_DIR, interval=COMPACT_INTERVAL):
+    """Background compaction thread (every worker starts one; the file lock picks a runner)"""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                run_maintenance(directory)
+            except Exception as e:
+                log.error("analytics_compaction_failed", extra={"error": str(e)})
+
+    thread = threading.Thread(target=loop, name="analytics-maintenance", daemon=True)
+    thread.start()
+    return thread
+
+
+# ============================================
+# VECTORIZED SCANS
+# ============================================
+
+def _segment_mask(segment, filters, start, end):
+    """Boolean row mask for one segment, or None if no row can match"""
+    if start is not None and segment.max_ts < start:
+        return None
+    if end is not None and segment.min_ts > end:
+        return None
+
+    mask = None
+    for column, value in filters.items():
+        code = segment.code_for(column, value)
+        if code is None:
+            return None
+        matches = segment.codes(column) == code
+        mask = matches if mask is None else mask & matches
+
+    if start is not None or end is not None:
+        received_at = segment.column("received_at")
+        in_range = np.ones(len(received_at), dtype=bool)
+        if start is not None:
+            in_range &= received_at >= start
+        if end is not None:
+            in_range &= received_at < end
+        mask = in_range if mask is None else mask & in_range
+
+    if mask is None:
+        mask = np.ones(len(segment.codes("event_name")), dtype=bool)
+    return mask if mask.any() else None
+
+
+def scan(directory=ANALYTICS_DIR, columns=COLUMNS, start=None, end=None, **filters):
+    """Archived events matching filters, as {column: array} (id order).
+
+    Filters are exact matches on event_name / portfolio / session_id /
+    user_id; start/end bound received_at (epoch seconds, end exclusive).
+    """
+    filters = {k: v for k, v in filters.items() if v is not None}
+    unknown = set(filters) - set(FILTER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unsupported filter(s): {', '.join(sorted(unknown))}")
+
+    parts = {name: [] for name in columns}
+    for segment in list_segments(directory):
+        try:
+            mask = _segment_mask(segment, filters, start, end)
+            if mask is None:
+                continue
+            for name in columns:
+                parts[name].append(segment.column(name, mask))
+        finally:
+            segment.close()
+
+    result = {}
+    for name in columns:
+        if name == "properties":
+            result[name] = [value for part in parts[name] for value in part]
+        elif parts[name]:
+            result[name] = np.concatenate(parts[name])
+        else:
+            result[name] = np.array([], dtype=np.int64 if name == "id" else np.float64 if name == "received_at" else str)
+    return result
+
+
+def count_by(column, directory=ANALYTICS_DIR, start=None, end=None, **filters):
+    """{value: count} over archived events, aggregated on dictionary codes"""
+    filters = {k: v for k, v in filters.items() if v is not None}
+    totals = {}
+    for segment in list_segments(directory):
+        try:
+            mask = _segment_mask(segment, filters, start, end)
+            if mask is None:
+                continue
+            counts = np.bincount(segment.codes(column)[mask], minlength=len(segment.dictionary(column)))
+            for value, count in zip(segment.dictionary(column), counts):
+                if count:
+                    totals[str(value)] = totals.get(str(value), 0) + int(count)
+        finally:
+            segment.close()
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def to_dataframe(directory=ANALYTICS_DIR, columns=COLUMNS, start=None, end=None, **filters):
+    """scan() as a pandas DataFrame (pandas is optional)"""
+    try:
+        import pandas as pd
+    except ImportError:
+        raise RuntimeError("pandas is not installed; use scan() for plain NumPy columns")
+    data = scan(directory, columns, start, end, **filters)
+    frame = pd.DataFrame(data)
+    if "received_at" in frame:
+        frame["received_at"] = pd.to_datetime(frame["received_at"], unit="s", utc=True)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics archive maintenance and scans")
+    parser.add_argument("--dir", default=ANALYTICS_DIR, help="Analytics data directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("compact", help="Compact closed segments and apply retention")
+
+    scan_parser = sub.add_parser("scan", help="Filter archived events")
+    for name in FILTER_COLUMNS:
+        scan_parser.add_argument(f"--{name.replace('_', '-')}", dest=name)
+    scan_parser.add_argument("--count-by", choices=DICT_COLUMNS)
+    scan_parser.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+    if args.command == "compact":
+        print(json.dumps(compact(args.dir)))
+        return
+
+    filters = {name: getattr(args, name) for name in FILTER_COLUMNS}
+    if args.count_by:
+        print(json.dumps(count_by(args.count_by, args.dir, **filters), indent=2))
+        return
+    data = scan(args.dir, **filters)
+    print(f"{len(data['id'])} matching events")
+    for i in range(min(args.limit, len(data["id"]))):
+        print(json.dumps({name: (data[name][i].item() if hasattr(data[name][i], "item") else data[name][i])
+                          for name in COLUMNS}))
+
+
+if __name__ == "__main__":
+    main()
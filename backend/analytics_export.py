@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Streaming NDJSON export of stored analytics events.
+
+Events come out in id order, the archived segments (analytics_archive.py)
+first and then the rows still in events.sqlite3. Every line carries its
+event `id`, and that id is the cursor: passing the last id you received as
+`cursor` resumes a dropped download right after it.
+
+Memory stays constant however many events match:
+
+- archive segments are decoded EXPORT_PAGE_SIZE matching rows at a time
+- SQLite is read with keyset pages (`id > cursor ORDER BY id LIMIT n`), each
+  in its own short read, so an hour-long download never pins the WAL
+
+If compaction moves rows into a new segment while an export is running, the
+export notices the segment after its next page and reads those ids from the
+archive instead (segments are written before their rows are deleted, so no
+id can fall between the two).
+
+    GET /api/analytics/export?portfolio=gaming&start=2026-01-01&cursor=12345
+    python analytics_export.py --portfolio gaming > events.ndjson
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+from analytics_archive import list_segments
+from analytics_store import ANALYTICS_DIR, DB_FILE
+
+EXPORT_PAGE_SIZE = 1000
+EXPORT_FILTERS = ("portfolio", "event_name")
+
+
+def parse_time(value):
+    """Epoch seconds or an ISO 8601 date/datetime (naive = UTC) -> epoch seconds"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid time: {value!r} (use epoch seconds or ISO 8601)")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _line(event_id, received_at, event_name, portfolio, session_id, user_id, client_ts, properties):
+    record = json.dumps({
+        "id": int(event_id),
+        "received_at": datetime.fromtimestamp(float(received_at), timezone.utc).isoformat(),
+        "event_name": str(event_name),
+        "portfolio": str(portfolio),
+        "session_id": str(session_id),
+        "user_id": str(user_id),
+        "timestamp": str(client_ts),
+    }, ensure_ascii=False)
+    if properties is None:
+        return record + "\n"
+    # Stored properties are already serialized JSON; splice them in unparsed
+    return f'{record[:-1]}, "properties": {properties}}}\n'
+
+
+def _segment_lines(segment, cursor, filters, start, end, page_size):
+    ids = segment.array("id")
+    mask = ids > cursor
+    for column, value in filters.items():
+        code = segment.code_for(column, value)
+        if code is None:
+            return
+        mask &= segment.codes(column) == code
+    if start is not None or end is not None:
+        received_at = segment.array("received_at")
+        if start is not None:
+            mask &= received_at >= start
+        if end is not None:
+            mask &= received_at < end
+
+    rows = np.flatnonzero(mask)
+    for offset in range(0, len(rows), page_size):
+        page = rows[offset:offset + page_size]
+        columns = [segment.column(name, page) for name in
+                   ("id", "received_at", "event_name", "portfolio", "session_id", "user_id", "client_ts", "properties")]
+        for values in zip(*columns):
+            yield int(values[0]), _line(*values)
+
+
+def _sqlite_page(path, cursor, filters, start, end, page_size):
+    clauses = ["id > ?"]
+    params = [cursor]
+    for column, value in filters.items():
+        clauses.append(f"{column} = ?")
+        params.append(value)
+    if start is not None:
+        clauses.append("received_at >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("received_at < ?")
+        params.append(end)
+    params.append(page_size)
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+    try:
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn.execute(
+            "SELECT id, received_at, event_name, portfolio, session_id, user_id, client_ts, properties "
+            f"FROM events WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?",
+            params
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # No database yet (nothing has been tracked)
+        return []
+    finally:
+        conn.close()
+
+
+def export_events(directory=ANALYTICS_DIR, cursor=0, start=None, end=None, limit=None,
+                  page_size=EXPORT_PAGE_SIZE, **filters):
+    """Yield NDJSON lines for events with id > cursor, in id order.
+
+    Filters are exact matches on portfolio / event_name; start/end bound the
+    server receive time (epoch seconds, end exclusive).
+    """
+    filters = {k: v for k, v in filters.items() if v is not None}
+    unknown = set(filters) - set(EXPORT_FILTERS)
+    if unknown:
+        raise ValueError(f"Unsupported filter(s): {', '.join(sorted(unknown))}")
+
+    path = f"{directory}/{DB_FILE}"
+    remaining = limit
+    while remaining is None or remaining > 0:
+        segments = [s for s in list_segments(directory) if s.last_id > cursor]
+        if segments:
+            for segment in segments:
+                if (start is not None and segment.max_ts < start) or (end is not None and segment.min_ts > end):
+                    cursor = segment.last_id
+                    continue
+                try:
+                    for event_id, line in _segment_lines(segment, cursor, filters, start, end, page_size):
+                        yield line
+                        cursor = event_id
+                        if remaining is not None:
+                            remaining -= 1
+                            if remaining == 0:
+                                return
+                finally:
+                    segment.close()
+                cursor = segment.last_id
+            continue
+
+        size = page_size if remaining is None else min(page_size, remaining)
+        rows = _sqlite_page(path, cursor, filters, start, end, size)
+        if any(s.last_id > cursor for s in list_segments(directory)):
+            # Compaction ran between pages; these ids are read from the archive instead
+            continue
+        if not rows:
+            return
+        for row in rows:
+            yield _line(*row)
+            cursor = row[0]
+        if remaining is not None:
+            remaining -= len(rows)
+        if len(rows) < size:
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export analytics events as NDJSON")
+    parser.add_argument("--dir", default=ANALYTICS_DIR, help="Analytics data directory")
+    parser.add_argument("--cursor", type=int, default=0, help="Resume after this event id")
+    parser.add_argument("--portfolio")
+    parser.add_argument("--event-name", dest="event_name")
+    parser.add_argument("--start", help="Epoch seconds or ISO 8601")
+    parser.add_argument("--end", help="Epoch seconds or ISO 8601 (exclusive)")
+    parser.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    for line in export_events(args.dir, args.cursor, parse_time(args.start), parse_time(args.end), args.limit,
+                              portfolio=args.portfolio, event_name=args.event_name):
+        sys.stdout.write(line)
+
+
+if __name__ == "__main__":
+    main()
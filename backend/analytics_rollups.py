@@ -0,0 +1,193 @@
+"""
+Incremental analytics rollups, maintained in the same transaction that
+stores each batch of events.
+
+- rollup_total:  all-time counts per (event_name, portfolio)
+- rollup_minute: per-minute counts per (event_name, portfolio), kept ROLLUP_MINUTE_RETENTION
+- rollup_hour:   per-hour counts per (event_name, portfolio), kept ROLLUP_HOUR_RETENTION
+- rollup_sketch: HyperLogLog sketches of session and user ids, all-time and per hour
+
+A summary reads a bounded number of rows (names x portfolios, the last
+hour of minutes, the last day of hours, 25 sketches per kind) no matter
+how many raw events have been stored.
+
+event_name and portfolio come straight from the client, so rollup keys are
+limited to the known sets below; anything else is counted under "other".
+Raw events keep the value as sent. Add a name here when the frontend
+(shared/analytics.js) starts tracking a new event.
+"""
+
+import time
+from collections import Counter, defaultdict
+
+from hyperloglog import HyperLogLog
+
+ALL_TIME = -1
+SKETCH_KINDS = ("sessions", "users")
+
+OTHER = "other"
+ROLLUP_PORTFOLIOS = frozenset({"tech", "gaming", "content"})
+ROLLUP_EVENT_NAMES = frozenset({
+    "page_view", "session_start", "session_end", "exit_intent",
+    "scroll_depth", "final_scroll_depth", "time_milestone",
+    "portfolio_navigation", "skill_portfolio_navigation", "cross_portfolio_connection",
+    "project_interaction", "carousel_interaction",
+    "contact_form_start", "contact_form_submit", "contact_form_success", "contact_form_error",
+})
+
+
+def rollup_key(event_name, portfolio):
+    """(event_name, portfolio) as counted in the rollups; unknown values become OTHER"""
+    return (
+        event_name if event_name in ROLLUP_EVENT_NAMES else OTHER,
+        portfolio if portfolio in ROLLUP_PORTFOLIOS else OTHER,
+    )
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_total (
+    event_name TEXT NOT NULL,
+    portfolio TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (event_name, portfolio)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_minute (
+    bucket INTEGER NOT NULL,
+    event_name TEXT NOT NULL,
+    portfolio TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (bucket, event_name, portfolio)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_hour (
+    bucket INTEGER NOT NULL,
+    event_name TEXT NOT NULL,
+    portfolio TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (bucket, event_name, portfolio)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_sketch (
+    kind TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    registers BLOB NOT NULL,
+    PRIMARY KEY (kind, bucket)
+) WITHOUT ROWID;
+"""
+
+
+def apply_rollups(conn, rows):
+    """Fold stored event rows (received_at, event_name, portfolio, session_id, user_id, ...) into the rollups"""
+    totals = Counter()
+    minutes = Counter()
+    hours = Counter()
+    # (kind, hour bucket) -> distinct ids seen in this batch
+    distinct = defaultdict(set)
+
+    for received_at, event_name, portfolio, session_id, user_id in (row[:5] for row in rows):
+        minute = int(received_at // 60)
+        hour = int(received_at // 3600)
+        event_name, portfolio = rollup_key(event_name, portfolio)
+        totals[(event_name, portfolio)] += 1
+        minutes[(minute, event_name, portfolio)] += 1
+        hours[(hour, event_name, portfolio)] += 1
+        distinct[("sessions", hour)].add(session_id)
+        distinct[("users", hour)].add(user_id)
+
+    conn.executemany(
+        "INSERT INTO rollup_total (event_name, portfolio, count) VALUES (?, ?, ?) "
+        "ON CONFLICT (event_name, portfolio) DO UPDATE SET count = count + excluded.count",
+        [(name, portfolio, count) for (name, portfolio), count in totals.items()]
+    )
+    for table, counts in (("rollup_minute", minutes), ("rollup_hour", hours)):
+        conn.executemany(
+            f"INSERT INTO {table} (bucket, event_name, portfolio, count) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (bucket, event_name, portfolio) DO UPDATE SET count = count + excluded.count",
+            [(bucket, name, portfolio, count) for (bucket, name, portfolio), count in counts.items()]
+        )
+
+    sketches = {}
+    for (kind, hour), values in distinct.items():
+        hour_sketch = sketches.setdefault((kind, hour), HyperLogLog())
+        hour_sketch.update(values)
+        sketches.setdefault((kind, ALL_TIME), HyperLogLog()).merge(hour_sketch)
+
+    for (kind, bucket), sketch in sketches.items():
+        stored = conn.execute(
+            "SELECT registers FROM rollup_sketch WHERE kind = ? AND bucket = ?", (kind, bucket)
+        ).fetchone()
+        if stored:
+            sketch.merge(HyperLogLog.from_bytes(stored[0]))
+        conn.execute(
+            "INSERT OR REPLACE INTO rollup_sketch (kind, bucket, registers) VALUES (?, ?, ?)",
+            (kind, bucket, sketch.to_bytes())
+        )
+
+
+def prune_rollups(conn, minute_retention, hour_retention, now=None):
+    """Drop minute/hour buckets older than their retention (seconds)"""
+    now = time.time() if now is None else now
+    minute_cutoff = int((now - minute_retention) // 60)
+    hour_cutoff = int((now - hour_retention) // 3600)
+    conn.execute("DELETE FROM rollup_minute WHERE bucket < ?", (minute_cutoff,))
+    conn.execute("DELETE FROM rollup_hour WHERE bucket < ?", (hour_cutoff,))
+    conn.execute("DELETE FROM rollup_sketch WHERE bucket != ? AND bucket < ?", (ALL_TIME, hour_cutoff))
+
+
+def _distinct(conn, kind, buckets):
+    sketch = HyperLogLog()
+    placeholders = ",".join("?" * len(buckets))
+    for (registers,) in conn.execute(
+        f"SELECT registers FROM rollup_sketch WHERE kind = ? AND bucket IN ({placeholders})", (kind, *buckets)
+    ):
+        sketch.merge(HyperLogLog.from_bytes(registers))
+    return sketch.count()
+
+
+def summarize(conn, minutes=60, hours=24, now=None):
+    """Summary built only from rollup tables"""
+    now = time.time() if now is None else now
+    current_minute = int(now // 60)
+    current_hour = int(now // 3600)
+    first_minute = current_minute - minutes + 1
+    first_hour = current_hour - hours + 1
+
+    by_event_name = Counter()
+    by_portfolio = Counter()
+    for event_name, portfolio, count in conn.execute("SELECT event_name, portfolio, count FROM rollup_total"):
+        by_event_name[event_name] += count
+        by_portfolio[portfolio] += count
+
+    per_minute = dict.fromkeys(range(first_minute, current_minute + 1), 0)
+    for bucket, count in conn.execute(
+        "SELECT bucket, SUM(count) FROM rollup_minute WHERE bucket >= ? GROUP BY bucket", (first_minute,)
+    ):
+        if bucket in per_minute:
+            per_minute[bucket] = count
+
+    per_hour = dict.fromkeys(range(first_hour, current_hour + 1), 0)
+    window_by_event_name = Counter()
+    window_by_portfolio = Counter()
+    for bucket, event_name, portfolio, count in conn.execute(
+        "SELECT bucket, event_name, portfolio, count FROM rollup_hour WHERE bucket >= ?", (first_hour,)
+    ):
+        if bucket in per_hour:
+            per_hour[bucket] += count
+            window_by_event_name[event_name] += count
+            window_by_portfolio[portfolio] += count
+
+    window_buckets = list(per_hour)
+    return {
+        "total_events": sum(by_event_name.values()),
+        "by_event_name": dict(by_event_name.most_common()),
+        "by_portfolio": dict(by_portfolio.most_common()),
+        "unique_sessions": _distinct(conn, "sessions", [ALL_TIME]),
+        "unique_users": _distinct(conn, "users", [ALL_TIME]),
+        f"last_{hours}h": {
+            "events": sum(per_hour.values()),
+            "by_event_name": dict(window_by_event_name.most_common()),
+            "by_portfolio": dict(window_by_portfolio.most_common()),
+            "unique_sessions": _distinct(conn, "sessions", window_buckets),
+            "unique_users": _distinct(conn, "users", window_buckets),
+        },
+        "per_minute": [{"t": bucket * 60, "count": count} for bucket, count in per_minute.items()],
+        "per_hour": [{"t": bucket * 3600, "count": count} for bucket, count in per_hour.items()],
+        "distinct_counts": "approximate (HyperLogLog, ~1.6% error)",
+    }
@@ -0,0 +1,392 @@
+"""
+Durable analytics event store (SQLite in WAL mode) with a group-commit writer.
+
+/api/analytics/track only validates an event and puts it on a bounded
+in-memory queue; a background writer thread drains the queue and commits
+whatever has accumulated in one transaction, so a burst of N events costs
+one fsync instead of N. When the writer falls behind and the queue is full,
+submit() waits at most `enqueue_timeout` and then reports the event as
+rejected so the endpoint can answer 503 instead of growing memory.
+
+Every gunicorn worker runs its own writer against the same database file;
+WAL mode lets readers proceed while one writer commits, and busy_timeout
+serializes the writers. A batch that still fails with a SQLite operational
+error ("database is locked" behind a long compaction, say) is retried with
+exponential backoff before its events are counted as lost.
+
+    ANALYTICS_DIR=backend/analytics_data   # events.sqlite3 lives here
+    ANALYTICS_QUEUE_SIZE=10000
+    ANALYTICS_BATCH_SIZE=500
+    ANALYTICS_FLUSH_MS=50                  # max wait to fill a batch
+    ANALYTICS_SYNCHRONOUS=FULL             # FULL = fsync per group commit
+
+Each batch also updates the rollup tables (analytics_rollups.py) in the
+same transaction, so /api/analytics/summary never scans raw events.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+
+from analytics_rollups import ROLLUP_SCHEMA, apply_rollups, prune_rollups, summarize
+from app_logging import get_logger
+
+log = get_logger("analytics")
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYTICS_DIR = os.getenv('ANALYTICS_DIR') or os.path.join(BACKEND_DIR, "analytics_data")
+DB_FILE = "events.sqlite3"
+
+REQUIRED_FIELDS = ['event_name', 'session_id', 'user_id', 'timestamp', 'portfolio']
+MAX_FIELD_CHARS = 256
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Attempts after the first for a batch that fails with sqlite3.OperationalError;
+# the waits double from WRITE_RETRY_BACKOFF (0.1 + 0.2 + ... + 1.6 s)
+WRITE_RETRIES = 5
+WRITE_RETRY_BACKOFF = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    received_at REAL NOT NULL,
+    event_name TEXT NOT NULL,
+    portfolio TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    client_ts TEXT,
+    properties TEXT
+);
+CREATE INDEX IF NOT EXISTS events_received_at ON events (received_at);
+"""
+
+
+def validate_event(data):
+    """Return (event, None) for a storable event or (None, error message)"""
+    if not isinstance(data, dict) or not data:
+        return None, "Request body is required"
+    for field in REQUIRED_FIELDS:
+        if field not in data:
+            return None, f"Missing required field: {field}"
+    for field in ('event_name', 'portfolio', 'session_id', 'user_id'):
+        if len(str(data[field])) > MAX_FIELD_CHARS:
+            return None, f"Field too long: {field}"
+    return data, None
+
+
+class BatchError(ValueError):
+    """A batch body that can't be decoded at all (the whole request is rejected)"""
+
+
+class BatchTooLarge(BatchError):
+    """Decompressed body over the configured limit"""
+
+
+def _gunzip(body, max_bytes):
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, max_bytes + 1)
+    except zlib.error as e:
+        raise BatchError(f"Invalid gzip body: {e}")
+    if len(data) > max_bytes or decompressor.unconsumed_tail:
+        raise BatchTooLarge(f"Decompressed body exceeds {max_bytes} bytes")
+    return data
+
+
+def decode_batch(body, content_encoding=None, max_bytes=8 * 1024 * 1024):
+    """Decode a batch body into a list of raw event objects.
+
+    Accepts a JSON array, {"events": [...]}, a single JSON object, or NDJSON
+    (one event per line), optionally gzip-compressed. Compression is detected
+    from Content-Encoding or the gzip magic bytes, because sendBeacon can't
+    set headers. A line that isn't valid JSON becomes a None entry so it can
+    be rejected individually.
+    """
+    if (content_encoding or "").lower() == "gzip" or body[:2] == GZIP_MAGIC:
+        body = _gunzip(body, max_bytes)
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise BatchError("Body must be UTF-8")
+
+    stripped = text.strip()
+    if not stripped:
+        raise BatchError("Request body is required")
+
+    try:
+        data = json.loads(stripped)
+    except ValueError:
+        data = None
+        if stripped.startswith("["):
+            raise BatchError("Body must be valid JSON or NDJSON")
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return data["events"] if isinstance(data.get("events"), list) else [data]
+
+    events = []
+    for line in stripped.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            events.append(None)
+    return events
+
+
+def _row(event, received_at):
+    properties = {k: v for k, v in event.items() if k not in REQUIRED_FIELDS}
+    return (
+        received_at,
+        str(event['event_name']),
+        str(event['portfolio']),
+        str(event['session_id']),
+        str(event['user_id']),
+        str(event['timestamp']),
+        json.dumps(properties, separators=(",", ":"), default=str) if properties else None,
+    )
+
+
+def connect(path, synchronous="FULL"):
+    # Autocommit mode; writers open BEGIN IMMEDIATE transactions themselves
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class AnalyticsStore:
+    """Bounded queue + background group-commit writer over events.sqlite3"""
+
+    def __init__(self, directory=ANALYTICS_DIR, queue_size=10000, batch_size=500,
+                 flush_seconds=0.05, enqueue_timeout=0.05, synchronous="FULL",
+                 minute_retention=2 * 86400, hour_retention=90 * 86400):
+        self.directory = directory
+        self.path = os.path.join(directory, DB_FILE)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.enqueue_timeout = enqueue_timeout
+        self.synchronous = synchronous
+        self.queue_size = queue_size
+        self.minute_retention = minute_retention
+        self.hour_retention = hour_retention
+        self._pruned_at = 0.0
+
+        os.makedirs(directory, exist_ok=True)
+        conn = connect(self.path, synchronous)
+        conn.executescript(SCHEMA + ROLLUP_SCHEMA)
+        self._backfill_rollups(conn)
+        conn.close()
+
+        self._queue = queue.Queue(queue_size)
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.write_retries = 0
+        self.lost = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            queue_size=int(os.getenv('ANALYTICS_QUEUE_SIZE', '10000')),
+            batch_size=int(os.getenv('ANALYTICS_BATCH_SIZE', '500')),
+            flush_seconds=int(os.getenv('ANALYTICS_FLUSH_MS', '50')) / 1000,
+            synchronous=os.getenv('ANALYTICS_SYNCHRONOUS', 'FULL').upper(),
+            minute_retention=int(os.getenv('ROLLUP_MINUTE_RETENTION', str(2 * 86400))),
+            hour_retention=int(os.getenv('ROLLUP_HOUR_RETENTION', str(90 * 86400)))
+        )
+
+    def _backfill_rollups(self, conn):
+        # Events stored before rollups existed are folded in once
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM rollup_total LIMIT 1").fetchone() is None:
+                cursor = conn.execute(
+                    "SELECT received_at, event_name, portfolio, session_id, user_id FROM events ORDER BY id"
+                )
+                while True:
+                    rows = cursor.fetchmany(10000)
+                    if not rows:
+                        break
+                    apply_rollups(conn, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---- ingest ----
+
+    def _ensure_writer(self):
+        # Started lazily so each forked gunicorn worker gets its own thread
+        if self._writer_pid == os.getpid():
+            return
+        with self._writer_lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.queue_size)
+            self.accepted = self.written = self.lost = 0
+            threading.Thread(target=self._run, name="analytics-writer", daemon=True).start()
+            if self._writer_pid is None:
+                atexit.register(self.flush)
+            self._writer_pid = os.getpid()
+
+    def submit(self, event):
+        """Queue a validated event; False if the writer is too far behind"""
+        self._ensure_writer()
+        try:
+            self._queue.put((event, time.time()), timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._counter_lock:
+                self.rejected += 1
+            return False
+        with self._counter_lock:
+            self.accepted += 1
+        return True
+
+    def submit_many(self, events):
+        """Queue validated events; returns one bool per event.
+
+        Only the first put may wait for the writer; once the queue is full
+        the rest of the batch is rejected immediately.
+        """
+        self._ensure_writer()
+        received_at = time.time()
+        results = []
+        full = False
+        for index, event in enumerate(events):
+            if not full:
+                try:
+                    if index == 0:
+                        self._queue.put((event, received_at), timeout=self.enqueue_timeout)
+                    else:
+                        self._queue.put_nowait((event, received_at))
+                except queue.Full:
+                    full = True
+            results.append(not full)
+        accepted = sum(results)
+        with self._counter_lock:
+            self.accepted += accepted
+            self.rejected += len(results) - accepted
+        return results
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed (tests, shutdown)"""
+        if self._writer_pid != os.getpid():
+            return True
+        target = self.accepted
+        deadline = time.monotonic() + timeout
+        while self.written + self.lost < target:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    # ---- writer ----
+
+    def _run(self):
+        conn = connect(self.path, self.synchronous)
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_with_retries(conn, batch)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.write_errors += 1
+                self.lost += len(batch)
+                log.error("analytics_write_failed", extra={"events": len(batch), "error": str(e)})
+
+    def _write_with_retries(self, conn, batch):
+        """Write a batch, retrying transient SQLite errors (locks, busy) with backoff"""
+        delay = WRITE_RETRY_BACKOFF
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                return self._write_batch(conn, batch)
+            except sqlite3.OperationalError as e:
+                if attempt == WRITE_RETRIES:
+                    raise
+                self.write_retries += 1
+                log.warning("analytics_write_retry", extra={"events": len(batch), "attempt": attempt + 1, "error": str(e)})
+                time.sleep(delay)
+                delay *= 2
+
+    def _write_batch(self, conn, batch):
+        rows = [_row(event, received_at) for event, received_at in batch]
+        # IMMEDIATE takes the write lock up front, so the rollup
+        # read-modify-write can't interleave with another worker's batch
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO events (received_at, event_name, portfolio, session_id, user_id, client_ts, properties) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            apply_rollups(conn, rows)
+            now = time.time()
+            if now - self._pruned_at > 60:
+                prune_rollups(conn, self.minute_retention, self.hour_retention, now)
+                self._pruned_at = now
+            conn.execute("COMMIT")
+        except Exception:
+            # A failed COMMIT may already have ended the transaction
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    # ---- reads ----
+
+    def reader(self):
+        """A read connection (WAL readers don't block the writer)"""
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=30)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def count(self):
+        conn = self.reader()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        finally:
+            conn.close()
+
+    def summary(self, minutes=60, hours=24):
+        """Pre-aggregated summary (reads rollups only)"""
+        conn = self.reader()
+        try:
+            return summarize(conn, minutes, hours)
+        finally:
+            conn.close()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "write_retries": self.write_retries,
+            "lost": self.lost,
+        }
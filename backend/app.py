@@ -1,42 +1,79 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
 import json
-import re
+import hashlib
+import hmac
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 
-from langchain_community.vectorstores import Chroma
-from langchain_google_vertexai import VertexAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from analytics_archive import archive_stats, start_maintenance
+from analytics_export import export_events, parse_time
+from analytics_store import AnalyticsStore, BatchError, BatchTooLarge, decode_batch, validate_event
+from app_logging import debug_enabled, get_logger, setup_logging
+from injection_scanner import INJECTION_PATTERNS, SUSPICIOUS_SEQUENCES, InjectionScanner
+from metrics import (
+    ANALYTICS_EVENTS,
+    ANALYTICS_REJECTED,
+    CHAT_RESPONSES,
+    INJECTION_BLOCKS,
+    REGISTRY as METRICS,
+    ROUTING_SECONDS,
+    SIMILARITY_SEARCH_SECONDS,
+    VECTORSTORE_LOAD_SECONDS,
+)
+from graph_layout import compute_layout
+from hybrid_search import BM25Index, HybridRetriever
+from prepared_response import PreparedJSON
+from project_catalog import ProjectCatalog, QueryError
+from project_router import ProjectRouter
+from providers import ProviderPool
+from query_embedding_cache import QUERY_EMBEDDING_CACHE
+from response_cache import ResponseCache
+from vector_store import DocumentVectorStore
+from rag_index import (
+    PROJECT_DOC_MAP,
+    create_query_embeddings,
+    docs_fingerprint,
+    load_index,
+    read_project_doc,
+    split_document,
+)
 
 # Load environment variables from .env file
 load_dotenv()
 
-if os.getenv("GCP_SERVICE_ACCOUNT_JSON"):
-    sa_info = json.loads(os.getenv("GCP_SERVICE_ACCOUNT_JSON"))
-    temp_path = "/tmp/temp_key.json"
-    with open(temp_path, "w") as f:
-        json.dump(sa_info, f)
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = temp_path
-
 # ============================================
 # FLASK INITIALIZATION & CORS CONFIGURATION
 # ============================================
 
 app = Flask(__name__)
 
+# Reject oversized bodies before Flask parses them
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_REQUEST_BYTES', str(1024 * 1024)))
+
+# Each worker snapshots its metrics to METRICS_DIR; /metrics merges them
+METRICS.start_flusher()
+
+# Request-path logs are JSON lines written off-thread (see app_logging.py)
+setup_logging()
+log = get_logger("chat")
+
+CORS_ORIGINS = [
+    "http://localhost:3000",
+    "http://localhost:5000",
+    "http://localhost:8000",
+    "https://gastondana.com",
+    "https://gastondana.vercel.app",
+    "https://portfolio-jcqs164kp-gastondana627s-projects.vercel.app",
+    "https://portfolio-production-b1b4.up.railway.app",
+]
+
 CORS(app, resources={
     r"/api/*": {
-        "origins": [
-            "http://localhost:3000",
-            "http://localhost:5000",
-            "http://localhost:8000",
-            "https://gastondana.com",
-            "https://gastondana.vercel.app",
-            "https://portfolio-jcqs164kp-gastondana627s-projects.vercel.app",
-            "https://portfolio-production-b1b4.up.railway.app",
-        ],
+        "origins": CORS_ORIGINS,
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization"],
         "supports_credentials": False,
@@ -48,88 +85,62 @@ CORS(app, resources={
 # SECURITY HEADERS FOR PRODUCTION
 # ============================================
 
-@app.after_request
-def add_security_headers(response):
-    """Add security headers to all responses"""
-    if os.getenv('FLASK_ENV') == 'production' or os.getenv('PORTFOLIO_ENV') == 'production':
+IS_PRODUCTION = os.getenv('FLASK_ENV') == 'production' or os.getenv('PORTFOLIO_ENV') == 'production'
+
+def security_headers(is_secure):
+    """Production security headers (shared with the async server in asgi.py)"""
+    if not IS_PRODUCTION:
+        return {}
+    
+    headers = {
         # Prevent MIME type sniffing
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-        
+        'X-Content-Type-Options': 'nosniff',
         # Prevent clickjacking
-        response.headers['X-Frame-Options'] = 'DENY'
-        
+        'X-Frame-Options': 'DENY',
         # XSS Protection
-        response.headers['X-XSS-Protection'] = '1; mode=block'
-        
+        'X-XSS-Protection': '1; mode=block',
         # Referrer Policy
-        response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-        
+        'Referrer-Policy': 'strict-origin-when-cross-origin',
         # Content Security Policy for API
-        response.headers['Content-Security-Policy'] = "default-src 'none'; frame-ancestors 'none';"
-        
-        # HSTS for HTTPS
-        if request.is_secure:
-            response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains; preload'
+        'Content-Security-Policy': "default-src 'none'; frame-ancestors 'none';",
+    }
     
+    # HSTS for HTTPS
+    if is_secure:
+        headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains; preload'
+    
+    return headers
+
+@app.after_request
+def add_security_headers(response):
+    """Add security headers to all responses"""
+    response.headers.update(security_headers(request.is_secure))
     return response
 
 # ============================================
 # PROMPT INJECTION DEFENSE
 # ============================================
 
-INJECTION_PATTERNS = [
-    r"ignore.*instruction",
-    r"forget.*previous",
-    r"forget.*context",
-    r"disregard.*instruction",
-    r"you are now",
-    r"pretend you are",
-    r"act as if",
-    r"from now on",
-    r"new instruction",
-    r"reveal.*system",
-    r"show.*prompt",
-    r"what.*your.*system",
-    r"what.*your.*instructions",
-    r"print.*system",
-    r"display.*system",
-    r"tell me.*context",
-    r"show.*vectorstore",
-    r"reveal.*documents",
-    r"what.*documents",
-    r"list all.*files",
-]
+# Longest message we will scan at all; longer ones are rejected up front
+MAX_MESSAGE_CHARS = int(os.getenv('CHAT_MAX_MESSAGE_CHARS', '4000'))
 
-def is_prompt_injection(message):
-    """Detect common prompt injection patterns"""
-    message_lower = message.lower()
-    for pattern in INJECTION_PATTERNS:
-        if re.search(pattern, message_lower, re.IGNORECASE):
-            print(f"⚠️ Potential injection detected: {pattern}")
-            return True
-    return False
+# Detection + sanitization compiled once; a scan is linear in message length
+INJECTION_SCANNER = InjectionScanner(INJECTION_PATTERNS, SUSPICIOUS_SEQUENCES)
 
-def sanitize_user_input(message):
-    """Clean user input before sending to AI"""
-    suspicious_sequences = [
-        "<!--", "-->",
-        "{{", "}}",
-        "\\n\\n\\n",
-    ]
-    
-    sanitized = message
-    for seq in suspicious_sequences:
-        if seq in sanitized:
-            print(f"⚠️ Removed suspicious sequence: {seq}")
-            sanitized = sanitized.replace(seq, "")
-    
-    return sanitized.strip()
+def scan_user_input(message):
+    """Strip suspicious sequences and detect prompt injection"""
+    result = INJECTION_SCANNER.scan(message)
+    if result.blocked:
+        INJECTION_BLOCKS.inc()
+        log.warning("injection_blocked", extra={"pattern": result.pattern})
+    if result.removed:
+        log.info("suspicious_sequences_removed", extra={"sequences": result.removed})
+    return result
 
 # ============================================
 # MULTI-MODEL AI SETUP (SCHEDULED ROTATION)
 # ============================================
 
-AI_CLIENT = None
 AI_PROVIDER = None
 AI_AVAILABLE = False
 
@@ -155,168 +166,119 @@ try:
     scheduled_provider = get_current_provider()
     print(f"⏰ Current UTC hour: {current_time.hour}, Scheduled provider: {scheduled_provider}")
     
-    # Force OpenAI for now since it's the only configured provider
-    if os.getenv('OPENAI_API_KEY', '').strip():
-        from openai import OpenAI
-        AI_CLIENT = OpenAI(api_key=os.getenv('OPENAI_API_KEY').strip())
-        AI_PROVIDER = "openai"
-        AI_AVAILABLE = True
-        print("✅ OpenAI configured (Forced - only available provider)")
-    
-    elif os.getenv('ANTHROPIC_API_KEY', '').strip():
-        from anthropic import Anthropic
-        AI_CLIENT = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY').strip())
-        AI_PROVIDER = "claude"
+    # Every provider with a key is configured; the first one is primary and
+    # the others serve hedged requests and failover (see providers.py)
+    PROVIDERS = ProviderPool.from_env()
+    if PROVIDERS.primary:
+        AI_PROVIDER = PROVIDERS.primary.name
         AI_AVAILABLE = True
-        print("✅ Claude configured (Fallback)")
-    
-    elif os.getenv('GOOGLE_API_KEY', '').strip():
-        import google.generativeai as genai
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY').strip())
-        AI_CLIENT = genai
-        AI_PROVIDER = "google"
-        AI_AVAILABLE = True
-        print("✅ Google AI configured (Fallback)")
-    
+        print(f"✅ AI providers configured: {', '.join(p.name for p in PROVIDERS.providers)} (primary: {AI_PROVIDER}, hedging: {PROVIDERS.hedging})")
     else:
         print("⚠️ No AI API keys found. Using local responses only.")
         AI_AVAILABLE = False
 
-except ImportError as e:
-    print(f"⚠️ AI library not installed: {e}. Using local responses only.")
-    AI_AVAILABLE = False
 except Exception as e:
     print(f"⚠️ AI initialization failed: {e}. Using local responses only.")
+    PROVIDERS = ProviderPool([])
     AI_AVAILABLE = False
 
-# ============================================
-# GCP & RAG CONFIGURATION
-# ============================================
-
-PROJECT_ID = os.getenv('GOOGLE_CLOUD_PROJECT', 'sesa-trifecta-street-25')
-LOCATION = os.getenv('GOOGLE_CLOUD_LOCATION', 'us-central1')
-
 # ============================================
 # RAG SETUP (Multi-Project Text Documents)
 # ============================================
 
-VECTORSTORES = {}
-
-PROJECT_DOC_MAP = {
-    "ai-room-designer": {
-        "filename": "ai_room_designer.txt",
-        "keywords": ["room designer", "ai room", "rooms through time", "redesign", "interior design", "gemini", "fal.ai"]
-    },
-    "astro_archive": {
-        "filename": "astro_archive.txt",
-        "keywords": ["astro archive", "nasa", "space data", "memory-aware", "agents", "coaching"]
-    },
-    "nasa_kg": {
-        "filename": "nasa_kg.txt",
-        "keywords": ["nasa knowledge graph", "neo4j", "biological", "astronaut", "health", "omics"]
-    },
-    "peata": {
-        "filename": "peata.txt",
-        "keywords": ["peata", "pet recovery", "rag", "image-matching", "lost pets"]
-    },
-    "planetrics": {
-        "filename": "planetrics.txt",
-        "keywords": ["planetrics", "exoplanet", "nasa", "plotly", "dashboard"]
-    },
-    "relic": {
-        "filename": "relic.txt",
-        "keywords": ["relic", "archaeological", "geospatial", "research", "srtm", "sentinel"]
-    },
-    "sesa": {
-        "filename": "sesa.txt",
-        "keywords": ["sesa", "multi-agent", "nasa proposal", "emotional awareness"]
-    },
-    "stargate": {
-        "filename": "stargate.txt",
-        "keywords": ["stargate", "gaming", "mentorship", "coaching", "bobot"]
-    },
-    "gaming_context": {
-        "filename": "gaming_context.txt",
-        "keywords": ["gaming", "game development", "unity", "unreal", "godot", "qa testing", "game testing", "streaming", "twitch", "youtube", "game jam", "raid shadow legends", "ghost of yotei", "game design", "indie games", "multiplayer", "vr games", "mobile games", "c#", "blueprint", "gdscript", "testral", "jira", "beta testing", "game analytics", "procedural generation", "game ai", "accessibility", "cross-platform"]
-    },
-    "content_creation_context": {
-        "filename": "content_creation_context.txt",
-        "keywords": ["content creation", "video production", "youtube", "streaming", "social media", "brand partnerships", "collaborations", "tutorials", "educational content", "adobe premiere", "obs studio", "camtasia", "figma", "canva", "notion", "trello", "buffer", "analytics", "linkedin posts", "technical writing", "documentation", "workshops", "mentorship", "community", "storytelling", "multi-platform", "engagement", "viral content", "thought leadership"]
-    }
+# Hybrid retrieval: vector + BM25 over the same chunks, fused with RRF
+RAG_TOP_K = int(os.getenv('RAG_TOP_K', '3'))
+RAG_RETRIEVER_OPTIONS = {
+    "vector_weight": float(os.getenv('RAG_VECTOR_WEIGHT', '1.0')),
+    "lexical_weight": float(os.getenv('RAG_LEXICAL_WEIGHT', '1.0')),
+    "rrf_k": int(os.getenv('RAG_RRF_K', '60')),
+    "candidates": int(os.getenv('RAG_CANDIDATES', '20')),
 }
+# A query that names several projects searches up to this many of them at once
+RAG_MAX_PROJECTS = int(os.getenv('RAG_MAX_PROJECTS', '3'))
+
+# One retriever over every project's chunks; searches filter by project
+RAG_RETRIEVER = None
+_rag_load_lock = threading.Lock()
+_rag_load_failed = False
 
-def load_project_docs(project_key):
-    """Load text file for a specific project"""
+# Prebuilt index (python rag_index.py build) loaded read-only at worker boot.
+# Without one we fall back to embedding docs on first use (local dev only).
+with VECTORSTORE_LOAD_SECONDS.time(source="prebuilt"):
+    RAG_INDEX = load_index()
+
+if RAG_INDEX:
+    RAG_RETRIEVER = HybridRetriever(
+        RAG_INDEX, BM25Index(RAG_INDEX.chunks), RAG_INDEX.chunks, RAG_INDEX.chunk_projects, **RAG_RETRIEVER_OPTIONS
+    )
+    print(f"✅ RAG index {RAG_INDEX.build_id} loaded ({len(RAG_INDEX.chunks)} chunks, {len(RAG_RETRIEVER.projects())} projects)")
+else:
+    print("⚠️ No prebuilt RAG index found, docs will be embedded on first use. Run `python rag_index.py build`.")
+
+def load_project_docs():
+    """Embed every project's text file into one collection (fallback when no prebuilt index exists)"""
     try:
-        project_info = PROJECT_DOC_MAP.get(project_key)
-        if not project_info:
-            return None
-        
-        filename = project_info["filename"]
-        doc_path = os.path.join(os.path.dirname(__file__), "project_docs", filename)
-        
-        if not os.path.exists(doc_path):
-            print(f"⚠️ Doc not found: {doc_path}")
-            return None
+        chunks = []
+        chunk_projects = []
+        for project_key in PROJECT_DOC_MAP:
+            text = read_project_doc(project_key)
+            if text is None:
+                continue
+            project_chunks = split_document(text)
+            chunks.extend(project_chunks)
+            chunk_projects.extend([project_key] * len(project_chunks))
+            print(f"✂️ {project_key}: {len(project_chunks)} chunks")
         
-        print(f"📄 Loading docs for {project_key}...")
-        
-        # Read text file
-        with open(doc_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-        
-        if not text.strip():
-            print(f"⚠️ Document is empty: {filename}")
+        if not chunks:
             return None
         
-        print(f"✂️ Splitting into chunks...")
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        chunks = splitter.split_text(text)
-        print(f"✅ Created {len(chunks)} chunks for {project_key}")
-        
-        print(f"🔮 Creating embeddings for {project_key}...")
-        embeddings = VertexAIEmbeddings(
-            model_name="text-embedding-004",
-            project=PROJECT_ID,
-            location=LOCATION
-        )
-        
-        vectorstore = Chroma.from_texts(
+        print(f"🔮 Creating embeddings for {len(chunks)} chunks...")
+        # Search queries are embedded through this too, so those get cached and batched
+        embeddings = create_query_embeddings()
+        vectorstore = DocumentVectorStore.from_texts(
             chunks,
             embedding=embeddings,
-            collection_name=f"project_{project_key}"
+            metadatas=[{"project": project_key, "chunk": i} for i, project_key in enumerate(chunk_projects)]
         )
-        print(f"✅ Vector store created for {project_key}!")
-        return vectorstore
+        print(f"✅ Vector store created for {len(set(chunk_projects))} projects!")
+        return HybridRetriever(vectorstore, BM25Index(chunks), chunks, chunk_projects, **RAG_RETRIEVER_OPTIONS)
         
     except Exception as e:
-        print(f"❌ Failed to load docs for {project_key}: {e}")
+        print(f"❌ Failed to load project docs: {e}")
         return None
 
-def get_vectorstore_for_query(query):
-    """Match query to project and return vectorstore"""
-    query_lower = query.lower()
+def get_rag_retriever():
+    """The shared retriever; without a prebuilt index, docs are embedded on first use"""
+    global RAG_RETRIEVER, _rag_load_failed
+    if RAG_RETRIEVER is None and not _rag_load_failed:
+        with _rag_load_lock:
+            if RAG_RETRIEVER is None and not _rag_load_failed:
+                log.info("vectorstore_load", extra={"projects": len(PROJECT_DOC_MAP)})
+                with VECTORSTORE_LOAD_SECONDS.time(source="live"):
+                    RAG_RETRIEVER = load_project_docs()
+                _rag_load_failed = RAG_RETRIEVER is None
+    return RAG_RETRIEVER
+
+# Keyword table compiled once per worker into a single automaton
+PROJECT_ROUTER = ProjectRouter(PROJECT_DOC_MAP)
+
+def get_projects_for_query(query):
+    """Match query to projects: (retriever, [project keys with docs, best first], best match)"""
+    with ROUTING_SECONDS.time():
+        matches = PROJECT_ROUTER.route(query)
     
-    print(f"🔍 Matching query: '{query_lower}'")
+    if not matches:
+        return None, [], None
     
-    for project_key, project_info in PROJECT_DOC_MAP.items():
-        if any(keyword in query_lower for keyword in project_info["keywords"]):
-            print(f"✅ Match found for project: {project_key}")
-            
-            # Lazy load vectorstore (only when needed)
-            if project_key not in VECTORSTORES:
-                print(f"📥 Loading vectorstore for {project_key}...")
-                VECTORSTORES[project_key] = load_project_docs(project_key)
-            else:
-                print(f"♻️ Using cached vectorstore for {project_key}")
-            
-            return VECTORSTORES[project_key], project_key
+    if debug_enabled(log):
+        log.debug("project_matches", extra={"matches": matches})
     
-    return None, None
+    retriever = get_rag_retriever()
+    available = retriever.projects() if retriever else set()
+    projects = [project_key for project_key, _ in matches if project_key in available][:RAG_MAX_PROJECTS]
+    if not projects:
+        return None, [], matches[0][0]
+    return retriever, projects, projects[0]
 
 # ============================================
 # PROJECT & PORTFOLIO DATA
@@ -533,49 +495,57 @@ Be helpful, enthusiastic, and knowledgeable. Keep responses conversational but i
 # AI RESPONSE GENERATION
 # ============================================
 
+_query_embeddings = None
+
+def _embed_for_response_cache(text):
+    """Query embedding for the semantic cache tier (same model as the RAG index)"""
+    global _query_embeddings
+    if RAG_INDEX:
+        return RAG_INDEX.embed_query(text)
+    if _query_embeddings is None:
+        _query_embeddings = create_query_embeddings()
+    return _query_embeddings.embed_query(text)
+
+def response_cache_fingerprint():
+    """Cached answers are only valid for this exact system prompt + project docs"""
+    build_id = RAG_INDEX.build_id if RAG_INDEX else ""
+    return hashlib.sha256(f"{PORTFOLIO_CONTEXT}\0{docs_fingerprint()}\0{build_id}".encode("utf-8")).hexdigest()
+
+_semantic_threshold = os.getenv('RESPONSE_CACHE_SEMANTIC_THRESHOLD', '').strip()
+
+RESPONSE_CACHE = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '512')),
+    ttl_seconds=int(os.getenv('RESPONSE_CACHE_TTL', '3600')),
+    semantic_threshold=float(_semantic_threshold) if _semantic_threshold else None,
+    embed_fn=_embed_for_response_cache if _semantic_threshold else None
+)
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() != 'false'
+
 def call_ai_model(system_prompt, user_message, provider=None):
-    """Universal AI caller - routes to appropriate provider"""
+    """Universal AI caller - hedged across configured providers, None if all fail"""
     if not AI_AVAILABLE:
-        print("⚠️ AI_AVAILABLE is False, returning None")
         return None
     
-    current_provider = provider or AI_PROVIDER
+    if debug_enabled(log):
+        log.debug("ai_request", extra={
+            "system_prompt_chars": len(system_prompt),
+            "system_prompt_preview": system_prompt[:200],
+            "user_prompt": user_message
+        })
     
-    try:
-        if current_provider == "claude":
-            response = AI_CLIENT.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1024,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_message}]
-            )
-            return response.content[0].text
-        
-        elif current_provider == "openai":
-            print(f"🔍 DEBUG: Calling OpenAI with system prompt length: {len(system_prompt)}")
-            print(f"🔍 DEBUG: System prompt preview: {system_prompt[:200]}...")
-            response = AI_CLIENT.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-            result = response.choices[0].message.content
-            print(f"🔍 DEBUG: OpenAI response preview: {result[:100]}...")
-            return result
-        
-        elif current_provider == "google":
-            model = AI_CLIENT.GenerativeModel("gemini-1.5-flash")
-            prompt = f"{system_prompt}\n\nUser: {user_message}"
-            response = model.generate_content(prompt)
-            return response.text
-        
-    except Exception as e:
-        print(f"❌ {current_provider.title()} error: {e}")
-        return None
+    response, answered_by = PROVIDERS.call(system_prompt, user_message, prefer=provider)
+    if response:
+        log.info("ai_response", extra={"provider": answered_by, "chars": len(response)})
+        if debug_enabled(log):
+            log.debug("ai_response_preview", extra={"provider": answered_by, "preview": response[:100]})
+    return response
+
+def stream_ai_model(system_prompt, user_message, provider=None):
+    """Streaming variant of call_ai_model - yields text deltas as the provider sends them"""
+    if not AI_AVAILABLE:
+        return
+    
+    yield from PROVIDERS.stream(system_prompt, user_message, prefer=provider)
 
 def enhance_query_with_portfolio_context(user_message, portfolio_context):
     """Enhance user query with portfolio-specific context for better RAG matching"""
@@ -651,61 +621,166 @@ Prioritize current content creation projects and partnerships while being helpfu
     else:
         return base_prompt
 
-def generate_ai_response(user_message, portfolio_context='main'):
-    """Generate AI response using RAG (if applicable) + AI or fallback"""
-    
-    print(f"\n🔍 DEBUG: Processing query: '{user_message}'")
-    print(f"🔍 DEBUG: Portfolio context: '{portfolio_context}'")
-    print(f"🔍 DEBUG: AI Available = {AI_AVAILABLE}")
-    print(f"🔍 DEBUG: AI Provider = {AI_PROVIDER}")
+def prepare_ai_prompts(user_message, portfolio_context='main'):
+    """Route + retrieve, returning the prompts to try in order.
+
+    Each attempt is (system_prompt, user_prompt, project_key); the RAG attempt
+    (when a project matches) comes first, then the plain portfolio prompt.
+    """
+    attempts = []
     
     # Enhance query with portfolio context for better RAG matching
     enhanced_query = enhance_query_with_portfolio_context(user_message, portfolio_context)
-    vectorstore, project_key = get_vectorstore_for_query(enhanced_query)
+    retriever, projects, project_key = get_projects_for_query(enhanced_query)
     
-    print(f"🔍 DEBUG: Project detected = {project_key}")
-    print(f"🔍 DEBUG: Vectorstore found = {vectorstore is not None}")
+    if debug_enabled(log):
+        log.debug("project_routed", extra={"project": project_key, "projects": projects})
     
-    # RAG-enhanced response
-    if AI_AVAILABLE and vectorstore:
+    # RAG-enhanced prompt: one filtered search across every matched project
+    if retriever:
         try:
-            print(f"🔍 Using RAG for project: {project_key}")
-            
-            results = vectorstore.similarity_search(user_message, k=3)
-            context = "\n\n".join([doc.page_content for doc in results])
+            with SIMILARITY_SEARCH_SECONDS.time(project=project_key):
+                results = retriever.search(user_message, k=RAG_TOP_K, projects=projects)
+            if len(projects) > 1:
+                context = "\n\n".join([f"[{doc.metadata.get('project')}]\n{doc.page_content}" for doc in results])
+                about = f"Gaston's {', '.join(projects)} projects"
+            else:
+                context = "\n\n".join([doc.page_content for doc in results])
+                about = f"Gaston's {project_key} project"
             
             portfolio_prompt = get_portfolio_specific_system_prompt(portfolio_context, project_key)
-            system_prompt = f"{portfolio_prompt}\n\nYou are helping users learn about Gaston's {project_key} project. Answer based on the documentation provided."
+            system_prompt = f"{portfolio_prompt}\n\nYou are helping users learn about {about}. Answer based on the documentation provided."
             user_prompt = f"""CONTEXT FROM PROJECT DOCUMENTATION:
 {context}
 
 USER QUESTION: {user_message}
 
 Provide a helpful, conversational answer based on the documentation above. Keep it concise (2-4 sentences) unless more detail is requested."""
-            
-            response = call_ai_model(system_prompt, user_prompt)
-            if response:
-                print(f"✅ RAG response generated: {response[:100]}...")
-                return response
+            attempts.append((system_prompt, user_prompt, project_key))
             
         except Exception as e:
-            print(f"❌ RAG error: {e}")
+            log.error("rag_error", extra={"project": project_key, "error": str(e)})
     
-    # Regular AI response
-    if AI_AVAILABLE:
-        print(f"🔍 Using standard AI response (no RAG match)")
-        portfolio_prompt = get_portfolio_specific_system_prompt(portfolio_context)
-        response = call_ai_model(portfolio_prompt, user_message)
-        if response:
-            print(f"✅ AI response generated: {response[:100]}...")
-            return response
+    # Regular AI prompt
+    attempts.append((get_portfolio_specific_system_prompt(portfolio_context), user_message, None))
+    return attempts
+
+# Shared steps of a chat answer. generate_ai_response / stream_ai_response
+# drive them synchronously and asgi.py awaits the same steps, so caching,
+# counting and the fallback behave identically in both serving modes.
+
+def get_cached_response(user_message, portfolio_context):
+    """Return a cached {"response", "project"} dict, or None"""
+    if debug_enabled(log):
+        log.debug("chat_query", extra={
+            "query": user_message,
+            "portfolio_context": portfolio_context,
+            "ai_available": AI_AVAILABLE,
+            "ai_provider": AI_PROVIDER
+        })
     
-    # Fallback to local
-    print(f"🔍 Falling back to local response")
+    if not (RESPONSE_CACHE_ENABLED and AI_AVAILABLE):
+        return None
+    RESPONSE_CACHE.validate(response_cache_fingerprint)
+    cached, kind = RESPONSE_CACHE.get(user_message, portfolio_context)
+    if cached:
+        CHAT_RESPONSES.inc(source="cache")
+        log.info("response_cache_hit", extra={"kind": kind})
+    return cached
+
+def cache_response(user_message, portfolio_context, response, project_key):
+    if RESPONSE_CACHE_ENABLED:
+        RESPONSE_CACHE.put(user_message, portfolio_context, {"response": response, "project": project_key})
+
+def get_ai_attempts(user_message, portfolio_context):
+    """The prompt attempts to try in order (none when AI is unavailable)"""
+    if not AI_AVAILABLE:
+        return []
+    return prepare_ai_prompts(user_message, portfolio_context)
+
+def finish_ai_response(user_message, portfolio_context, response, project_key):
+    """Count + cache a complete provider answer"""
+    CHAT_RESPONSES.inc(source="ai")
+    cache_response(user_message, portfolio_context, response, project_key)
+
+def finish_ai_stream(user_message, portfolio_context, project_key, parts, error=None):
+    """`done` payload for one streamed attempt, or None to try the next one"""
+    if error is not None:
+        log.error("ai_stream_error", extra={"project": project_key, "error": str(error), "partial": bool(parts)})
+        if not parts:
+            return None
+        # Tokens already reached the client; finish with what we have (uncached)
+        CHAT_RESPONSES.inc(source="ai")
+        return {"response": "".join(parts), "project": project_key, "cached": False, "truncated": True}
+    
+    if not parts:
+        return None
+    response = "".join(parts)
+    finish_ai_response(user_message, portfolio_context, response, project_key)
+    return {"response": response, "project": project_key, "cached": False}
+
+def get_fallback_response(user_message, portfolio_context):
+    """Local answer once the cache and every AI attempt came up empty"""
+    log.info("local_fallback", extra={"ai_available": AI_AVAILABLE})
     return get_local_response(user_message, portfolio_context)
 
+def whole_response_events(response, project_key, cached):
+    """Stream events for an answer that is already complete"""
+    return [
+        ("token", response),
+        ("done", {"response": response, "project": project_key, "cached": cached})
+    ]
+
+def generate_ai_response(user_message, portfolio_context='main'):
+    """Generate AI response using RAG (if applicable) + AI or fallback.
+
+    Returns (response, project_key) where project_key is the project whose
+    docs were used for RAG, or None.
+    """
+    # Repeated questions skip retrieval and the paid LLM call entirely
+    cached = get_cached_response(user_message, portfolio_context)
+    if cached:
+        return cached["response"], cached["project"]
+    
+    for system_prompt, user_prompt, project_key in get_ai_attempts(user_message, portfolio_context):
+        response = call_ai_model(system_prompt, user_prompt)
+        if response:
+            finish_ai_response(user_message, portfolio_context, response, project_key)
+            return response, project_key
+    
+    return get_fallback_response(user_message, portfolio_context), None
+
+def stream_ai_response(user_message, portfolio_context='main'):
+    """Streaming counterpart of generate_ai_response.
+
+    Yields ("token", text) as provider deltas arrive, then a single
+    ("done", {"response", "project", "cached"}) item.
+    """
+    cached = get_cached_response(user_message, portfolio_context)
+    if cached:
+        yield from whole_response_events(cached["response"], cached["project"], True)
+        return
+    
+    for system_prompt, user_prompt, project_key in get_ai_attempts(user_message, portfolio_context):
+        parts = []
+        error = None
+        try:
+            for text in stream_ai_model(system_prompt, user_prompt):
+                parts.append(text)
+                yield "token", text
+        except Exception as e:
+            error = e
+        
+        done = finish_ai_stream(user_message, portfolio_context, project_key, parts, error)
+        if done:
+            yield "done", done
+            return
+    
+    yield from whole_response_events(get_fallback_response(user_message, portfolio_context), None, False)
+
 def get_local_response(message, portfolio_context='main'):
     """Local fallback responses when AI is unavailable"""
+    CHAT_RESPONSES.inc(source="local")
     lowerMessage = message.lower()
     
     # Portfolio-specific default responses
@@ -781,17 +856,205 @@ def get_local_response(message, portfolio_context='main'):
     
     return "That's an interesting question! Gaston has worked on many AI projects involving RAG systems, multi-agent architectures, and knowledge graphs. Could you be more specific about what you'd like to know?"
 
+# ============================================
+# ANALYTICS STORE
+# ============================================
+
+# Events are committed in batches by a background writer (SQLite, WAL mode)
+ANALYTICS_STORE = AnalyticsStore.from_env()
+ANALYTICS_BUSY = "Analytics store is busy, retry later"
+ANALYTICS_MAX_BATCH = int(os.getenv('ANALYTICS_MAX_BATCH', '1000'))
+ANALYTICS_MAX_DECOMPRESSED_BYTES = int(os.getenv('ANALYTICS_MAX_DECOMPRESSED_BYTES', str(8 * 1024 * 1024)))
+
+# Bearer token for /api/analytics/export (required in production, where the
+# endpoint is disabled without one; raw events include session/user ids)
+ANALYTICS_EXPORT_TOKEN = os.getenv('ANALYTICS_EXPORT_TOKEN', '')
+
+# Closed segments move to the columnar archive; old segments expire (analytics_archive.py)
+if os.getenv('ANALYTICS_COMPACTION', 'true').lower() == 'true':
+    start_maintenance(ANALYTICS_STORE.directory)
+
 # ============================================
 # API ENDPOINTS
 # ============================================
 
+# Serialized + compressed once; update_projects_data() rebuilds it if the data changes
+PROJECTS_CACHE_MAX_AGE = int(os.getenv('PROJECTS_CACHE_MAX_AGE', '300'))
+PROJECTS_CACHE_S_MAXAGE = int(os.getenv('PROJECTS_CACHE_S_MAXAGE', '3600'))
+PROJECTS_PAYLOAD = PreparedJSON(mock_projects_data, PROJECTS_CACHE_MAX_AGE, PROJECTS_CACHE_S_MAXAGE)
+
+# Inverted indexes for /api/projects/query and /api/skills/query
+PROJECT_CATALOG = ProjectCatalog(mock_projects_data)
+
+def update_projects_data(data):
+    """Swap in new projects data: re-serialize the payload and rebuild indexes if it changed"""
+    global PROJECT_CATALOG
+    if PROJECTS_PAYLOAD.update(data):
+        PROJECT_CATALOG = ProjectCatalog(data)
+        return True
+    return False
+
+def catalog_response(payload):
+    """JSON query result with the /api/projects cache policy and an ETag (304 aware)"""
+    response = jsonify(payload)
+    response.headers['Cache-Control'] = PROJECTS_PAYLOAD.cache_control
+    response.add_etag()
+    return response.make_conditional(request)
+
+# Settled graph.js layout, computed on first request for each projects version
+GRAPH_LAYOUT = {"version": None, "payload": None}
+GRAPH_LAYOUT_LOCK = threading.Lock()
+
+def graph_layout_payload():
+    """PreparedJSON of the force-directed layout for the current projects data"""
+    version = PROJECTS_PAYLOAD.version
+    if GRAPH_LAYOUT["version"] != version:
+        with GRAPH_LAYOUT_LOCK:
+            if GRAPH_LAYOUT["version"] != version:
+                layout = compute_layout(PROJECTS_PAYLOAD.data)
+                GRAPH_LAYOUT["payload"] = PreparedJSON(layout, PROJECTS_CACHE_MAX_AGE, PROJECTS_CACHE_S_MAXAGE)
+                GRAPH_LAYOUT["version"] = version
+                log.info("graph_layout_computed", extra={"nodes": len(layout["nodes"]), "iterations": layout["iterations"]})
+    return GRAPH_LAYOUT["payload"]
+
 @app.route("/api/projects", methods=["GET"])
 def get_projects():
-    """Fetch all projects and skills data"""
+    """Fetch all projects and skills data (pre-compressed, ETag/304 aware)"""
+    status, body, headers = PROJECTS_PAYLOAD.respond(
+        request.headers.get('Accept-Encoding'),
+        request.headers.get('If-None-Match')
+    )
+    response = Response(body, status=status)
+    response.headers.update(headers)
+    return response
+
+@app.route("/api/graph/layout", methods=["GET"])
+def get_graph_layout():
+    """Precomputed knowledge-graph node positions for graph.js (ETag/304 aware)"""
     try:
-        return jsonify(mock_projects_data)
+        payload = graph_layout_payload()
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        log.error("graph_layout_error", extra={"error": str(e)})
+        return jsonify({"error": "Failed to compute graph layout"}), 500
+    status, body, headers = payload.respond(
+        request.headers.get('Accept-Encoding'),
+        request.headers.get('If-None-Match')
+    )
+    response = Response(body, status=status)
+    response.headers.update(headers)
+    return response
+
+@app.route("/api/projects/query", methods=["GET"])
+def query_projects():
+    """Filter projects by group / skills / year / link type with projection and pagination"""
+    args = request.args
+    try:
+        result = PROJECT_CATALOG.query_projects(
+            group=args.getlist('group'),
+            skills=args.getlist('skills'),
+            year=args.getlist('year'),
+            link_type=args.getlist('type'),
+            skills_match=args.get('skills_match', 'all'),
+            fields=args.getlist('fields'),
+            offset=args.get('offset', 0),
+            limit=args.get('limit')
+        )
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    return catalog_response(result)
+
+@app.route("/api/skills/query", methods=["GET"])
+def query_skills():
+    """Filter skills by category / level / project with projection and pagination"""
+    args = request.args
+    try:
+        result = PROJECT_CATALOG.query_skills(
+            category=args.getlist('category'),
+            level=args.getlist('level'),
+            project=args.getlist('project'),
+            fields=args.getlist('fields'),
+            offset=args.get('offset', 0),
+            limit=args.get('limit')
+        )
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    return catalog_response(result)
+
+def validate_chat_payload(data):
+    """Validate + scan a chat request body (framework independent).
+
+    Returns (user_message, portfolio_context, None) on success or
+    (None, None, (error_payload, status_code)).
+    """
+    if not data:
+        return None, None, ({"error": "Request body is required"}, 400)
+    if not isinstance(data, dict):
+        return None, None, ({"error": "Request body must be a JSON object"}, 400)
+    
+    user_message = data.get('message', '')
+    portfolio_context = data.get('portfolio_context', 'main')
+    if not isinstance(user_message, str) or not isinstance(portfolio_context, str):
+        return None, None, ({"error": "message and portfolio_context must be strings"}, 400)
+    user_message = user_message.strip()
+    
+    if not user_message:
+        return None, None, ({"error": "Message is required"}, 400)
+    
+    # ✅ LENGTH CAP (before any scanning work)
+    if len(user_message) > MAX_MESSAGE_CHARS:
+        return None, None, ({
+            "error": f"Message is too long (max {MAX_MESSAGE_CHARS} characters)",
+            "timestamp": datetime.now().isoformat()
+        }, 413)
+    
+    log.info("chat_request", extra={"portfolio_context": portfolio_context, "message_chars": len(user_message)})
+    if debug_enabled(log):
+        log.debug("chat_message", extra={"user_message": user_message})
+    
+    # ✅ PROMPT INJECTION DEFENSE + SANITIZATION (linear-time scan)
+    scan = scan_user_input(user_message)
+    if scan.blocked:
+        return None, None, ({
+            "response": "I can only help with questions about Gaston's work and projects. Please ask something relevant.",
+            "timestamp": datetime.now().isoformat(),
+            "blocked": True,
+            "reason": "Suspicious input pattern detected"
+        }, 400)
+    
+    if not scan.text:
+        return None, None, ({"error": "Message is required"}, 400)
+    
+    return scan.text, portfolio_context, None
+
+def chat_response_payload(response, project_key):
+    """JSON body shared by /api/chat and the async server"""
+    return {
+        "response": response,
+        "timestamp": datetime.now().isoformat(),
+        "used_rag": project_key is not None,
+        "project": project_key,
+        "ai_provider": AI_PROVIDER,
+        "ai_available": AI_AVAILABLE
+    }
+
+def stream_done_payload(payload):
+    """Final SSE `done` event body for a stream_ai_response result"""
+    return {
+        **chat_response_payload(payload["response"], payload["project"]),
+        "cached": payload["cached"],
+        "truncated": payload.get("truncated", False)
+    }
+
+def parse_chat_request():
+    """Validate + scan the current Flask request.
+
+    Returns (user_message, portfolio_context, None) or (None, None, error_response).
+    """
+    user_message, portfolio_context, error = validate_chat_payload(request.get_json())
+    if error:
+        payload, status = error
+        return None, None, (jsonify(payload), status)
+    return user_message, portfolio_context, None
 
 @app.route("/api/chat", methods=["POST", "OPTIONS"])
 def chat():
@@ -801,61 +1064,87 @@ def chat():
         return "", 200
     
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({"error": "Request body is required"}), 400
-        
-        user_message = data.get('message', '').strip()
-        portfolio_context = data.get('portfolio_context', 'main')
-        
-        if not user_message:
-            return jsonify({"error": "Message is required"}), 400
-        
-        print(f"\n📞 Chat API called")
-        print(f"User message: {user_message}")
-        print(f"Portfolio context: {portfolio_context}")
-        
-        # ✅ PROMPT INJECTION DEFENSE
-        if is_prompt_injection(user_message):
-            print(f"🚨 BLOCKED: Potential prompt injection detected")
-            return jsonify({
-                "response": "I can only help with questions about Gaston's work and projects. Please ask something relevant.",
-                "timestamp": datetime.now().isoformat(),
-                "blocked": True,
-                "reason": "Suspicious input pattern detected"
-            }), 400
-        
-        # ✅ SANITIZE INPUT
-        user_message = sanitize_user_input(user_message)
+        user_message, portfolio_context, error = parse_chat_request()
+        if error:
+            return error
         
-        ai_response = generate_ai_response(user_message, portfolio_context)
+        ai_response, project_key = generate_ai_response(user_message, portfolio_context)
         
-        print(f"[{datetime.now()}] User: {user_message}")
-        print(f"[{datetime.now()}] Bot: {ai_response}")
+        if debug_enabled(log):
+            log.debug("chat_exchange", extra={"user": user_message, "bot": ai_response})
         
-        _, project_key = get_vectorstore_for_query(user_message)
-        used_rag = project_key is not None and project_key in VECTORSTORES
+        return jsonify(chat_response_payload(ai_response, project_key)), 200
         
+    except RequestEntityTooLarge:
         return jsonify({
-            "response": ai_response,
-            "timestamp": datetime.now().isoformat(),
-            "used_rag": used_rag,
-            "project": project_key if used_rag else None,
-            "ai_provider": AI_PROVIDER,
-            "ai_available": AI_AVAILABLE
-        }), 200
-        
+            "error": "Request body is too large",
+            "timestamp": datetime.now().isoformat()
+        }), 413
     except Exception as e:
-        print(f"❌ Chat endpoint error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("chat_error", extra={"error": str(e)})
         return jsonify({
             "response": "I'm having trouble processing your request right now. Please try again later!",
             "error": str(e),
             "timestamp": datetime.now().isoformat()
         }), 500
 
+def sse_event(event, payload):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route("/api/chat/stream", methods=["POST", "OPTIONS"])
+def chat_stream():
+    """Streaming chat endpoint (text/event-stream).
+
+    Emits `token` events ({"text": ...}) as the provider generates, then one
+    `done` event with the same metadata /api/chat returns. Validation errors
+    and blocked messages are returned as plain JSON, like /api/chat.
+    """
+    
+    if request.method == "OPTIONS":
+        return "", 200
+    
+    try:
+        user_message, portfolio_context, error = parse_chat_request()
+        if error:
+            return error
+    except RequestEntityTooLarge:
+        return jsonify({
+            "error": "Request body is too large",
+            "timestamp": datetime.now().isoformat()
+        }), 413
+    
+    def events():
+        try:
+            for kind, payload in stream_ai_response(user_message, portfolio_context):
+                if kind == "token":
+                    yield sse_event("token", {"text": payload})
+                else:
+                    yield sse_event("done", stream_done_payload(payload))
+        except Exception as e:
+            log.exception("chat_stream_error", extra={"error": str(e)})
+            yield sse_event("error", {
+                "response": "I'm having trouble processing your request right now. Please try again later!",
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
+            })
+    
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@app.route("/api/chat/cache", methods=["GET"])
+def chat_cache_stats():
+    """Response cache and query-embedding cache hit/miss counters for this worker"""
+    return jsonify({
+        "enabled": RESPONSE_CACHE_ENABLED,
+        "worker_pid": os.getpid(),
+        **RESPONSE_CACHE.stats(),
+        "query_embeddings": QUERY_EMBEDDING_CACHE.stats(),
+        "timestamp": datetime.now().isoformat()
+    }), 200
+
 @app.route("/", methods=["GET"])
 def root():
     """Health check endpoint"""
@@ -874,9 +1163,15 @@ def health_check():
         "timestamp": datetime.now().isoformat(),
         "ai_available": AI_AVAILABLE,
         "ai_provider": AI_PROVIDER,
+        "ai_providers": PROVIDERS.status(),
         "flask_port": 5000
     }), 200
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint (merged across all gunicorn workers)"""
+    return Response(METRICS.exposition(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/api/analytics/track", methods=["POST", "OPTIONS"])
 def track_analytics():
     """Analytics tracking endpoint for portfolio ecosystem"""
@@ -885,31 +1180,22 @@ def track_analytics():
         return "", 200
     
     try:
-        data = request.get_json()
+        event, error = validate_event(request.get_json(silent=True))
+        if error:
+            return jsonify({"error": error}), 400
         
-        if not data:
-            return jsonify({"error": "Request body is required"}), 400
-        
-        # Validate required fields
-        required_fields = ['event_name', 'session_id', 'user_id', 'timestamp', 'portfolio']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
-        
-        # Log analytics event (in production, this would go to a database)
-        print(f"\n📊 Analytics Event Received:")
-        print(f"Event: {data.get('event_name')}")
-        print(f"Portfolio: {data.get('portfolio')}")
-        print(f"Session: {data.get('session_id')}")
-        print(f"Timestamp: {data.get('timestamp')}")
+        # Queued for the background group-commit writer (analytics_store.py)
+        if not ANALYTICS_STORE.submit(event):
+            ANALYTICS_REJECTED.inc()
+            return jsonify({
+                "error": ANALYTICS_BUSY,
+                "timestamp": datetime.now().isoformat()
+            }), 503, {"Retry-After": "1"}
         
-        # In a production environment, you would:
-        # 1. Store the event in a database (MongoDB, PostgreSQL, etc.)
-        # 2. Process the data for insights
-        # 3. Implement data retention policies
-        # 4. Add privacy compliance measures
+        ANALYTICS_EVENTS.inc()
+        if debug_enabled(log):
+            log.debug("analytics_event", extra={"event_name": event['event_name'], "portfolio": event['portfolio']})
         
-        # For now, we'll just acknowledge receipt
         return jsonify({
             "status": "success",
             "message": "Analytics event tracked successfully",
@@ -917,39 +1203,133 @@ def track_analytics():
         }), 200
         
     except Exception as e:
-        print(f"❌ Analytics tracking error: {e}")
+        log.error("analytics_error", extra={"error": str(e)})
         return jsonify({
             "error": "Failed to track analytics event",
             "message": str(e),
             "timestamp": datetime.now().isoformat()
         }), 500
 
+@app.route("/api/analytics/batch", methods=["POST", "OPTIONS"])
+def track_analytics_batch():
+    """Batch ingestion: JSON array or NDJSON, optionally gzipped (sendBeacon friendly).
+
+    Returns per-event results so clients can retry only what was rejected.
+    """
+    
+    if request.method == "OPTIONS":
+        return "", 200
+    
+    try:
+        raw_events = decode_batch(
+            request.get_data(cache=False),
+            request.headers.get("Content-Encoding"),
+            ANALYTICS_MAX_DECOMPRESSED_BYTES
+        )
+    except RequestEntityTooLarge:
+        return jsonify({"error": "Request body is too large", "timestamp": datetime.now().isoformat()}), 413
+    except BatchTooLarge as e:
+        return jsonify({"error": str(e), "timestamp": datetime.now().isoformat()}), 413
+    except BatchError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if len(raw_events) > ANALYTICS_MAX_BATCH:
+        return jsonify({"error": f"Too many events in one batch (max {ANALYTICS_MAX_BATCH})"}), 413
+    
+    results = [None] * len(raw_events)
+    valid_indexes = []
+    valid_events = []
+    for index, raw in enumerate(raw_events):
+        event, error = validate_event(raw) if raw is not None else (None, "Invalid JSON")
+        if error:
+            results[index] = {"index": index, "status": "rejected", "error": error}
+        else:
+            valid_indexes.append(index)
+            valid_events.append(event)
+    
+    for index, queued in zip(valid_indexes, ANALYTICS_STORE.submit_many(valid_events)):
+        results[index] = {"index": index, "status": "accepted"} if queued else {
+            "index": index, "status": "rejected", "error": ANALYTICS_BUSY
+        }
+    
+    accepted = sum(1 for r in results if r["status"] == "accepted")
+    busy = sum(1 for r in results if r.get("error") == ANALYTICS_BUSY)
+    ANALYTICS_EVENTS.inc(accepted)
+    if busy:
+        ANALYTICS_REJECTED.inc(busy)
+    log.info("analytics_batch", extra={"events": len(results), "accepted": accepted, "rejected": len(results) - accepted})
+    
+    return jsonify({
+        "status": "success",
+        "accepted": accepted,
+        "rejected": len(results) - accepted,
+        "results": results,
+        "timestamp": datetime.now().isoformat()
+    }), 200, ({"Retry-After": "1"} if busy else {})
+
 @app.route("/api/analytics/summary", methods=["GET"])
 def get_analytics_summary():
-    """Get analytics summary (placeholder for future implementation)"""
+    """Analytics summary from pre-aggregated rollups (cost independent of event volume)"""
     try:
-        # In production, this would query the analytics database
-        # and return aggregated insights
+        minutes = min(max(request.args.get('minutes', 60, type=int), 1), 1440)
+        hours = min(max(request.args.get('hours', 24, type=int), 1), 24 * 90)
         
         return jsonify({
             "status": "success",
-            "message": "Analytics summary endpoint available",
-            "note": "Full analytics implementation requires database setup",
             "timestamp": datetime.now().isoformat(),
-            "available_endpoints": [
-                "/api/analytics/track (POST) - Track events",
-                "/api/analytics/summary (GET) - Get summary data"
-            ]
+            "summary": ANALYTICS_STORE.summary(minutes, hours),
+            "ingest": ANALYTICS_STORE.stats(),
+            "archive": archive_stats(ANALYTICS_STORE.directory)
         }), 200
         
     except Exception as e:
-        print(f"❌ Analytics summary error: {e}")
+        log.error("analytics_summary_error", extra={"error": str(e)})
         return jsonify({
             "error": "Failed to get analytics summary",
             "message": str(e),
             "timestamp": datetime.now().isoformat()
         }), 500
 
+@app.route("/api/analytics/export", methods=["GET"])
+def export_analytics():
+    """Stream stored events as NDJSON in id order; resume with ?cursor=<last id>"""
+    if ANALYTICS_EXPORT_TOKEN:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(supplied.encode(), ANALYTICS_EXPORT_TOKEN.encode()):
+            return jsonify({"error": "Unauthorized"}), 401
+    elif IS_PRODUCTION:
+        return jsonify({"error": "Export is disabled (set ANALYTICS_EXPORT_TOKEN)"}), 403
+    
+    try:
+        cursor = request.args.get('cursor', 0, type=int)
+        limit = request.args.get('limit', type=int)
+        start = parse_time(request.args.get('start'))
+        end = parse_time(request.args.get('end'))
+        lines = export_events(
+            ANALYTICS_STORE.directory, cursor, start, end, limit,
+            portfolio=request.args.get('portfolio'),
+            event_name=request.args.get('event_name')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    log.info("analytics_export", extra={"cursor": cursor, "limit": limit, "filters": dict(request.args)})
+    return Response(stream_with_context(lines), mimetype="application/x-ndjson", headers={
+        "Cache-Control": "no-store",
+        "X-Accel-Buffering": "no",
+        "X-Export-Cursor": str(cursor),
+    })
+
+# ============================================
+# STARTUP WARMUP
+# ============================================
+
+# Provider SDKs are imported on first use; by default a background thread
+# imports them right after boot so the first chat doesn't pay for it either
+# (see bench_startup.py for the import-time breakdown)
+if os.getenv('STARTUP_WARMUP', 'true').lower() == 'true':
+    PROVIDERS.warm_in_background(async_clients=os.getenv('ASYNC_SERVING', 'false').lower() == 'true')
+
 # ============================================
 # APP EXECUTION
 # ============================================
@@ -0,0 +1,140 @@
+"""
+Structured, non-blocking logging for the request path.
+
+Loggers under "portfolio" emit one JSON object per line:
+
+    {"ts": "...", "level": "INFO", "logger": "portfolio.chat", "event": "chat_response", "source": "ai", ...}
+
+Records go through a bounded queue to a listener thread that formats and
+writes them, so a request thread never blocks on stdout. If the queue is
+full the record is dropped (and counted) rather than stalling a request.
+
+    LOG_LEVEL=INFO               # DEBUG adds prompts, previews and routing detail
+    LOG_DEBUG_SAMPLE_RATE=1.0    # fraction of DEBUG events kept (0-1)
+    LOG_QUEUE_SIZE=10000
+
+DEBUG events are emitted behind `debug_enabled(logger)`, which checks the
+level and makes the sampling decision, so the payload (prompts, previews)
+is only built for events that will actually be written.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+ROOT_LOGGER = "portfolio"
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0'))
+QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra=` fields become top-level keys"""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread; only make args safe to hand over
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler = None
+_listener = None
+_listener_pid = None
+_setup_lock = threading.Lock()
+
+
+def _start_listener():
+    global _listener, _listener_pid
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    _listener = QueueListener(_handler.queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+
+def _restart_after_fork():
+    # The listener thread doesn't survive fork; give each worker its own
+    global _listener
+    if _handler is not None and _listener_pid != os.getpid():
+        _handler.queue = queue.Queue(QUEUE_SIZE)
+        _listener = None
+        _start_listener()
+
+
+def _stop_listener():
+    # Drain whatever is still queued on a clean shutdown
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+
+
+def setup_logging(level=LOG_LEVEL):
+    """Attach the queue handler to the "portfolio" logger (idempotent)"""
+    global _handler
+    with _setup_lock:
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.setLevel(level)
+        if _handler is not None:
+            return logger
+
+        _handler = _DroppingQueueHandler(queue.Queue(QUEUE_SIZE))
+        logger.addHandler(_handler)
+        logger.propagate = False
+        _start_listener()
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        atexit.register(_stop_listener)
+        return logger
+
+
+def get_logger(name):
+    """Logger under the "portfolio" namespace"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def debug_enabled(logger):
+    """True if a DEBUG event on `logger` would be emitted (level and sampling)"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    return DEBUG_SAMPLE_RATE >= 1.0 or random.random() < DEBUG_SAMPLE_RATE
+
+
+def dropped_records():
+    return _handler.dropped if _handler else 0
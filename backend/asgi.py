@@ -0,0 +1,244 @@
+"""
+Async (ASGI) serving mode for the portfolio backend.
+
+    ASYNC_SERVING=true gunicorn -c gunicorn.conf.py     # production
+    uvicorn asgi:app --port 5000                        # local
+
+/api/chat and /api/chat/stream are served natively on the event loop: the
+provider call is awaited on the SDKs' async clients (hedged, see
+providers.py), and blocking work (retrieval, query embedding, semantic cache
+lookups) runs in a thread pool via asyncio.to_thread. A slow LLM call therefore holds a coroutine, not a
+worker, so one process can keep hundreds of chats in flight.
+
+Every other route (health, projects, analytics, OPTIONS preflights) is
+handed to the unchanged Flask app through a2wsgi, so the sync deployment
+(`gunicorn app:app`) keeps working exactly as before.
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from a2wsgi import WSGIMiddleware
+
+import app as portfolio
+from app_logging import get_logger
+
+ASYNC_THREADPOOL_SIZE = int(os.getenv('ASYNC_THREADPOOL_SIZE', '64'))
+WSGI_THREADS = int(os.getenv('ASYNC_WSGI_THREADS', '16'))
+
+flask_app = WSGIMiddleware(portfolio.app, workers=WSGI_THREADS)
+log = get_logger("asgi")
+
+# ============================================
+# ASYNC PROVIDER CALLS
+# ============================================
+
+async def acall_ai_model(system_prompt, user_message):
+    """Async counterpart of app.call_ai_model (losing hedges are cancelled)"""
+    if not portfolio.AI_AVAILABLE:
+        return None
+    response, _ = await portfolio.PROVIDERS.acall(system_prompt, user_message)
+    return response
+
+async def astream_ai_model(system_prompt, user_message):
+    """Async counterpart of app.stream_ai_model"""
+    if not portfolio.AI_AVAILABLE:
+        return
+    async for text in portfolio.PROVIDERS.astream(system_prompt, user_message):
+        yield text
+
+# ============================================
+# ASYNC RESPONSE GENERATION
+# ============================================
+
+async def agenerate_ai_response(user_message, portfolio_context='main'):
+    """Async counterpart of app.generate_ai_response (same shared steps)"""
+    cached = await asyncio.to_thread(portfolio.get_cached_response, user_message, portfolio_context)
+    if cached:
+        return cached["response"], cached["project"]
+
+    attempts = await asyncio.to_thread(portfolio.get_ai_attempts, user_message, portfolio_context)
+    for system_prompt, user_prompt, project_key in attempts:
+        response = await acall_ai_model(system_prompt, user_prompt)
+        if response:
+            await asyncio.to_thread(portfolio.finish_ai_response, user_message, portfolio_context, response, project_key)
+            return response, project_key
+
+    return portfolio.get_fallback_response(user_message, portfolio_context), None
+
+async def astream_ai_response(user_message, portfolio_context='main'):
+    """Async counterpart of app.stream_ai_response (same shared steps)"""
+    cached = await asyncio.to_thread(portfolio.get_cached_response, user_message, portfolio_context)
+    if cached:
+        for event in portfolio.whole_response_events(cached["response"], cached["project"], True):
+            yield event
+        return
+
+    attempts = await asyncio.to_thread(portfolio.get_ai_attempts, user_message, portfolio_context)
+    for system_prompt, user_prompt, project_key in attempts:
+        parts = []
+        error = None
+        try:
+            async for text in astream_ai_model(system_prompt, user_prompt):
+                parts.append(text)
+                yield "token", text
+        except Exception as e:
+            error = e
+
+        done = await asyncio.to_thread(portfolio.finish_ai_stream, user_message, portfolio_context, project_key, parts, error)
+        if done:
+            yield "done", done
+            return
+
+    for event in portfolio.whole_response_events(portfolio.get_fallback_response(user_message, portfolio_context), None, False):
+        yield event
+
+# ============================================
+# ASGI PLUMBING
+# ============================================
+
+def _response_headers(scope, content_type, extra=None):
+    headers = {"content-type": content_type}
+    request_headers = dict(scope.get("headers") or [])
+    origin = request_headers.get(b"origin", b"").decode("latin1")
+    if origin in portfolio.CORS_ORIGINS:
+        headers["access-control-allow-origin"] = origin
+        headers["vary"] = "Origin"
+    headers.update({k.lower(): v for k, v in portfolio.security_headers(scope.get("scheme") == "https").items()})
+    if extra:
+        headers.update(extra)
+    return [(k.encode("latin1"), v.encode("latin1")) for k, v in headers.items()]
+
+class ClientDisconnected(Exception):
+    """The client went away before its request body was read"""
+
+async def _read_body(receive, limit):
+    """Read the request body, or return None if it exceeds `limit` bytes"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnected()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+async def _send_json(scope, send, payload, status):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": _response_headers(scope, "application/json", {"content-length": str(len(body))})
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def _parse_chat(scope, receive, send):
+    """Read + validate a chat body; sends the error response itself on failure"""
+    try:
+        body = await _read_body(receive, portfolio.app.config['MAX_CONTENT_LENGTH'])
+    except ClientDisconnected:
+        # Nobody is left to answer
+        return None, None
+    if body is None:
+        await _send_json(scope, send, {"error": "Request body is too large", "timestamp": datetime.now().isoformat()}, 413)
+        return None, None
+
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        await _send_json(scope, send, {"error": "Request body must be valid JSON"}, 400)
+        return None, None
+
+    user_message, portfolio_context, error = portfolio.validate_chat_payload(data)
+    if error:
+        payload, status = error
+        await _send_json(scope, send, payload, status)
+        return None, None
+    return user_message, portfolio_context
+
+async def chat(scope, receive, send):
+    """Async /api/chat"""
+    user_message, portfolio_context = await _parse_chat(scope, receive, send)
+    if user_message is None:
+        return
+
+    try:
+        ai_response, project_key = await agenerate_ai_response(user_message, portfolio_context)
+        await _send_json(scope, send, portfolio.chat_response_payload(ai_response, project_key), 200)
+    except Exception as e:
+        log.exception("chat_error", extra={"error": str(e)})
+        await _send_json(scope, send, {
+            "response": "I'm having trouble processing your request right now. Please try again later!",
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }, 500)
+
+async def chat_stream(scope, receive, send):
+    """Async /api/chat/stream"""
+    user_message, portfolio_context = await _parse_chat(scope, receive, send)
+    if user_message is None:
+        return
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": _response_headers(scope, "text/event-stream", {"cache-control": "no-cache", "x-accel-buffering": "no"})
+    })
+
+    async def send_event(event, payload):
+        await send({"type": "http.response.body", "body": portfolio.sse_event(event, payload).encode("utf-8"), "more_body": True})
+
+    try:
+        async for kind, payload in astream_ai_response(user_message, portfolio_context):
+            if kind == "token":
+                await send_event("token", {"text": payload})
+            else:
+                await send_event("done", portfolio.stream_done_payload(payload))
+    except Exception as e:
+        log.exception("chat_stream_error", extra={"error": str(e)})
+        await send_event("error", {
+            "response": "I'm having trouble processing your request right now. Please try again later!",
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        })
+
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+NATIVE_ROUTES = {
+    ("POST", "/api/chat"): chat,
+    ("POST", "/api/chat/stream"): chat_stream,
+}
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Retrieval/embedding work runs here; size it for many in-flight chats
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=ASYNC_THREADPOOL_SIZE, thread_name_prefix="portfolio-async")
+            )
+            print(f"✅ Async serving mode ready (threadpool={ASYNC_THREADPOOL_SIZE}, wsgi threads={WSGI_THREADS})")
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    handler = NATIVE_ROUTES.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+    if handler:
+        await handler(scope, receive, send)
+    else:
+        await flask_app(scope, receive, send)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: historical analytics queries on the columnar archive vs raw rows.
+
+Loads --events synthetic events into a scratch analytics directory, compacts
+them into archive segments, then times the same filtered count on each layout:
+
+- sqlite rows: SELECT every row and filter/count in Python (row-per-event scan)
+- sqlite json: the same, also parsing the properties JSON of every row
+- archive:     analytics_archive.count_by (dictionary codes + NumPy masks)
+
+    cd backend && python bench_analytics_archive.py --events 500000
+"""
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+from analytics_archive import compact, count_by
+from analytics_store import DB_FILE, SCHEMA, connect
+
+EVENT_NAMES = ["page_view", "project_click", "chat_message", "graph_hover", "scroll_depth", "outbound_link"]
+PORTFOLIOS = ["gaming", "ai", "space", "design", "main"]
+
+
+def load_events(directory, count, days):
+    conn = connect(f"{directory}/{DB_FILE}", "OFF")
+    conn.executescript(SCHEMA)
+    # Ends two days ago, so every event falls in a closed segment
+    start = time.time() - (days + 2) * 86400
+    step = days * 86400 / count
+    rng = random.Random(7)
+    rows = (
+        (
+            start + i * step,
+            rng.choice(EVENT_NAMES),
+            rng.choice(PORTFOLIOS),
+            f"session-{rng.randrange(count // 20 + 1)}",
+            f"user-{rng.randrange(count // 100 + 1)}",
+            "2026-01-01T00:00:00Z",
+            json.dumps({"page": f"/p/{i % 40}", "depth": i % 100}),
+        )
+        for i in range(count)
+    )
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO events (received_at, event_name, portfolio, session_id, user_id, client_ts, properties) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def rows_count_by(rows, portfolio, parse_json):
+    counts = Counter()
+    for event_name, row_portfolio, properties in rows:
+        if parse_json:
+            json.loads(properties)
+        if row_portfolio == portfolio:
+            counts[event_name] += 1
+    return counts
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=60, help="Time span the events are spread over")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="analytics-bench-")
+    try:
+        load_events(directory, args.events, args.days)
+        conn = connect(f"{directory}/{DB_FILE}")
+        rows = conn.execute("SELECT event_name, portfolio, properties FROM events").fetchall()
+        conn.close()
+
+        def sqlite_scan(parse_json):
+            conn = connect(f"{directory}/{DB_FILE}")
+            try:
+                cursor = conn.execute("SELECT event_name, portfolio, properties FROM events")
+                return rows_count_by(cursor, "gaming", parse_json)
+            finally:
+                conn.close()
+
+        sqlite_ms, expected = best_of(lambda: sqlite_scan(False), args.repeat)
+        json_ms, _ = best_of(lambda: sqlite_scan(True), args.repeat)
+        memory_ms, _ = best_of(lambda: rows_count_by(rows, "gaming", False), args.repeat)
+
+        start = time.perf_counter()
+        stats = compact(directory, retention_days=args.days + 3)
+        compact_s = time.perf_counter() - start
+
+        cold_ms, _ = best_of(lambda: count_by("event_name", directory, portfolio="gaming"), 1)
+        archive_ms, result = best_of(lambda: count_by("event_name", directory, portfolio="gaming"), args.repeat)
+        assert result == dict(expected), "archive scan disagrees with the row scan"
+
+        print(f"📦 Analytics archive benchmark ({args.events} events over {args.days} days)")
+        print("=" * 64)
+        print(f"compaction: {stats['rows']} rows -> {stats['segments']} segments in {compact_s:.2f}s")
+        print(f"{'query: count by event_name where portfolio=gaming':<52}{'ms':>12}")
+        print(f"{'sqlite rows (filter in Python)':<52}{sqlite_ms:>12.1f}")
+        print(f"{'sqlite rows + JSON properties':<52}{json_ms:>12.1f}")
+        print(f"{'rows already in memory':<52}{memory_ms:>12.1f}")
+        print(f"{'columnar archive, cold (decompress columns)':<52}{cold_ms:>12.1f}")
+        print(f"{'columnar archive, warm (cached columns)':<52}{archive_ms:>12.1f}")
+        print("=" * 64)
+        print(f"speedup vs sqlite rows: {sqlite_ms / cold_ms:.1f}x cold, {sqlite_ms / archive_ms:.1f}x warm")
+        print(f"speedup vs JSON rows:   {json_ms / cold_ms:.1f}x cold, {json_ms / archive_ms:.1f}x warm")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: micro-batched vs one-call-per-query embedding under bursty load.
+
+The remote embedding API is simulated (no network): every call costs a fixed
+round-trip plus a small per-text cost, and at most --concurrency calls can be
+in flight, the way a connection pool or per-minute quota caps a worker.
+Bursts of concurrent chats then embed their queries either directly or
+through BatchedQueryEmbeddings.
+
+    cd backend && python bench_query_batching.py --burst 64 --rtt-ms 80
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from embedding_batcher import BatchedQueryEmbeddings
+
+QUERIES = [
+    "Tell me about Peata",
+    "What is Relic?",
+    "Which game engines does Gaston use?",
+    "How does the RAG pipeline work?",
+    "What did he build for NASA?",
+    "Which tools does he use for content creation?",
+]
+
+
+class SimulatedRemoteEmbeddings:
+    """Stands in for a remote embedding API: latency, concurrency cap, call counter"""
+
+    def __init__(self, rtt_ms, per_text_ms, concurrency):
+        self.rtt = rtt_ms / 1000.0
+        self.per_text = per_text_ms / 1000.0
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self.slots:
+            with self._lock:
+                self.calls += 1
+                self.texts += len(texts)
+            time.sleep(self.rtt + self.per_text * len(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def run_burst(embedder, burst, bursts, gap_ms):
+    """Per-request latencies (ms) and total wall time over `bursts` bursts"""
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        embedder.embed_query(f"{QUERIES[i % len(QUERIES)]} #{i}")
+        return (time.perf_counter() - start) * 1e3
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=burst) as pool:
+        for _ in range(bursts):
+            latencies.extend(pool.map(one, range(burst)))
+            time.sleep(gap_ms / 1000.0)
+    return latencies, time.perf_counter() - wall_start - bursts * gap_ms / 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--burst", type=int, default=64, help="Concurrent chats per burst")
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--gap-ms", type=float, default=50.0)
+    parser.add_argument("--rtt-ms", type=float, default=80.0, help="Simulated round-trip per API call")
+    parser.add_argument("--per-text-ms", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=8, help="API calls allowed in flight")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"📦 Query embedding, {args.bursts} bursts of {args.burst} concurrent chats "
+          f"(rtt {args.rtt_ms:.0f} ms, {args.concurrency} calls in flight)")
+    print("=" * 78)
+    print(f"{'mode':<26}{'API calls':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'queries/s':>12}")
+
+    for label, wrap in (
+        ("one call per query", lambda remote: remote),
+        (f"batched {args.window_ms:g} ms / {args.max_batch}", lambda remote: BatchedQueryEmbeddings(remote, args.window_ms, args.max_batch)),
+    ):
+        remote = SimulatedRemoteEmbeddings(args.rtt_ms, args.per_text_ms, args.concurrency)
+        latencies, wall = run_burst(wrap(remote), args.burst, args.bursts, args.gap_ms)
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{label:<26}{remote.calls:>10}{statistics.median(latencies):>10.1f}{p95:>10.1f}"
+              f"{latencies[-1]:>10.1f}{len(latencies) / wall:>12.0f}")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: Aho-Corasick project router vs the old per-keyword scan.
+
+Scales PROJECT_DOC_MAP up to thousands of synthetic keywords and measures
+per-query routing cost for both approaches.
+
+    cd backend && python bench_router.py
+"""
+
+import random
+import string
+import time
+
+from project_router import ProjectRouter
+from rag_index import PROJECT_DOC_MAP
+
+QUERIES = [
+    "Tell me about Gaston's AI projects",
+    "What is Peata?",
+    "How does the RAG pipeline in Relic work with SRTM and Sentinel data?",
+    "What game engines does he use, Unity or Godot? Any game jam wins?",
+    "Tell me about his NASA work and the exoplanet dashboard built with Plotly",
+    "Which tools does he use for content creation, OBS Studio or Camtasia?",
+]
+
+
+def naive_route(project_doc_map, query):
+    """The original first-match loop from get_vectorstore_for_query"""
+    query_lower = query.lower()
+    for project_key, project_info in project_doc_map.items():
+        if any(keyword in query_lower for keyword in project_info["keywords"]):
+            return project_key
+    return None
+
+
+def scaled_doc_map(total_keywords, seed=7):
+    """PROJECT_DOC_MAP plus synthetic projects until it holds total_keywords keywords"""
+    rng = random.Random(seed)
+    doc_map = {key: dict(info) for key, info in PROJECT_DOC_MAP.items()}
+    count = sum(len(info["keywords"]) for info in doc_map.values())
+    project_id = 0
+    while count < total_keywords:
+        keywords = [
+            " ".join(
+                "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+                for _ in range(rng.randint(1, 3))
+            )
+            for _ in range(25)
+        ]
+        doc_map[f"synthetic_{project_id}"] = {"filename": "", "keywords": keywords}
+        count += len(keywords)
+        project_id += 1
+    # Synthetic projects go first so the naive scan can't stop early on real ones
+    real = {k: v for k, v in doc_map.items() if not k.startswith("synthetic_")}
+    synthetic = {k: v for k, v in doc_map.items() if k.startswith("synthetic_")}
+    return {**synthetic, **real}, count
+
+
+def time_per_query(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for query in QUERIES:
+            fn(query)
+    return (time.perf_counter() - start) / (iterations * len(QUERIES)) * 1e6
+
+
+def main():
+    print("🔍 Project router micro-benchmark")
+    print("=" * 72)
+    print(f"{'keywords':>10} {'states':>8} {'compile ms':>11} {'naive µs/q':>11} {'automaton µs/q':>15}")
+
+    for total in (150, 1_000, 5_000, 10_000, 50_000):
+        doc_map, count = scaled_doc_map(total)
+
+        start = time.perf_counter()
+        router = ProjectRouter(doc_map)
+        compile_ms = (time.perf_counter() - start) * 1e3
+
+        iterations = 200
+        naive_us = time_per_query(lambda q: naive_route(doc_map, q), iterations)
+        automaton_us = time_per_query(router.route, iterations)
+
+        print(f"{count:>10} {router.automaton.state_count:>8} {compile_ms:>11.1f} {naive_us:>11.1f} {automaton_us:>15.1f}")
+
+    print("=" * 72)
+    router = ProjectRouter(PROJECT_DOC_MAP)
+    for query in QUERIES:
+        print(f"{query[:60]:<60} -> {router.route(query)}")
+
+
+if __name__ == "__main__":
+    main()
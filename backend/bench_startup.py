@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark: worker cold start (import app + first /health) and import-time breakdown.
+
+Every gunicorn worker imports app.py before serving; with max_requests=1000
+workers are recycled all the time, so boot cost shows up as latency spikes.
+This runs fresh interpreters and reports:
+
+- cold start: process spawn -> first /health response, vs --target-ms
+- `-X importtime` breakdown of app.py's direct imports (median cumulative ms)
+- the deferred imports (provider SDKs, Vertex, text splitter) timed
+  on their own: what a worker no longer pays at boot, but does pay on first use
+
+Provider keys are stripped from the child environment, so no SDK client is
+built and no request leaves the machine.
+
+    cd backend && python bench_startup.py --runs 5 --target-ms 1000
+
+Exits non-zero if the median cold start misses the target.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFERRED_IMPORTS = [
+    "from langchain_google_vertexai import VertexAIEmbeddings",
+    "from langchain_text_splitters import RecursiveCharacterTextSplitter",
+    "import openai",
+    "import anthropic",
+    "import google.generativeai",
+]
+
+HEALTH_SNIPPET = (
+    "import app; "
+    "response = app.app.test_client().get('/health'); "
+    "assert response.status_code == 200, response.status_code"
+)
+
+
+def child_env(scratch):
+    env = {k: v for k, v in os.environ.items() if not k.endswith("_API_KEY")}
+    env.update({
+        "ANALYTICS_DIR": os.path.join(scratch, "analytics"),
+        "METRICS_DIR": os.path.join(scratch, "metrics"),
+        "ANALYTICS_COMPACTION": "false",
+    })
+    return env
+
+
+def run(args, env):
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    )
+
+
+def cold_start_ms(env):
+    start = time.perf_counter()
+    run(["-c", HEALTH_SNIPPET], env)
+    return (time.perf_counter() - start) * 1e3
+
+
+def parse_importtime(stderr, root="app"):
+    """{module: cumulative ms} for the direct imports of `root`, plus root's own total"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line.split("|")
+        if not cumulative_us.strip().isdigit():
+            continue  # header row
+        # importtime indents nested imports by two spaces per level
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth == 0 and name.strip() == root:
+            modules[root] = int(cumulative_us) / 1e3
+        elif depth == 1:
+            modules[name.strip()] = int(cumulative_us) / 1e3
+    return modules
+
+
+def import_breakdown(env, runs):
+    samples = {}
+    for _ in range(runs):
+        result = run(["-X", "importtime", "-c", "import app"], env)
+        for module, ms in parse_importtime(result.stderr).items():
+            samples.setdefault(module, []).append(ms)
+    return {module: statistics.median(values) for module, values in samples.items()}
+
+
+def deferred_import_ms(statement, env, runs):
+    snippet = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; "
+        "print((time.perf_counter() - start) * 1e3)"
+    )
+    values = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", snippet], cwd=BACKEND_DIR, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        if result.returncode != 0:
+            return None
+        values.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(values)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1000.0,
+                        help="Median cold start (spawn -> first /health) must stay under this")
+    parser.add_argument("--top", type=int, default=12, help="Rows in the import breakdown")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as scratch:
+        env = child_env(scratch)
+        # Warm the bytecode cache once so runs measure imports, not compilation
+        run(["-c", "import app"], env)
+
+        cold = [cold_start_ms(env) for _ in range(args.runs)]
+        breakdown = import_breakdown(env, args.runs)
+        deferred = {statement: deferred_import_ms(statement, env, max(1, args.runs // 2)) for statement in DEFERRED_IMPORTS}
+
+    total = breakdown.pop("app", None)
+    print(f"🚀 Backend cold start ({args.runs} runs, python {sys.version.split()[0]})")
+    print("=" * 64)
+    print(f"{'spawn -> first /health (median)':<44}{statistics.median(cold):>10.0f} ms")
+    print(f"{'spawn -> first /health (max)':<44}{max(cold):>10.0f} ms")
+    if total is not None:
+        print(f"{'import app (median, -X importtime)':<44}{total:>10.0f} ms")
+    print()
+    print(f"{'direct imports of app.py':<44}{'cumulative ms':>16}")
+    for module, ms in sorted(breakdown.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {module:<42}{ms:>16.1f}")
+    print()
+    print(f"{'deferred until first use':<44}{'import ms':>16}")
+    for statement, ms in deferred.items():
+        print(f"  {statement.split(' import ')[0].split()[-1]:<42}{'not installed' if ms is None else f'{ms:.1f}':>16}")
+    print("=" * 64)
+
+    median = statistics.median(cold)
+    if median > args.target_ms:
+        print(f"❌ cold start {median:.0f} ms exceeds target {args.target_ms:.0f} ms")
+        sys.exit(1)
+    print(f"✅ cold start {median:.0f} ms within target {args.target_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark: NumpyVectorStore (float32 / float16 / int8) vs the old Chroma path.
+
+Builds a synthetic corpus of clustered, L2-normalized embeddings at a few
+corpus sizes (text-embedding-004 is 768-d). Queries are noisy copies of
+chunk vectors. For every store it reports:
+
+- build time
+- search latency per query (median and p95, top-k by vector, no embedding call)
+- memory: matrix bytes for NumpyVectorStore; RSS growth for Chroma
+  (approximate, includes its HNSW index and SQLite state)
+- recall@k against exact float32 search
+
+    cd backend && python bench_vector_store.py --sizes 100 1000 5000 --k 5
+
+Chroma (langchain_community + chromadb) is not a deploy dependency; install
+it with `pip install -r requirements-bench.txt`. Without it only the NumPy
+stores are measured.
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+
+import numpy as np
+
+from vector_store import VECTOR_DTYPES, NumpyVectorStore, normalize_rows
+
+
+def rss_bytes():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def synthetic_corpus(n, dims, queries, seed=13):
+    """(chunk vectors, query vectors): clusters of topics plus per-chunk detail"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 20, 4), dims)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dims)).astype(np.float32)
+    vectors = normalize_rows(vectors).astype(np.float32)
+    picks = rng.integers(0, n, queries)
+    query_vectors = normalize_rows(vectors[picks] + 0.05 * rng.standard_normal((queries, dims)).astype(np.float32))
+    return vectors, query_vectors.astype(np.float32)
+
+
+def time_queries(search, query_vectors):
+    timings = []
+    results = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        results.append(search(vector))
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return results, statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def recall(results, truth, k):
+    return float(np.mean([len(set(map(int, got[:k])) & set(map(int, want[:k]))) / k for got, want in zip(results, truth)]))
+
+
+class _LookupEmbeddings:
+    """Hands Chroma the precomputed vectors so only indexing and search are timed"""
+
+    def __init__(self, texts, vectors):
+        self.by_text = {text: vector.tolist() for text, vector in zip(texts, vectors)}
+
+    def embed_documents(self, texts):
+        return [self.by_text[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.by_text[text]
+
+
+def bench_chroma(vectors, query_vectors, k):
+    try:
+        from langchain_community.vectorstores import Chroma
+    except ImportError:
+        return None
+
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    store = Chroma.from_texts(
+        texts,
+        embedding=_LookupEmbeddings(texts, vectors),
+        metadatas=[{"chunk": i} for i in range(len(texts))],
+        collection_name=f"bench_{uuid.uuid4().hex[:8]}"
+    )
+    build_ms = (time.perf_counter() - start) * 1e3
+    memory = max(rss_bytes() - rss_before, 0)
+
+    def search(vector):
+        return [doc.metadata["chunk"] for doc in store.similarity_search_by_vector(vector.tolist(), k=k)]
+
+    results, p50, p95 = time_queries(search, query_vectors)
+    store.delete_collection()
+    return build_ms, memory, results, p50, p95
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--no-chroma", action="store_true")
+    args = parser.parse_args()
+
+    print(f"🧮 Vector search, {args.dims}-d, top-{args.k}, {args.queries} queries per size")
+    print("=" * 84)
+    print(f"{'chunks':>7} {'store':<10}{'build ms':>10}{'p50 µs':>10}{'p95 µs':>10}{'memory KiB':>13}{'recall@k':>10}")
+
+    for n in args.sizes:
+        vectors, query_vectors = synthetic_corpus(n, args.dims, args.queries)
+        exact = NumpyVectorStore(vectors, "float32")
+        truth = [exact.top_k(q, args.k)[0] for q in query_vectors]
+
+        for dtype in VECTOR_DTYPES:
+            start = time.perf_counter()
+            store = NumpyVectorStore(vectors, dtype)
+            build_ms = (time.perf_counter() - start) * 1e3
+            results, p50, p95 = time_queries(lambda q: store.top_k(q, args.k)[0], query_vectors)
+            print(f"{n:>7} {dtype:<10}{build_ms:>10.1f}{p50:>10.1f}{p95:>10.1f}"
+                  f"{store.nbytes / 1024:>13.0f}{recall(results, truth, args.k):>10.3f}")
+
+        chroma = None if args.no_chroma else bench_chroma(vectors, query_vectors, args.k)
+        if chroma is not None:
+            build_ms, memory, results, p50, p95 = chroma
+            print(f"{n:>7} {'chroma':<10}{build_ms:>10.1f}{p50:>10.1f}{p95:>10.1f}"
+                  f"{memory / 1024:>12.0f}~{recall(results, truth, args.k):>10.3f}")
+        print("-" * 84)
+
+    print("memory: matrix bytes for NumPy stores; ~ = RSS growth while building (Chroma)")
+
+
+if __name__ == "__main__":
+    main()
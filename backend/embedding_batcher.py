@@ -0,0 +1,128 @@
+"""
+Micro-batching for query embeddings across concurrent requests.
+
+Every RAG search (and semantic cache lookup) embeds the user's message.
+With a remote model that is one network round-trip per chat, so N chats
+arriving together make N calls against the embedding API quota.
+BatchedQueryEmbeddings collects embed_query() calls from concurrent
+threads for a few milliseconds, sends them as one batched request and hands
+each caller its own vector.
+
+The first caller into an empty batch is the leader. It waits out the window
+(or until the batch is full) and hands the call to a small embedding pool,
+so a lone request pays at most one window of extra latency. Identical texts
+within a batch are embedded once.
+
+Every caller, leader included, waits at most EMBEDDING_BATCH_TIMEOUT for
+the batch and then raises TimeoutError; a hung embedding API holds a pool
+thread, never a request. (RAG search and the semantic cache already treat
+a failed embedding as a miss.)
+
+    EMBEDDING_BATCH_WINDOW_MS=5     # 0 disables batching
+    EMBEDDING_BATCH_MAX=32
+    EMBEDDING_BATCH_TIMEOUT=30      # seconds; defaults to AI_TIMEOUT_SECONDS
+    EMBEDDING_BATCH_WORKERS=4       # batches in flight at once
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_logging import get_logger
+from embeddings import HashedTfidfEmbeddings, embed_queries
+from metrics import QUERY_EMBEDDING_BATCH_SIZE, QUERY_EMBEDDING_SECONDS
+
+log = get_logger("embedding_batcher")
+
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv('EMBEDDING_BATCH_WINDOW_MS', '5'))
+EMBEDDING_BATCH_MAX = int(os.getenv('EMBEDDING_BATCH_MAX', '32'))
+EMBEDDING_BATCH_TIMEOUT = float(
+    os.getenv('EMBEDDING_BATCH_TIMEOUT', '').strip() or os.getenv('AI_TIMEOUT_SECONDS', '').strip() or '30'
+)
+EMBEDDING_BATCH_WORKERS = int(os.getenv('EMBEDDING_BATCH_WORKERS', '4'))
+
+
+class _Batch:
+    __slots__ = ("texts", "full", "done", "vectors", "error")
+
+    def __init__(self):
+        self.texts = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.vectors = None
+        self.error = None
+
+
+class BatchedQueryEmbeddings:
+    """LangChain-style embeddings whose embed_query calls are micro-batched"""
+
+    def __init__(self, embeddings, window_ms=EMBEDDING_BATCH_WINDOW_MS, max_batch=EMBEDDING_BATCH_MAX,
+                 timeout=EMBEDDING_BATCH_TIMEOUT, workers=EMBEDDING_BATCH_WORKERS):
+        self.embeddings = embeddings
+        self.window = window_ms / 1000.0
+        self.max_batch = max(int(max_batch), 1)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max(int(workers), 1), thread_name_prefix="query-embedding")
+        self._lock = threading.Lock()
+        self._open = None
+        self.stats = {"queries": 0, "batches": 0, "embedded": 0, "timeouts": 0}
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        with self._lock:
+            self.stats["queries"] += 1
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            position = len(batch.texts)
+            batch.texts.append(text)
+            if len(batch.texts) >= self.max_batch:
+                # Full: later callers start the next batch
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            self._pool.submit(self._run, batch)
+
+        if not batch.done.wait(self.timeout):
+            with self._lock:
+                self.stats["timeouts"] += 1
+            log.warning("query_embedding_batch_timeout", extra={"timeout_seconds": self.timeout})
+            raise TimeoutError(f"query embedding took longer than {self.timeout:g}s")
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.vectors[position]
+
+    def _run(self, batch):
+        unique = list(dict.fromkeys(batch.texts))
+        try:
+            start = time.perf_counter()
+            vectors = embed_queries(self.embeddings, unique)
+            QUERY_EMBEDDING_SECONDS.observe(time.perf_counter() - start)
+            by_text = dict(zip(unique, vectors))
+            batch.vectors = [by_text[text] for text in batch.texts]
+        except Exception as e:
+            batch.error = e
+        finally:
+            QUERY_EMBEDDING_BATCH_SIZE.observe(len(unique))
+            with self._lock:
+                self.stats["batches"] += 1
+                self.stats["embedded"] += len(unique)
+            batch.done.set()
+
+
+def batch_query_embeddings(embeddings, window_ms=EMBEDDING_BATCH_WINDOW_MS, max_batch=EMBEDDING_BATCH_MAX):
+    """Wrap `embeddings` for micro-batched queries, unless batching is off or pointless"""
+    # The local model embeds in well under a millisecond; waiting would only add latency
+    if window_ms <= 0 or max_batch <= 1 or isinstance(embeddings, HashedTfidfEmbeddings):
+        return embeddings
+    return BatchedQueryEmbeddings(embeddings, window_ms, max_batch)
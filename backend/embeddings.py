@@ -0,0 +1,162 @@
+"""
+Embedding backends for RAG: Vertex AI, or a local CPU-only model.
+
+Both expose the LangChain embeddings interface (embed_documents /
+embed_query), so the prebuilt index, the on-the-fly fallback and the semantic
+response cache work with either one. The backend is picked by name:
+
+    text-embedding-004      Vertex AI (network + GCP credentials)
+    local-tfidf-<dims>      hashed n-gram TF-IDF, pure NumPy, no network
+
+The local model hashes word unigrams/bigrams and character 3-5-grams into a
+fixed number of signed buckets (sublinear TF), weights them with IDF fitted
+on the indexed chunks, and L2-normalizes. A fitted model is named
+`local-tfidf-<dims>-<idf hash>` and saved next to the index build, so
+queries are always embedded with the exact weights the chunks were. An
+unfitted model (plain TF) still works, e.g. for the on-the-fly fallback path.
+
+    EMBEDDING_BACKEND=vertex          # or local
+    LOCAL_EMBEDDING_DIMENSIONS=2048
+"""
+
+import hashlib
+import os
+import re
+import zlib
+
+import numpy as np
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "vertex").strip().lower()
+VERTEX_EMBEDDING_MODEL = "text-embedding-004"
+LOCAL_EMBEDDING_DIMENSIONS = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "2048"))
+LOCAL_MODEL_PREFIX = "local-tfidf"
+LOCAL_MODEL_FILE = "embedding_model.npz"
+
+CHAR_NGRAMS = (3, 4, 5)
+_WORD_RE = re.compile(r"\w+")
+_SPACE_RE = re.compile(r"\s+")
+# 64-bit multiplicative hashing constants (wrap-around arithmetic on uint64)
+_BASE = np.uint64(1099511628211)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def default_model_name():
+    """Model name for the configured EMBEDDING_BACKEND"""
+    if EMBEDDING_BACKEND == "local":
+        return f"{LOCAL_MODEL_PREFIX}-{LOCAL_EMBEDDING_DIMENSIONS}"
+    if EMBEDDING_BACKEND != "vertex":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {EMBEDDING_BACKEND!r} (use vertex or local)")
+    return VERTEX_EMBEDDING_MODEL
+
+
+def is_local_model(model_name):
+    return model_name.startswith(LOCAL_MODEL_PREFIX + "-")
+
+
+def _char_ngram_hashes(text, n):
+    """Polynomial hash of every character n-gram, vectorized over the text"""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < n:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.full(len(codes) - n + 1, n, dtype=np.uint64)
+    for i in range(n):
+        hashes = hashes * _BASE + codes[i:len(codes) - n + 1 + i]
+    return hashes
+
+
+def _word_hashes(text):
+    words = _WORD_RE.findall(text)
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return np.array([zlib.crc32(f"w:{f}".encode("utf-8")) for f in features], dtype=np.uint64)
+
+
+class HashedTfidfEmbeddings:
+    """Hashed word + character n-gram TF-IDF vectors: CPU only, deterministic"""
+
+    def __init__(self, dimensions=LOCAL_EMBEDDING_DIMENSIONS, idf=None):
+        self.dimensions = int(dimensions)
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float32)
+        if self.idf is not None and self.idf.shape != (self.dimensions,):
+            raise ValueError(f"IDF has shape {self.idf.shape}, expected ({self.dimensions},)")
+
+    @property
+    def model_name(self):
+        name = f"{LOCAL_MODEL_PREFIX}-{self.dimensions}"
+        if self.idf is None:
+            return name
+        return f"{name}-{hashlib.sha256(self.idf.tobytes()).hexdigest()[:12]}"
+
+    def term_frequencies(self, text):
+        """Signed, sublinear hashed term counts (float32 [dimensions])"""
+        text = _SPACE_RE.sub(" ", text.lower()).strip()
+        hashes = np.concatenate([_word_hashes(text)] + [_char_ngram_hashes(f" {text} ", n) for n in CHAR_NGRAMS])
+        hashes = (hashes * _MIX) ^ (hashes >> np.uint64(29))
+        buckets = (hashes % np.uint64(self.dimensions)).astype(np.int64)
+        # The sign bit spreads collisions around zero instead of piling them up
+        signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+        counts = np.bincount(buckets, weights=signs, minlength=self.dimensions)
+        return (np.sign(counts) * np.log1p(np.abs(counts))).astype(np.float32)
+
+    def _embed(self, texts):
+        matrix = np.stack([self.term_frequencies(text) for text in texts]) if texts else np.empty((0, self.dimensions), np.float32)
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def fit(self, texts):
+        """A copy with IDF weights fitted on `texts` (smoothed, as in scikit-learn)"""
+        base = HashedTfidfEmbeddings(self.dimensions)
+        document_frequency = np.zeros(self.dimensions, dtype=np.float64)
+        for text in texts:
+            document_frequency += base.term_frequencies(text) != 0
+        idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+        return HashedTfidfEmbeddings(self.dimensions, idf)
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._embed([text])[0].tolist()
+
+    def save(self, directory):
+        np.savez(os.path.join(directory, LOCAL_MODEL_FILE), name=self.model_name, idf=self.idf)
+        return os.path.join(directory, LOCAL_MODEL_FILE)
+
+
+def load_local_embeddings(model_name, model_dir=None):
+    """Rebuild a local model by name; fitted models load their IDF from model_dir"""
+    parts = model_name[len(LOCAL_MODEL_PREFIX) + 1:].split("-")
+    try:
+        dimensions = int(parts[0])
+    except ValueError:
+        raise ValueError(f"Bad local embedding model name {model_name!r} (expected {LOCAL_MODEL_PREFIX}-<dims>)")
+    if len(parts) == 1:
+        return HashedTfidfEmbeddings(dimensions)
+
+    path = os.path.join(model_dir or "", LOCAL_MODEL_FILE)
+    if not model_dir or not os.path.exists(path):
+        raise FileNotFoundError(f"{model_name} needs its fitted weights ({LOCAL_MODEL_FILE}) from the index build")
+    with np.load(path) as saved:
+        model = HashedTfidfEmbeddings(dimensions, saved["idf"])
+    if model.model_name != model_name:
+        raise ValueError(f"{path} holds {model.model_name}, not {model_name}")
+    return model
+
+
+def embed_queries(embeddings, texts):
+    """Embed several queries in one call, with the query task type where the backend has one"""
+    if isinstance(embeddings, HashedTfidfEmbeddings):
+        return embeddings.embed_documents(texts)
+    embed = getattr(embeddings, "embed", None)
+    if embed is not None:
+        # VertexAIEmbeddings.embed_query is embed([text], 1, "RETRIEVAL_QUERY")
+        return embed(texts, len(texts), "RETRIEVAL_QUERY")
+    return embeddings.embed_documents(texts)
+
+
+def vertex_embeddings(model_name, project, location):
+    from langchain_google_vertexai import VertexAIEmbeddings
+
+    return VertexAIEmbeddings(model_name=model_name, project=project, location=location)
@@ -0,0 +1,166 @@
+"""
+Server-side force-directed layout for the project / skill knowledge graph.
+
+graph.js used to start every page load from random positions and run its
+O(n^2) force simulation in the browser until it settled. This module builds
+the same graph from the projects data, runs the same forces vectorized with
+NumPy once, and returns settled coordinates the client can render
+immediately.
+
+The simulated graph is exactly graph.js's: project and skill nodes, springs
+only along skill links. The physics mirror stepSim() (charge repulsion,
+collision, springs, gravity to the origin, velocity damping, alpha decay),
+so the returned positions are an equilibrium of the client's own simmer at
+alphaMin and it continues from them without a visible jump. Anything added
+here (extra nodes or links) has to be added to stepSim() too.
+
+Initial positions come from an RNG seeded with the graph's content hash, so
+the same data always produces the same layout.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+
+# Same defaults as `params` in graph.js
+DEFAULT_PARAMS = {
+    "charge": 40.0,
+    "link": 0.06,
+    "link_distance": 7.0,
+    "center": 0.012,
+    "damping": 0.86,
+    "collide": 1.7,
+    "alpha": 1.0,
+    "alpha_decay": 0.01,
+    "alpha_min": 0.05,
+}
+NODE_RADIUS = {"project": 1.06, "skill": 0.6}
+# Shell radius range for the initial scatter, as in createProjectNodes/createSkillNodes
+INITIAL_SHELL = {"project": (7.0, 4.0), "skill": (4.0, 4.0)}
+
+
+def build_graph(data):
+    """Nodes and links graph.js simulates for the projects data: ([node dicts], [link dicts])"""
+    nodes = []
+    index = {}
+
+    def add(kind, node_id, **fields):
+        key = f"{kind}:{node_id}"
+        if key not in index:
+            index[key] = len(nodes)
+            nodes.append({"key": key, "id": node_id, "kind": kind, **fields})
+        return index[key]
+
+    for project in data.get("projects", []):
+        add("project", project["id"], label=project.get("label", project["id"]), group=project.get("group"))
+    for skill in data.get("skills", []):
+        add("skill", skill["id"], label=skill.get("name", skill["id"]), category=skill.get("category"))
+
+    # Same as createSkillConnections(): one spring per resolvable skill link
+    links = []
+    for link in data.get("skill_links", []):
+        source, target = index.get(f"project:{link.get('project')}"), index.get(f"skill:{link.get('skill')}")
+        if source is not None and target is not None:
+            links.append({"source": source, "target": target, "kind": "skill"})
+    return nodes, links
+
+
+def graph_fingerprint(nodes, links, params):
+    payload = json.dumps([nodes, links, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def initial_positions(kinds, seed):
+    """Random points on per-kind spherical shells, flattened in y like graph.js"""
+    rng = np.random.default_rng(seed)
+    n = len(kinds)
+    a = rng.uniform(0, 2 * np.pi, n)
+    b = (rng.uniform(0, 1, n) - 0.5) * np.pi
+    base = np.array([INITIAL_SHELL[k][0] for k in kinds])
+    spread = np.array([INITIAL_SHELL[k][1] for k in kinds])
+    r = base + rng.uniform(0, 1, n) * spread
+    return np.stack([np.cos(a) * np.cos(b) * r, np.sin(b) * r * 0.5, np.sin(a) * np.cos(b) * r], axis=1)
+
+
+def force_layout(positions, radii, edges, params=DEFAULT_PARAMS, iterations=1500, tolerance=0.001):
+    """Run the graph.js force simulation; returns (positions, iterations run).
+
+    Runs until alpha has cooled to alpha_min and no node moves more than
+    `tolerance` per step, or `iterations` steps. Cooling takes under 100
+    steps, but forces at alpha_min are weak and settle slowly; stopping there
+    leaves the layout still drifting under graph.js's simmer, so the budget
+    covers most of that tail (~150 ms once per projects version here).
+
+    positions: (n, 3) float array, radii: (n,), edges: (m, 2) int array.
+    """
+    pos = np.array(positions, dtype=np.float64)
+    vel = np.zeros_like(pos)
+    n = len(pos)
+    if n == 0:
+        return pos, 0
+    radii = np.asarray(radii, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    min_dist = radii[:, None] + radii[None, :] + params["collide"]
+    np.fill_diagonal(min_dist, 0.0)
+    alpha = params["alpha"]
+
+    step = 0
+    for step in range(1, iterations + 1):
+        # Pairwise charge + collision, all pairs at once (one n x n plane per axis)
+        dx = pos[:, 0, None] - pos[None, :, 0]
+        dy = pos[:, 1, None] - pos[None, :, 1]
+        dz = pos[:, 2, None] - pos[None, :, 2]
+        d2 = np.maximum(dx * dx + dy * dy + dz * dz, 0.04)
+        np.fill_diagonal(d2, np.inf)
+        d = np.sqrt(d2)
+        scale = (params["charge"] * alpha / d2 + np.maximum(min_dist - d, 0.0) * 0.5) / d
+        force = np.stack([(scale * dx).sum(axis=1), (scale * dy).sum(axis=1), (scale * dz).sum(axis=1)], axis=1)
+
+        force -= pos * (params["center"] * alpha)
+
+        if len(edges):
+            src, dst = edges[:, 0], edges[:, 1]
+            link_delta = pos[dst] - pos[src]
+            length = np.maximum(np.linalg.norm(link_delta, axis=1), 0.01)
+            pull = ((length - params["link_distance"]) * params["link"] * alpha / length)[:, None] * link_delta
+            np.add.at(force, src, pull)
+            np.add.at(force, dst, -pull)
+
+        vel = (vel + force) * params["damping"]
+        pos += vel
+        if alpha > params["alpha_min"]:
+            alpha -= params["alpha_decay"]
+        elif np.abs(vel).max() < tolerance:
+            break
+
+    return pos, step
+
+
+def compute_layout(data, params=None, iterations=1500):
+    """Settled layout for the projects data (JSON-ready dict)"""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    nodes, links = build_graph(data)
+    version = graph_fingerprint(nodes, links, params)
+
+    kinds = [node["kind"] for node in nodes]
+    positions = initial_positions(kinds, int(version[:16], 16))
+    radii = [NODE_RADIUS[kind] for kind in kinds]
+    edges = [(link["source"], link["target"]) for link in links]
+    settled, steps = force_layout(positions, radii, edges, params, iterations)
+
+    out_nodes = []
+    for node, (x, y, z), radius in zip(nodes, settled.round(3).tolist(), radii):
+        out_nodes.append({**{k: v for k, v in node.items() if v is not None}, "radius": radius, "x": x, "y": y, "z": z})
+    out_links = [{
+        "source": nodes[link["source"]]["key"],
+        "target": nodes[link["target"]]["key"],
+        "kind": link["kind"],
+    } for link in links]
+    return {
+        "version": version,
+        "iterations": steps,
+        "params": params,
+        "nodes": out_nodes,
+        "links": out_links,
+    }
@@ -0,0 +1,20 @@
+# Gunicorn settings for Railway / Procfile deploys.
+#
+#   gunicorn -c gunicorn.conf.py
+#
+# ASYNC_SERVING=true switches to the ASGI app in asgi.py on uvicorn workers,
+# so chats waiting on an LLM don't tie up a worker. Unset (default) keeps the
+# original sync `app:app` deployment.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+max_requests = 1000
+max_requests_jitter = 100
+
+if os.getenv('ASYNC_SERVING', 'false').lower() == 'true':
+    wsgi_app = "asgi:app"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "app:app"
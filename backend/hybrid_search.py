@@ -0,0 +1,145 @@
+"""
+Hybrid lexical + vector retrieval for RAG chunks.
+
+Dense embeddings are good at paraphrase and bad at rare exact terms (tool
+names like "OBS Studio", "GDScript", "Testral"). BM25Index is an in-process
+Okapi BM25 index over the same chunks as the vector index: every posting's
+BM25 weight is precomputed at build time, so a lookup is one array
+scatter-add per query term. HybridRetriever runs both searches and merges
+the two rankings with weighted reciprocal rank fusion:
+
+    score(chunk) = sum(weight / (rrf_k + rank))
+
+    RAG_VECTOR_WEIGHT=1.0 / RAG_LEXICAL_WEIGHT=1.0   # 0 turns a side off
+    RAG_RRF_K=60 / RAG_CANDIDATES=20                 # fusion constant, per-side depth
+    RAG_TOP_K=3                                      # chunks put in the prompt
+"""
+
+import math
+import re
+
+import numpy as np
+
+from vector_store import IndexedChunk
+
+_TOKEN_RE = re.compile(r"\w+[#+]*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can did do does for from had has have how i in is it its me "
+    "my of on or so that the their them there these they this to was we were what when where "
+    "which who why will with you your about tell".split()
+)
+
+
+def tokenize(text):
+    """Lowercased word tokens ("c#" and "c++" survive), stopwords dropped"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of texts with precomputed posting weights"""
+
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.size = len(texts)
+        documents = [tokenize(text) for text in texts]
+        lengths = np.array([len(doc) for doc in documents], dtype=np.float64)
+        average = lengths.mean() if self.size and lengths.sum() else 1.0
+
+        term_counts = {}
+        for doc_id, tokens in enumerate(documents):
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                term_counts.setdefault(token, []).append((doc_id, tf))
+
+        # term -> (doc ids, BM25 weight of the term in each doc)
+        self.postings = {}
+        norm = k1 * (1 - b + b * lengths / average)
+        for term, entries in term_counts.items():
+            ids = np.fromiter((doc_id for doc_id, _ in entries), dtype=np.int32, count=len(entries))
+            tf = np.fromiter((count for _, count in entries), dtype=np.float64, count=len(entries))
+            idf = math.log(1 + (self.size - len(entries) + 0.5) / (len(entries) + 0.5))
+            self.postings[term] = (ids, (idf * tf * (k1 + 1) / (tf + norm[ids])).astype(np.float32))
+
+    def search(self, query, k=10, rows=None):
+        """Top-k [(doc_id, score)] among `rows` (default: all docs), best first; no match, no result"""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+
+        candidates = np.flatnonzero(scores) if rows is None else rows[scores[rows] > 0]
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(i), float(scores[i])) for i in order]
+
+
+def reciprocal_rank_fusion(rankings, weights, rrf_k=60):
+    """Merge ranked key lists: [(key, fused score)], best first"""
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + weight / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+class HybridRetriever:
+    """Vector + BM25 search over one chunk collection, fused with RRF.
+
+    `vectorstore` holds `chunks` with a `project` metadata field (the
+    prebuilt index, or one DocumentVectorStore for every project) and
+    `chunk_projects[i]` is chunk i's project; `lexical` is a BM25Index over
+    the same chunks. search() covers every project or only the listed ones.
+    """
+
+    def __init__(self, vectorstore, lexical, chunks, chunk_projects,
+                 vector_weight=1.0, lexical_weight=1.0, rrf_k=60, candidates=20):
+        self.vectorstore = vectorstore
+        self.lexical = lexical
+        self.chunks = chunks
+        self.chunk_projects = chunk_projects
+        self.project_rows = {}
+        for row, project_key in enumerate(chunk_projects):
+            self.project_rows.setdefault(project_key, []).append(row)
+        self.project_rows = {key: np.array(rows, dtype=np.int64) for key, rows in self.project_rows.items()}
+        self.vector_weight = vector_weight
+        self.lexical_weight = lexical_weight
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+
+    def projects(self):
+        """Project keys that have at least one chunk"""
+        return set(self.project_rows)
+
+    def search(self, query, k=3, projects=None):
+        """Top-k chunk documents for the query, optionally within some projects"""
+        filter = None if projects is None else {"project": {"$in": list(projects)}}
+        if self.lexical_weight <= 0:
+            return self.vectorstore.similarity_search(query, k=k, filter=filter)
+
+        # Chunks are fused by (project, text), which both sides return verbatim
+        docs = {}
+        vector_ranking = []
+        if self.vector_weight > 0:
+            for doc in self.vectorstore.similarity_search(query, k=self.candidates, filter=filter):
+                key = (doc.metadata.get("project"), doc.page_content)
+                if key not in docs:
+                    docs[key] = doc
+                    vector_ranking.append(key)
+
+        rows = None
+        if projects is not None:
+            rows = np.concatenate([self.project_rows.get(p, np.empty(0, np.int64)) for p in projects] or [np.empty(0, np.int64)])
+        lexical_ranking = []
+        for chunk_id, _ in self.lexical.search(query, self.candidates, rows):
+            key = (self.chunk_projects[chunk_id], self.chunks[chunk_id])
+            if key not in docs:
+                docs[key] = IndexedChunk(key[1], {"project": key[0], "chunk": chunk_id})
+            lexical_ranking.append(key)
+
+        fused = reciprocal_rank_fusion(
+            [vector_ranking, lexical_ranking], [self.vector_weight, self.lexical_weight], self.rrf_k
+        )
+        return [docs[key] for key, _ in fused[:k]]
@@ -0,0 +1,68 @@
+"""
+HyperLogLog distinct-count sketch.
+
+A fixed 2^p byte register array estimates the number of distinct items
+added to it (relative error about 1.04 / sqrt(2^p), ~1.6% at p=12) no
+matter how many items there are. Sketches merge with an element-wise max,
+so per-hour sketches can be combined into any larger window.
+"""
+
+import hashlib
+import math
+
+import numpy as np
+
+DEFAULT_PRECISION = 12
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 2^precision uint8 registers"""
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is None:
+            self.registers = np.zeros(self.m, dtype=np.uint8)
+        else:
+            self.registers = np.frombuffer(registers, dtype=np.uint8).copy() if isinstance(registers, (bytes, bytearray, memoryview)) else registers
+            if self.registers.shape != (self.m,):
+                raise ValueError(f"Expected {self.m} registers, got {self.registers.shape}")
+
+    def add(self, value):
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        rest_bits = 64 - self.precision
+        rank = rest_bits - (h & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        if estimate <= 2.5 * m:
+            zeros = int(np.count_nonzero(self.registers == 0))
+            if zeros:
+                estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, precision=DEFAULT_PRECISION):
+        return cls(precision, data)
@@ -0,0 +1,177 @@
+"""
+Linear-time prompt-injection scanner.
+
+The injection table is a list of "a.*b.*c" style patterns. Instead of running
+one backtracking regex per pattern, every literal piece of every pattern is
+compiled into one Aho-Corasick automaton, and the sequences we strip during
+sanitization into a second, small one. A scan makes two passes:
+
+- sanitize: suspicious sequences are removed with a stack, so a removal that
+  joins its neighbours into a new sequence ("{-->{") removes that one too.
+  The result is a fixpoint: no suspicious sequence is left anywhere;
+- detect: over the case-folded, sanitized text, each pattern tracks how many
+  of its pieces have been seen in order on the current line (`.` never
+  matches a newline, same as the old regexes). Detecting after sanitizing
+  also catches patterns that only appear once a sequence is cut out.
+
+Work per character is bounded by the longest literal, so cost is linear in
+message length and no input can trigger catastrophic backtracking. Callers
+are still expected to cap message length before scanning.
+"""
+
+import re
+
+from aho_corasick import AhoCorasick
+
+_REGEX_METACHARS = re.compile(r"[\\^$.|?*+()\[\]{}]")
+
+# Production tables: app.py builds INJECTION_SCANNER from these and bench_injection.py times them
+INJECTION_PATTERNS = [
+    r"ignore.*instruction",
+    r"forget.*previous",
+    r"forget.*context",
+    r"disregard.*instruction",
+    r"you are now",
+    r"pretend you are",
+    r"act as if",
+    r"from now on",
+    r"new instruction",
+    r"reveal.*system",
+    r"show.*prompt",
+    r"what.*your.*system",
+    r"what.*your.*instructions",
+    r"print.*system",
+    r"display.*system",
+    r"tell me.*context",
+    r"show.*vectorstore",
+    r"reveal.*documents",
+    r"what.*documents",
+    r"list all.*files",
+]
+
+SUSPICIOUS_SEQUENCES = [
+    "<!--", "-->",
+    "{{", "}}",
+    "\\n\\n\\n",
+]
+
+# str.casefold() covers re.IGNORECASE's case equivalences (including "ſ" ~ "s"
+# and the Kelvin sign ~ "k") except for the Turkish dotted/dotless i
+_CASE_FIXES = str.maketrans({"İ": "i", "ı": "i"})
+
+
+def fold_case(text):
+    """Case-fold text the way the patterns are matched"""
+    return text.translate(_CASE_FIXES).casefold()
+
+
+class ScanResult:
+    """Outcome of scanning one message"""
+
+    __slots__ = ("blocked", "pattern", "text", "removed")
+
+    def __init__(self, blocked, pattern, text, removed):
+        self.blocked = blocked
+        self.pattern = pattern
+        self.text = text
+        self.removed = removed
+
+
+class InjectionScanner:
+    """Compiled detector + sanitizer over a fixed pattern table"""
+
+    def __init__(self, injection_patterns, suspicious_sequences):
+        self.injection_patterns = list(injection_patterns)
+        self.suspicious_sequences = list(dict.fromkeys(suspicious_sequences))
+
+        literals = {}
+        # literal id -> [(pattern index, piece position), ...]
+        self._pieces = []
+        self._pattern_lengths = []
+
+        for pattern_index, pattern in enumerate(self.injection_patterns):
+            pieces = fold_case(pattern).split(".*")
+            for piece in pieces:
+                if not piece or _REGEX_METACHARS.search(piece):
+                    raise ValueError(f"Unsupported injection pattern: {pattern!r}")
+            for position, piece in enumerate(pieces):
+                if piece not in literals:
+                    literals[piece] = len(literals)
+                    self._pieces.append([])
+                self._pieces[literals[piece]].append((pattern_index, position))
+            self._pattern_lengths.append(len(pieces))
+
+        ordered = sorted(literals, key=literals.get)
+        self._literal_lengths = [len(literal) for literal in ordered]
+        self.automaton = AhoCorasick(ordered)
+        # Sequences are removed case-sensitively, like the old str.replace() chain
+        self.sequences = AhoCorasick(self.suspicious_sequences)
+
+    def sanitize(self, message):
+        """(text, removed sequences) with suspicious sequences removed to a fixpoint"""
+        goto, fail, out = self.sequences.tables()
+        sequences = self.suspicious_sequences
+
+        kept = []
+        # states[i] is the automaton state after kept[:i], so after cutting a
+        # match the scan resumes exactly where the remaining text left off
+        states = [0]
+        removed = []
+
+        for ch in message:
+            state = states[-1]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            kept.append(ch)
+            states.append(state)
+
+            if out[state]:
+                sequence = max(out[state], key=lambda i: len(sequences[i]))
+                length = len(sequences[sequence])
+                del kept[-length:]
+                del states[-length:]
+                removed.append(sequences[sequence])
+
+        return ("".join(kept) if removed else message), removed
+
+    def detect(self, message):
+        """The first injection pattern found in the message, or None"""
+        goto, fail, out = self.automaton.tables()
+        pieces = self._pieces
+        pattern_lengths = self._pattern_lengths
+        literal_lengths = self._literal_lengths
+
+        # pattern index -> (line, next piece, position the next piece may start at)
+        progress = {}
+        line = 0
+        state = 0
+
+        for pos, ch in enumerate(fold_case(message)):
+            if ch == "\n":
+                line += 1
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for literal in out[state]:
+                start = pos + 1 - literal_lengths[literal]
+                for pattern_index, position in pieces[literal]:
+                    seen_line, next_piece, gate = progress.get(pattern_index, (line, 0, 0))
+                    if seen_line != line:
+                        next_piece, gate = 0, 0
+                    if position != next_piece or start < gate:
+                        continue
+                    if next_piece + 1 == pattern_lengths[pattern_index]:
+                        return self.injection_patterns[pattern_index]
+                    progress[pattern_index] = (line, next_piece + 1, pos + 1)
+
+        return None
+
+    def scan(self, message):
+        """Strip suspicious sequences, then detect injection in what is left"""
+        text, removed = self.sanitize(message)
+        pattern = self.detect(text)
+        if pattern is not None:
+            return ScanResult(True, pattern, message, removed)
+        return ScanResult(False, None, text.strip(), removed)
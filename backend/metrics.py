@@ -0,0 +1,311 @@
+"""
+Prometheus-style metrics that aggregate across gunicorn workers.
+
+Each worker keeps its counters and histograms in plain in-process dicts
+(one lock, no I/O on the request path). A daemon thread snapshots them to
+METRICS_DIR/metrics-<pid>.json every METRICS_FLUSH_SECONDS, and a scrape
+of /metrics merges every worker's snapshot into one exposition, so the
+numbers are correct whichever worker answers the scrape.
+
+Snapshots of workers that have exited (max_requests recycling, crashes)
+are folded into metrics-archive.json so counters never go backwards.
+"""
+
+import atexit
+import bisect
+import fcntl
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from app_logging import get_logger
+
+log = get_logger("metrics")
+
+METRICS_DIR = os.getenv('METRICS_DIR') or os.path.join(tempfile.gettempdir(), "portfolio-metrics")
+FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+
+ARCHIVE_FILE = "metrics-archive.json"
+LOCK_FILE = ".lock"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (64, 256, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def snapshot(self):
+        return [[list(key), value] for key, value in self.values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.registry.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        return [[list(key), [list(series[0]), series[1], series[2]]] for key, series in self.values.items()]
+
+
+class Registry:
+    """Per-process metric store with cross-worker snapshot merging"""
+
+    def __init__(self, directory=METRICS_DIR, flush_seconds=FLUSH_SECONDS):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._flusher_pid = None
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, buckets=LATENCY_BUCKETS, labelnames=()):
+        return self._register(Histogram(self, name, documentation, buckets, labelnames))
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    # ---- snapshots ----
+
+    def snapshot(self):
+        with self.lock:
+            return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def flush(self):
+        """Write this process's snapshot atomically"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _reset_after_fork(self):
+        # A forked worker must not re-report what its parent already counted
+        self.lock = threading.Lock()
+        for metric in self.metrics.values():
+            metric.values.clear()
+        if self._flusher_pid is not None:
+            self.start_flusher()
+
+    def start_flusher(self):
+        """Start the background snapshot thread (once per process, fork-safe)"""
+        if self._flusher_pid == os.getpid():
+            return
+        if self._flusher_pid is None:
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+            # Counts since the last tick would otherwise die with the worker
+            atexit.register(self.flush)
+        self._flusher_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(self.flush_seconds)
+                try:
+                    self.flush()
+                except Exception as e:
+                    log.warning("metrics_flush_failed", extra={"error": str(e)})
+
+        threading.Thread(target=run, name="metrics-flusher", daemon=True).start()
+
+    # ---- merging ----
+
+    @staticmethod
+    def _merge_into(merged, snapshot):
+        for name, series_list in snapshot.items():
+            target = merged.setdefault(name, {})
+            for key, value in series_list:
+                key = tuple(key)
+                current = target.get(key)
+                if current is None:
+                    target[key] = value if not isinstance(value, list) else [list(value[0]), value[1], value[2]]
+                elif isinstance(value, list):
+                    if len(current[0]) == len(value[0]):
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+                        current[2] += value[2]
+                else:
+                    target[key] = current + value
+
+    @staticmethod
+    def _pid_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def collect(self):
+        """Merged view of every worker (live and exited) in this METRICS_DIR"""
+        self.flush()
+        merged = {}
+        with open(os.path.join(self.directory, LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+            archive = {}
+            self._merge_into(archive, self._read(archive_path))
+            archived = []
+
+            for filename in os.listdir(self.directory):
+                if not (filename.startswith("metrics-") and filename.endswith(".json")) or filename == ARCHIVE_FILE:
+                    continue
+                pid = filename[len("metrics-"):-len(".json")]
+                if not pid.isdigit():
+                    continue
+                snapshot = self._read(os.path.join(self.directory, filename))
+                if self._pid_alive(int(pid)):
+                    self._merge_into(merged, snapshot)
+                else:
+                    self._merge_into(archive, snapshot)
+                    archived.append(filename)
+
+            if archived:
+                tmp_path = f"{archive_path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump({name: [[list(k), v] for k, v in series.items()] for name, series in archive.items()}, f)
+                os.replace(tmp_path, archive_path)
+                for filename in archived:
+                    os.remove(os.path.join(self.directory, filename))
+
+        for name, series in archive.items():
+            self._merge_into(merged, {name: [[list(k), v] for k, v in series.items()]})
+        return merged
+
+    # ---- exposition ----
+
+    @staticmethod
+    def _format_labels(names, values, extra=None):
+        pairs = list(zip(names, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+        return "{" + ",".join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + "}"
+
+    @staticmethod
+    def _format_value(value):
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return repr(value) if isinstance(value, float) else str(value)
+
+    def exposition(self):
+        """Prometheus text format (version 0.0.4) for all workers"""
+        merged = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(merged.get(name, {}).items()):
+                if metric.kind == "counter":
+                    lines.append(f"{name}{self._format_labels(metric.labelnames, key)} {self._format_value(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == math.inf else self._format_value(float(bound))
+                    lines.append(f"{name}_bucket{self._format_labels(metric.labelnames, key, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{self._format_labels(metric.labelnames, key)} {self._format_value(total)}")
+                lines.append(f"{name}_count{self._format_labels(metric.labelnames, key)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+ROUTING_SECONDS = REGISTRY.histogram(
+    "portfolio_routing_seconds", "Keyword routing of a chat query to projects")
+VECTORSTORE_LOAD_SECONDS = REGISTRY.histogram(
+    "portfolio_vectorstore_load_seconds", "Loading a vectorstore (prebuilt index or live embedding)",
+    labelnames=("source",))
+SIMILARITY_SEARCH_SECONDS = REGISTRY.histogram(
+    "portfolio_similarity_search_seconds", "similarity_search latency", labelnames=("project",))
+QUERY_EMBEDDING_SECONDS = REGISTRY.histogram(
+    "portfolio_query_embedding_seconds", "Batched query-embedding call latency")
+QUERY_EMBEDDING_BATCH_SIZE = REGISTRY.histogram(
+    "portfolio_query_embedding_batch_size", "Distinct queries per batched embedding call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+QUERY_EMBEDDING_CACHE_LOOKUPS = REGISTRY.counter(
+    "portfolio_query_embedding_cache_lookups_total", "Query-embedding cache lookups by tier (memory, disk, miss)",
+    labelnames=("tier",))
+PROVIDER_LATENCY_SECONDS = REGISTRY.histogram(
+    "portfolio_provider_latency_seconds", "LLM provider call latency", labelnames=("provider", "outcome"))
+PROMPT_CHARS = REGISTRY.histogram(
+    "portfolio_prompt_chars", "System + user prompt size sent to a provider", buckets=SIZE_BUCKETS)
+COMPLETION_CHARS = REGISTRY.histogram(
+    "portfolio_completion_chars", "Completion size returned by a provider", buckets=SIZE_BUCKETS)
+CHAT_RESPONSES = REGISTRY.counter(
+    "portfolio_chat_responses_total", "Chat answers by source (ai, cache, local fallback)",
+    labelnames=("source",))
+INJECTION_BLOCKS = REGISTRY.counter(
+    "portfolio_injection_blocks_total", "Chat messages blocked by the injection scanner")
+ANALYTICS_EVENTS = REGISTRY.counter(
+    "portfolio_analytics_events_total", "Analytics events ingested")
+ANALYTICS_REJECTED = REGISTRY.counter(
+    "portfolio_analytics_events_rejected_total", "Analytics events rejected because the store writer fell behind")
@@ -0,0 +1,124 @@
+"""
+Pre-serialized, pre-compressed JSON responses for static payloads.
+
+A PreparedJSON serializes its data once, stores identity / gzip / brotli
+bodies, and derives a strong ETag from the content hash. Serving a request
+is then a dictionary lookup: pick the encoding from Accept-Encoding, answer
+If-None-Match with 304, and hand back bytes that were built at startup.
+update() rebuilds everything only if the data actually changed.
+
+Brotli is pinned in requirements.txt; if the package is missing anyway
+(a bare dev venv), only gzip and identity are offered.
+
+    PROJECTS_CACHE_MAX_AGE=300        # browser max-age (seconds)
+    PROJECTS_CACHE_S_MAXAGE=3600      # CDN s-maxage (seconds)
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth a Content-Encoding
+MIN_COMPRESS_BYTES = 256
+
+
+def _parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def _etag_values(header):
+    """Opaque tags listed in If-None-Match (weak prefix dropped for comparison)"""
+    return {tag.strip().removeprefix("W/") for tag in (header or "").split(",") if tag.strip()}
+
+
+class PreparedJSON:
+    """A JSON payload kept serialized and compressed, with a strong ETag"""
+
+    def __init__(self, data, max_age=300, s_maxage=3600, stale_while_revalidate=86400):
+        self.cache_control = (
+            f"public, max-age={max_age}, s-maxage={s_maxage}, "
+            f"stale-while-revalidate={stale_while_revalidate}"
+        )
+        self._lock = threading.Lock()
+        self.version = None
+        self.variants = {}
+        self.update(data)
+
+    def update(self, data):
+        """Re-serialize `data`; returns True if the payload changed"""
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        version = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            if version == self.version:
+                return False
+            # Each encoding is its own representation, so each gets its own tag
+            variants = {"identity": (body, f'"{version}"')}
+            if len(body) >= MIN_COMPRESS_BYTES:
+                variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{version}-gzip"')
+                if brotli is not None:
+                    variants["br"] = (brotli.compress(body, quality=11), f'"{version}-br"')
+            # Swapped in one assignment; respond() reads a consistent dict
+            self.variants = variants
+            self.version = version
+            self.data = data
+            return True
+
+    @property
+    def etag(self):
+        return self.variants["identity"][1]
+
+    def choose_encoding(self, accept_encoding):
+        accepted = _parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = "identity", accepted.get("identity", wildcard if "*" in accepted else 1.0)
+        # Later codings are smaller, so they win ties
+        for coding in ("gzip", "br"):
+            if coding not in self.variants:
+                continue
+            q = accepted.get(coding, wildcard)
+            if q > 0 and q >= best_q:
+                best, best_q = coding, q
+        return best
+
+    def respond(self, accept_encoding=None, if_none_match=None):
+        """(status, body, headers) for a GET with these request headers"""
+        variants = self.variants
+        encoding = self.choose_encoding(accept_encoding)
+        body, etag = variants[encoding]
+        headers = {
+            "ETag": etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        requested = _etag_values(if_none_match)
+        if "*" in requested or requested & {tag for _, tag in variants.values()}:
+            return 304, b"", headers
+
+        headers["Content-Type"] = "application/json"
+        headers["Content-Length"] = str(len(body))
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return 200, body, headers
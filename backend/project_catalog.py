@@ -0,0 +1,202 @@
+"""
+Indexed queries over the projects / skills catalog.
+
+Inverted indexes are built once per catalog version, so a filtered lookup
+is set intersections over project positions rather than a scan:
+
+    group      -> projects            ("AI Projects")
+    skill      -> projects            (skill id or name: "rag", "RAG", "AI Agents")
+    year       -> projects
+    link type  -> projects            ("github", "demo", "video")
+    category / level / project -> skills
+
+Values inside one filter are OR'd (group=Gaming,AI Projects); different
+filters are AND'd. `skills` requires every listed skill unless
+skills_match=any. Matching is case-insensitive.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+PROJECT_FIELDS = ("id", "group", "label", "description", "year", "skills", "links")
+SKILL_FIELDS = ("id", "name", "category", "level", "projects")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class QueryError(ValueError):
+    """Bad query parameters (reported as 400)"""
+
+
+def _key(value):
+    return str(value).strip().lower()
+
+
+def _split(values):
+    """Query values as a flat list: repeated params and comma lists both work"""
+    if values is None:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    return [part.strip() for value in values for part in str(value).split(",") if part.strip()]
+
+
+def _parse_years(values):
+    """Inclusive (low, high) ranges; never expanded, so 0-2000000000 costs nothing"""
+    ranges = []
+    for value in _split(values):
+        low, sep, high = value.partition("-")
+        try:
+            ranges.append((int(low), int(high)) if sep else (int(value), int(value)))
+        except ValueError:
+            raise QueryError(f"Invalid year: {value!r} (use 2024 or 2023-2024)")
+    return ranges
+
+
+def _fields(values, allowed):
+    fields = _split(values)
+    if not fields:
+        return None
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise QueryError(f"Unknown field(s): {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    # The id is always returned so results stay addressable
+    return ["id"] + [f for f in fields if f != "id"]
+
+
+def _page(items, offset, limit):
+    try:
+        offset = max(int(offset or 0), 0)
+        limit = DEFAULT_LIMIT if limit in (None, "") else int(limit)
+    except (TypeError, ValueError):
+        raise QueryError("offset and limit must be integers")
+    limit = min(max(limit, 1), MAX_LIMIT)
+    page = items[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(items) else None
+    return page, {"total": len(items), "offset": offset, "limit": limit, "next_offset": next_offset}
+
+
+class ProjectCatalog:
+    """Projects + skills with inverted indexes for filtered, paginated queries"""
+
+    def __init__(self, data):
+        self.projects = list(data.get("projects", []))
+        self.skills = list(data.get("skills", []))
+        self._build_indexes(data.get("skill_links", []))
+
+    def _build_indexes(self, skill_links):
+        self.by_group = defaultdict(set)
+        self.by_skill = defaultdict(set)
+        self.by_year = defaultdict(set)
+        self.by_link_type = defaultdict(set)
+
+        # Skills are referenced by name on projects and by id in skill_links;
+        # index both so either spelling finds the same projects
+        skill_aliases = {}
+        for skill in self.skills:
+            aliases = {_key(skill["id"]), _key(skill.get("name", skill["id"]))}
+            for alias in aliases:
+                skill_aliases[alias] = aliases
+        position = {project["id"]: i for i, project in enumerate(self.projects)}
+
+        for i, project in enumerate(self.projects):
+            self.by_group[_key(project.get("group", ""))].add(i)
+            if "year" in project:
+                self.by_year[int(project["year"])].add(i)
+            for link in project.get("links", []):
+                self.by_link_type[_key(link.get("type", ""))].add(i)
+            for name in project.get("skills", []):
+                for alias in skill_aliases.get(_key(name), {_key(name)}):
+                    self.by_skill[alias].add(i)
+        for link in skill_links:
+            if link.get("project") in position:
+                for alias in skill_aliases.get(_key(link.get("skill")), {_key(link.get("skill"))}):
+                    self.by_skill[alias].add(position[link["project"]])
+
+        self.years = sorted(self.by_year)
+
+        self.skills_by_category = defaultdict(set)
+        self.skills_by_level = defaultdict(set)
+        self.skill_projects = []
+        for i, skill in enumerate(self.skills):
+            self.skills_by_category[_key(skill.get("category", ""))].add(i)
+            self.skills_by_level[_key(skill.get("level", ""))].add(i)
+            self.skill_projects.append(sorted(self.by_skill.get(_key(skill["id"]), set())))
+        self.skills_by_project = defaultdict(set)
+        for i, projects in enumerate(self.skill_projects):
+            for project_index in projects:
+                self.skills_by_project[_key(self.projects[project_index]["id"])].add(i)
+
+    @staticmethod
+    def _union(index, values):
+        matched = set()
+        for value in values:
+            matched |= index.get(value, set())
+        return matched
+
+    def _years_in(self, ranges):
+        """Indexed years falling inside any of the ranges"""
+        years = set()
+        for low, high in ranges:
+            years.update(self.years[bisect_left(self.years, low):bisect_right(self.years, high)])
+        return years
+
+    def query_projects(self, group=None, skills=None, year=None, link_type=None,
+                       skills_match="all", fields=None, offset=0, limit=None):
+        """Filtered projects in catalog order: {"results": [...], "page": {...}}"""
+        if skills_match not in ("all", "any"):
+            raise QueryError("skills_match must be 'all' or 'any'")
+        fields = _fields(fields, PROJECT_FIELDS)
+
+        candidates = None
+        filters = []
+        if _split(group):
+            filters.append(self._union(self.by_group, [_key(g) for g in _split(group)]))
+        if _split(year):
+            filters.append(self._union(self.by_year, self._years_in(_parse_years(year))))
+        if _split(link_type):
+            filters.append(self._union(self.by_link_type, [_key(t) for t in _split(link_type)]))
+        skill_keys = [_key(s) for s in _split(skills)]
+        if skill_keys and skills_match == "any":
+            filters.append(self._union(self.by_skill, skill_keys))
+        elif skill_keys:
+            filters.extend(self.by_skill.get(s, set()) for s in skill_keys)
+
+        # Smallest set first keeps every intersection small
+        for matched in sorted(filters, key=len):
+            candidates = set(matched) if candidates is None else candidates & matched
+            if not candidates:
+                break
+
+        positions = range(len(self.projects)) if candidates is None else sorted(candidates)
+        page, meta = _page(list(positions), offset, limit)
+        results = [self._project(i, fields) for i in page]
+        return {"results": results, "page": meta}
+
+    def query_skills(self, category=None, level=None, project=None, fields=None, offset=0, limit=None):
+        """Filtered skills, each with the projects that use it"""
+        fields = _fields(fields, SKILL_FIELDS)
+
+        candidates = None
+        for index, values in ((self.skills_by_category, category), (self.skills_by_level, level),
+                              (self.skills_by_project, project)):
+            if _split(values):
+                matched = self._union(index, [_key(v) for v in _split(values)])
+                candidates = matched if candidates is None else candidates & matched
+
+        positions = range(len(self.skills)) if candidates is None else sorted(candidates)
+        page, meta = _page(list(positions), offset, limit)
+        results = [self._skill(i, fields) for i in page]
+        return {"results": results, "page": meta}
+
+    def _project(self, i, fields):
+        project = self.projects[i]
+        if fields is None:
+            return project
+        return {f: project[f] for f in fields if f in project}
+
+    def _skill(self, i, fields):
+        skill = dict(self.skills[i], projects=[self.projects[p]["id"] for p in self.skill_projects[i]])
+        if fields is None:
+            return skill
+        return {f: skill[f] for f in fields if f in skill}
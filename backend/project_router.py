@@ -0,0 +1,60 @@
+"""
+Keyword router that maps a chat message to the project docs it is about.
+
+Every keyword in PROJECT_DOC_MAP is compiled once into a single Aho-Corasick
+automaton, so routing is one linear pass over the query regardless of how
+many projects or keywords exist. Matches must sit on word boundaries
+("rag" no longer fires on "storage") and every matching project is returned
+with its hit count instead of just the first one in dict order.
+"""
+
+from aho_corasick import AhoCorasick
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class ProjectRouter:
+    """Compiled keyword -> project matcher"""
+
+    def __init__(self, project_doc_map):
+        self.project_order = {key: i for i, key in enumerate(project_doc_map)}
+
+        keyword_projects = {}
+        for project_key, project_info in project_doc_map.items():
+            for keyword in project_info["keywords"]:
+                keyword = keyword.lower().strip()
+                if keyword:
+                    projects = keyword_projects.setdefault(keyword, [])
+                    if project_key not in projects:
+                        projects.append(project_key)
+
+        self.keywords = list(keyword_projects)
+        self.keyword_projects = [tuple(keyword_projects[k]) for k in self.keywords]
+        # Only enforce a boundary on edges that are word characters ("c#", "fal.ai")
+        self.boundaries = [(_is_word_char(k[0]), _is_word_char(k[-1])) for k in self.keywords]
+        self.automaton = AhoCorasick(self.keywords)
+
+    def route(self, query):
+        """Return [(project_key, hits), ...] for every matching project, best first"""
+        text = query.lower()
+        length = len(text)
+        scores = {}
+
+        for start, end, keyword_id in self.automaton.iter_matches(text):
+            check_start, check_end = self.boundaries[keyword_id]
+            if check_start and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if check_end and end < length and _is_word_char(text[end]):
+                continue
+            for project_key in self.keyword_projects[keyword_id]:
+                scores[project_key] = scores.get(project_key, 0) + 1
+
+        # Ties keep PROJECT_DOC_MAP order, matching the old first-match behavior
+        return sorted(scores.items(), key=lambda item: (-item[1], self.project_order[item[0]]))
+
+    def best(self, query):
+        """Return the top-scoring project key, or None"""
+        matches = self.route(query)
+        return matches[0][0] if matches else None
@@ -0,0 +1,668 @@
+"""
+LLM provider pool: every configured provider, with timeouts, hedging and
+circuit breakers.
+
+All providers with an API key in the environment are initialized, in the
+same preference order the app has always used (OpenAI, Claude, Google).
+A completion goes to the first provider whose breaker is closed:
+
+- every call has a per-provider timeout (AI_TIMEOUT_SECONDS, overridable
+  with OPENAI_TIMEOUT / ANTHROPIC_TIMEOUT / GOOGLE_TIMEOUT);
+- if the call hasn't answered by the provider's observed latency
+  percentile (AI_HEDGE_PERCENTILE, default p95), a hedged request goes to
+  the next provider and whichever answers first wins;
+- a provider that fails fast is failed over to the next one immediately;
+- after AI_BREAKER_FAILURES consecutive failures (timeouts included) a
+  provider's breaker opens and it is skipped for AI_BREAKER_RESET_SECONDS,
+  then a single half-open probe decides whether it closes again.
+
+Streams are not hedged (tokens can't be taken back once sent), but they
+use the same breakers, timeouts and failover before the first token.
+
+SDK clients are created on first use (or by warm()), so importing this
+module and building the pool costs nothing at worker boot.
+"""
+
+import asyncio
+import importlib.util
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app_logging import get_logger
+from metrics import COMPLETION_CHARS, PROMPT_CHARS, PROVIDER_LATENCY_SECONDS
+
+log = get_logger("providers")
+
+CLAUDE_MODEL = "claude-3-5-sonnet-20241022"
+OPENAI_MODEL = "gpt-4o-mini"
+GOOGLE_MODEL = "gemini-1.5-flash"
+
+
+def _env_float(name, default):
+    value = os.getenv(name, '').strip()
+    return float(value) if value else default
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open probe -> closed"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go out now; claims the probe slot when half-open"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release(self):
+        """Give back a probe slot for a call that was abandoned without an outcome"""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window=256, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        """Latency at `pct` (0-100), or None until there are enough samples"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class Provider:
+    """One configured upstream: sync + async clients, timeout, breaker, latency"""
+
+    def __init__(self, name, api_key, timeout, breaker, latency):
+        self.name = name
+        self.api_key = api_key
+        self.timeout = timeout
+        self.breaker = breaker
+        self.latency = latency
+        self._client = None
+        self._async_client = None
+        self._client_lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.hedged_wins = 0
+
+    @property
+    def client(self):
+        """Sync SDK client; the SDK is imported on first use (see warm())"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    def warm(self, async_client=False):
+        """Import the SDK and build the client(s) ahead of the first call"""
+        self.client
+        if async_client:
+            self.async_client
+
+    def _create_client(self):
+        if self.name == "openai":
+            from openai import OpenAI
+            return OpenAI(api_key=self.api_key, timeout=self.timeout, max_retries=1)
+        if self.name == "claude":
+            from anthropic import Anthropic
+            return Anthropic(api_key=self.api_key, timeout=self.timeout, max_retries=1)
+        import google.generativeai as genai
+        genai.configure(api_key=self.api_key)
+        return genai
+
+    @property
+    def async_client(self):
+        """Async SDK client (created on first use, only the ASGI mode needs it)"""
+        if self._async_client is None:
+            if self.name == "google":
+                # google.generativeai exposes async methods on the same module
+                client = self.client
+            with self._client_lock:
+                if self._async_client is None:
+                    if self.name == "openai":
+                        from openai import AsyncOpenAI
+                        self._async_client = AsyncOpenAI(api_key=self.api_key, timeout=self.timeout, max_retries=1)
+                    elif self.name == "claude":
+                        from anthropic import AsyncAnthropic
+                        self._async_client = AsyncAnthropic(api_key=self.api_key, timeout=self.timeout, max_retries=1)
+                    else:
+                        self._async_client = client
+        return self._async_client
+
+    # ---- completions ----
+
+    def complete(self, system_prompt, user_message):
+        if self.name == "claude":
+            response = self.client.messages.create(
+                model=CLAUDE_MODEL,
+                max_tokens=1024,
+                system=system_prompt,
+                messages=[{"role": "user", "content": user_message}]
+            )
+            return response.content[0].text
+
+        if self.name == "openai":
+            response = self.client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                max_tokens=500,
+                temperature=0.7
+            )
+            return response.choices[0].message.content
+
+        model = self.client.GenerativeModel(GOOGLE_MODEL)
+        response = model.generate_content(
+            f"{system_prompt}\n\nUser: {user_message}",
+            request_options={"timeout": self.timeout}
+        )
+        return response.text
+
+    async def acomplete(self, system_prompt, user_message):
+        client = self.async_client
+        if self.name == "claude":
+            response = await client.messages.create(
+                model=CLAUDE_MODEL,
+                max_tokens=1024,
+                system=system_prompt,
+                messages=[{"role": "user", "content": user_message}]
+            )
+            return response.content[0].text
+
+        if self.name == "openai":
+            response = await client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                max_tokens=500,
+                temperature=0.7
+            )
+            return response.choices[0].message.content
+
+        model = client.GenerativeModel(GOOGLE_MODEL)
+        response = await model.generate_content_async(
+            f"{system_prompt}\n\nUser: {user_message}",
+            request_options={"timeout": self.timeout}
+        )
+        return response.text
+
+    # ---- streams ----
+
+    def stream(self, system_prompt, user_message):
+        if self.name == "claude":
+            with self.client.messages.stream(
+                model=CLAUDE_MODEL,
+                max_tokens=1024,
+                system=system_prompt,
+                messages=[{"role": "user", "content": user_message}]
+            ) as stream:
+                for text in stream.text_stream:
+                    if text:
+                        yield text
+
+        elif self.name == "openai":
+            stream = self.client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                max_tokens=500,
+                temperature=0.7,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        else:
+            model = self.client.GenerativeModel(GOOGLE_MODEL)
+            response = model.generate_content(
+                f"{system_prompt}\n\nUser: {user_message}",
+                stream=True,
+                request_options={"timeout": self.timeout}
+            )
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+    async def astream(self, system_prompt, user_message):
+        client = self.async_client
+        if self.name == "claude":
+            async with client.messages.stream(
+                model=CLAUDE_MODEL,
+                max_tokens=1024,
+                system=system_prompt,
+                messages=[{"role": "user", "content": user_message}]
+            ) as stream:
+                async for text in stream.text_stream:
+                    if text:
+                        yield text
+
+        elif self.name == "openai":
+            stream = await client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                max_tokens=500,
+                temperature=0.7,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        else:
+            model = client.GenerativeModel(GOOGLE_MODEL)
+            response = await model.generate_content_async(
+                f"{system_prompt}\n\nUser: {user_message}",
+                stream=True,
+                request_options={"timeout": self.timeout}
+            )
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+    # ---- bookkeeping ----
+
+    def record(self, started, ok):
+        self.calls += 1
+        elapsed = time.monotonic() - started
+        PROVIDER_LATENCY_SECONDS.observe(elapsed, provider=self.name, outcome="ok" if ok else "error")
+        if ok:
+            self.latency.record(elapsed)
+            self.breaker.record_success()
+        else:
+            self.failures += 1
+            self.breaker.record_failure()
+
+    def status(self):
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "breaker_trips": self.breaker.trips,
+            "calls": self.calls,
+            "failures": self.failures,
+            "hedged_wins": self.hedged_wins,
+            "timeout_seconds": self.timeout,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+# Provider name -> (API key env var, timeout override env var), in preference order
+PROVIDER_ENV = {
+    "openai": ("OPENAI_API_KEY", "OPENAI_TIMEOUT"),
+    "claude": ("ANTHROPIC_API_KEY", "ANTHROPIC_TIMEOUT"),
+    "google": ("GOOGLE_API_KEY", "GOOGLE_TIMEOUT"),
+}
+# Module each provider's SDK is imported from (by _create_client, on first use)
+PROVIDER_SDK = {
+    "openai": "openai",
+    "claude": "anthropic",
+    "google": "google.generativeai",
+}
+
+
+def sdk_installed(module):
+    """Whether the SDK module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class ProviderPool:
+    """Ordered set of providers with hedged, breaker-aware calls"""
+
+    def __init__(self, providers, hedging=True, hedge_percentile=95.0,
+                 hedge_min_delay=0.5, hedge_default_delay=3.0, max_workers=16):
+        self.providers = list(providers)
+        self.hedging = hedging and len(self.providers) > 1
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.hedged_requests = 0
+        # Calls run here so the request thread can wait on the first answer;
+        # abandoned hedges finish in the background (bounded by their timeout)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-provider")
+
+    @classmethod
+    def from_env(cls):
+        default_timeout = _env_float('AI_TIMEOUT_SECONDS', 30.0)
+        failure_threshold = int(os.getenv('AI_BREAKER_FAILURES', '5'))
+        reset_seconds = _env_float('AI_BREAKER_RESET_SECONDS', 30.0)
+
+        providers = []
+        for name, (key_var, timeout_var) in PROVIDER_ENV.items():
+            api_key = os.getenv(key_var, '').strip()
+            if not api_key:
+                continue
+            # Clients are built lazily, so a missing SDK would otherwise only
+            # surface on the first chat; check for it at boot instead
+            if not sdk_installed(PROVIDER_SDK[name]):
+                log.warning("provider_sdk_missing", extra={"provider": name, "sdk": PROVIDER_SDK[name]})
+                continue
+            try:
+                providers.append(Provider(
+                    name,
+                    api_key,
+                    timeout=_env_float(timeout_var, default_timeout),
+                    breaker=CircuitBreaker(failure_threshold, reset_seconds),
+                    latency=LatencyTracker()
+                ))
+            except Exception as e:
+                log.warning("provider_init_failed", extra={"provider": name, "error": str(e)})
+
+        return cls(
+            providers,
+            hedging=os.getenv('AI_HEDGING', 'true').lower() != 'false',
+            hedge_percentile=_env_float('AI_HEDGE_PERCENTILE', 95.0),
+            hedge_min_delay=_env_float('AI_HEDGE_MIN_DELAY', 0.5),
+            hedge_default_delay=_env_float('AI_HEDGE_DEFAULT_DELAY', 3.0),
+            max_workers=int(os.getenv('AI_CALL_THREADS', '16'))
+        )
+
+    def __len__(self):
+        return len(self.providers)
+
+    @property
+    def primary(self):
+        return self.providers[0] if self.providers else None
+
+    def warm(self, async_clients=False):
+        """Build every provider's client now (imports the SDKs)"""
+        for provider in self.providers:
+            try:
+                provider.warm(async_clients)
+            except Exception as e:
+                log.error("provider_warmup_failed", extra={"provider": provider.name, "error": str(e)})
+
+    def warm_in_background(self, async_clients=False):
+        """warm() on a daemon thread, so a worker can serve /health while SDKs import"""
+        if not self.providers:
+            return None
+        thread = threading.Thread(target=self.warm, args=(async_clients,), name="provider-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, name):
+        for provider in self.providers:
+            if provider.name == name:
+                return provider
+        return None
+
+    def _ordered(self, prefer=None):
+        preferred = self.get(prefer) if prefer else None
+        if preferred is None:
+            return self.providers
+        return [preferred] + [p for p in self.providers if p is not preferred]
+
+    def _next(self, ordered, tried):
+        """Next untried provider whose breaker lets a call through"""
+        for provider in ordered:
+            if provider not in tried and provider.breaker.allow():
+                tried.add(provider)
+                return provider
+        return None
+
+    def hedge_delay(self, provider):
+        observed = provider.latency.percentile(self.hedge_percentile)
+        if observed is None:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, observed)
+
+    def _run(self, provider, system_prompt, user_message):
+        started = time.monotonic()
+        try:
+            result = provider.complete(system_prompt, user_message)
+        except Exception as e:
+            log.error("provider_error", extra={"provider": provider.name, "error": str(e)})
+            result = None
+        provider.record(started, bool(result))
+        return result
+
+    def call(self, system_prompt, user_message, prefer=None):
+        """First good completion as (text, provider_name), or (None, None)"""
+        PROMPT_CHARS.observe(len(system_prompt) + len(user_message))
+        ordered = self._ordered(prefer)
+        tried = set()
+        first = self._next(ordered, tried)
+        if first is None:
+            return None, None
+
+        pending = {self._executor.submit(self._run, first, system_prompt, user_message): first}
+        deadline = time.monotonic() + max(p.timeout for p in ordered)
+        hedged = False
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            can_hedge = self.hedging and not hedged
+            timeout = min(remaining, self.hedge_delay(first)) if can_hedge else remaining
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider = pending.pop(future)
+                result = future.result()
+                if result:
+                    if hedged and provider is not first:
+                        provider.hedged_wins += 1
+                    COMPLETION_CHARS.observe(len(result))
+                    return result, provider.name
+
+            if done and pending:
+                # One leg failed while the other is still running: keep waiting on it
+                continue
+
+            # Either the hedge delay elapsed or every in-flight call failed
+            backup = self._next(ordered, tried)
+            if backup is None:
+                if not pending:
+                    break
+                hedged = True
+                continue
+            if not done:
+                hedged = True
+                self.hedged_requests += 1
+                log.info("provider_hedged", extra={"provider": first.name, "hedge": backup.name})
+            pending[self._executor.submit(self._run, backup, system_prompt, user_message)] = backup
+
+        return None, None
+
+    async def _arun(self, provider, system_prompt, user_message):
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(provider.acomplete(system_prompt, user_message), provider.timeout)
+        except asyncio.CancelledError:
+            # Lost the hedge race; says nothing about the provider's health
+            provider.breaker.release()
+            raise
+        except Exception as e:
+            log.error("provider_error", extra={"provider": provider.name, "error": repr(e)})
+            result = None
+        provider.record(started, bool(result))
+        return result
+
+    async def acall(self, system_prompt, user_message, prefer=None):
+        """Async counterpart of call(); the losing hedge is cancelled"""
+        PROMPT_CHARS.observe(len(system_prompt) + len(user_message))
+        ordered = self._ordered(prefer)
+        tried = set()
+        first = self._next(ordered, tried)
+        if first is None:
+            return None, None
+
+        pending = {asyncio.ensure_future(self._arun(first, system_prompt, user_message)): first}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(p.timeout for p in ordered)
+        hedged = False
+
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                can_hedge = self.hedging and not hedged
+                timeout = min(remaining, self.hedge_delay(first)) if can_hedge else remaining
+                done, _ = await asyncio.wait(set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    provider = pending.pop(task)
+                    result = task.result()
+                    if result:
+                        if hedged and provider is not first:
+                            provider.hedged_wins += 1
+                        COMPLETION_CHARS.observe(len(result))
+                        return result, provider.name
+
+                if done and pending:
+                    continue
+
+                backup = self._next(ordered, tried)
+                if backup is None:
+                    if not pending:
+                        break
+                    hedged = True
+                    continue
+                if not done:
+                    hedged = True
+                    self.hedged_requests += 1
+                    log.info("provider_hedged", extra={"provider": first.name, "hedge": backup.name})
+                pending[asyncio.ensure_future(self._arun(backup, system_prompt, user_message))] = backup
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return None, None
+
+    def stream(self, system_prompt, user_message, prefer=None):
+        """Yield text deltas, failing over to the next provider before the first token"""
+        PROMPT_CHARS.observe(len(system_prompt) + len(user_message))
+        ordered = self._ordered(prefer)
+        tried = set()
+        while True:
+            provider = self._next(ordered, tried)
+            if provider is None:
+                return
+            started = time.monotonic()
+            sent = 0
+            try:
+                for text in provider.stream(system_prompt, user_message):
+                    sent += len(text)
+                    yield text
+            except Exception as e:
+                provider.record(started, False)
+                if sent:
+                    raise
+                log.error("provider_stream_error", extra={"provider": provider.name, "error": str(e)})
+                continue
+            except BaseException:
+                # Client went away mid-stream
+                provider.breaker.release()
+                raise
+            provider.record(started, bool(sent))
+            if sent:
+                COMPLETION_CHARS.observe(sent)
+                return
+
+    async def astream(self, system_prompt, user_message, prefer=None):
+        """Async counterpart of stream()"""
+        PROMPT_CHARS.observe(len(system_prompt) + len(user_message))
+        ordered = self._ordered(prefer)
+        tried = set()
+        while True:
+            provider = self._next(ordered, tried)
+            if provider is None:
+                return
+            started = time.monotonic()
+            sent = 0
+            try:
+                async for text in provider.astream(system_prompt, user_message):
+                    sent += len(text)
+                    yield text
+            except Exception as e:
+                provider.record(started, False)
+                if sent:
+                    raise
+                log.error("provider_stream_error", extra={"provider": provider.name, "error": str(e)})
+                continue
+            except BaseException:
+                # Client went away mid-stream
+                provider.breaker.release()
+                raise
+            provider.record(started, bool(sent))
+            if sent:
+                COMPLETION_CHARS.observe(sent)
+                return
+
+    def status(self):
+        return {
+            "hedging": self.hedging,
+            "hedge_percentile": self.hedge_percentile,
+            "hedged_requests": self.hedged_requests,
+            "providers": {p.name: p.status() for p in self.providers},
+        }
@@ -0,0 +1,232 @@
+"""
+Cache of query embeddings keyed by (embedding model, normalized query).
+
+Suggested questions and common project questions repeat constantly, and
+every RAG search embeds the query before it can score a single chunk. The
+cache sits in front of the embedding backend (and the micro-batcher), so a
+repeated question skips the round-trip even when its answer was not
+cacheable.
+
+Two tiers:
+    memory  LRU bounded by bytes, per worker
+    disk    optional SQLite file (WAL) shared by every worker on the host, so
+            vectors survive max_requests recycling and deploy restarts;
+            pruned to the newest QUERY_EMBEDDING_CACHE_DISK_ROWS rows
+
+    QUERY_EMBEDDING_CACHE_MB=16
+    QUERY_EMBEDDING_CACHE_DB=/tmp/portfolio-query-embeddings.sqlite3   # empty = memory only
+    QUERY_EMBEDDING_CACHE_DISK_ROWS=50000
+
+Keys use the same normalization as the response cache (case, whitespace and
+trailing punctuation), so "What is Peata?" and "what is peata" share one
+vector.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app_logging import get_logger
+from metrics import QUERY_EMBEDDING_CACHE_LOOKUPS
+from response_cache import normalize_message
+
+log = get_logger("query_embedding_cache")
+
+QUERY_EMBEDDING_CACHE_MB = float(os.getenv('QUERY_EMBEDDING_CACHE_MB', '16'))
+QUERY_EMBEDDING_CACHE_DB = os.getenv(
+    'QUERY_EMBEDDING_CACHE_DB', os.path.join(tempfile.gettempdir(), "portfolio-query-embeddings.sqlite3")
+).strip()
+QUERY_EMBEDDING_CACHE_DISK_ROWS = int(os.getenv('QUERY_EMBEDDING_CACHE_DISK_ROWS', '50000'))
+
+# Rows written between prunes of the disk tier
+PRUNE_EVERY = 500
+
+
+class QueryEmbeddingCache:
+    """(model, normalized query) -> float32 vector; memory LRU over an optional SQLite tier"""
+
+    def __init__(self, max_bytes=int(QUERY_EMBEDDING_CACHE_MB * 1024 * 1024),
+                 path=QUERY_EMBEDDING_CACHE_DB, max_disk_rows=QUERY_EMBEDDING_CACHE_DISK_ROWS):
+        self.max_bytes = max_bytes
+        self.path = path or None
+        self.max_disk_rows = max_disk_rows
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Disk reads/writes take their own lock so memory hits never wait on SQLite
+        self._disk_lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._writes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_errors = 0
+
+    # ---- disk tier ----
+
+    def _connection(self):
+        """SQLite connection for this process (never shared across a fork); None if disabled"""
+        if self.path is None:
+            return None
+        if self._conn_pid != os.getpid():
+            try:
+                conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS query_embeddings (
+                        model TEXT NOT NULL,
+                        query TEXT NOT NULL,
+                        vector BLOB NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (model, query)
+                    )"""
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS query_embeddings_created ON query_embeddings (created_at)")
+            except sqlite3.Error as e:
+                # An unusable disk tier shouldn't warn on every request; run memory-only
+                log.warning("query_embedding_cache_disk_disabled", extra={"path": self.path, "error": str(e)})
+                self.path = None
+                return None
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _disk_get(self, key):
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?", key
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            log.warning("query_embedding_cache_disk_error", extra={"error": str(e)})
+            return None
+        return None if row is None else np.frombuffer(row[0], dtype=np.float32)
+
+    def _disk_put(self, key, vector):
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (model, query, vector, created_at) VALUES (?, ?, ?, ?)",
+                (*key, vector.tobytes(), time.time())
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM query_embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM query_embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_rows,)
+                )
+            conn.commit()
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            log.warning("query_embedding_cache_disk_error", extra={"error": str(e)})
+
+    # ---- lookups ----
+
+    def get(self, model_name, query):
+        """Cached vector (read-only float32 array) or None"""
+        key = (model_name, normalize_message(query))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+        if vector is not None:
+            QUERY_EMBEDDING_CACHE_LOOKUPS.inc(tier="memory")
+            return vector
+
+        if self.path:
+            with self._disk_lock:
+                vector = self._disk_get(key)
+        with self._lock:
+            if vector is not None:
+                self.disk_hits += 1
+                self._remember(key, vector)
+            else:
+                self.misses += 1
+        QUERY_EMBEDDING_CACHE_LOOKUPS.inc(tier="miss" if vector is None else "disk")
+        return vector
+
+    def put(self, model_name, query, vector):
+        key = (model_name, normalize_message(query))
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        with self._lock:
+            self._remember(key, vector)
+        if self.path:
+            with self._disk_lock:
+                self._disk_put(key, vector)
+        return vector
+
+    def _remember(self, key, vector):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes + len(key[1])
+        self._entries[key] = vector
+        self._bytes += vector.nbytes + len(key[1])
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old_vector = self._entries.popitem(last=False)
+            self._bytes -= old_vector.nbytes + len(old_key[1])
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_path": self.path,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_errors": self.disk_errors,
+            }
+
+
+# One cache per process; the model name in every key keeps backends apart
+QUERY_EMBEDDING_CACHE = QueryEmbeddingCache()
+
+
+class CachedQueryEmbeddings:
+    """LangChain-style embeddings whose embed_query goes through the query cache"""
+
+    def __init__(self, embeddings, model_name, cache=QUERY_EMBEDDING_CACHE):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query_array(self, text):
+        """The query vector as a read-only float32 array (no list round-trip)"""
+        vector = self.cache.get(self.model_name, text)
+        if vector is None:
+            vector = self.cache.put(self.model_name, text, self.embeddings.embed_query(text))
+        return vector
+
+    def embed_query(self, text):
+        return self.embed_query_array(text).tolist()
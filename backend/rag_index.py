@@ -0,0 +1,492 @@
+"""
+Prebuilt on-disk RAG index for the portfolio backend.
+
+Build it once, offline, whenever project_docs change:
+
+    cd backend && python rag_index.py build
+
+Every gunicorn worker then loads the current build read-only at boot. Chunk
+embeddings are memory-mapped from a single .npy file, so workers share the
+same pages and no document embedding happens on the request path.
+
+Layout:
+    rag_index/
+        CURRENT                 # name of the active build directory
+        embedding_cache.sqlite3 # (model, chunk sha256) -> vector, reused across builds
+        <build_id>/
+            manifest.json       # format version, model, chunks, project ranges
+            embeddings.npy      # float32 [n_chunks, dim], L2-normalized
+            embedding_model.npz # fitted IDF, local-tfidf builds only
+
+EMBEDDING_BACKEND=local builds and queries with the CPU-only hashed TF-IDF
+model from embeddings.py: no GCP credentials, no network.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+from embedding_batcher import batch_query_embeddings
+from embeddings import default_model_name, is_local_model, load_local_embeddings, vertex_embeddings
+from vector_store import RAG_VECTOR_DTYPE, DocumentVectorStore, normalize_rows
+
+# ============================================
+# INDEX CONFIGURATION
+# ============================================
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DOCS_DIR = os.path.join(BACKEND_DIR, "project_docs")
+INDEX_DIR = os.getenv("RAG_INDEX_DIR", os.path.join(BACKEND_DIR, "rag_index"))
+
+INDEX_FORMAT_VERSION = 1
+EMBEDDING_CACHE_FILE = "embedding_cache.sqlite3"
+EMBED_BATCH_SIZE = 100
+EMBEDDING_MODEL = default_model_name()
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+PROJECT_ID = os.getenv('GOOGLE_CLOUD_PROJECT', 'sesa-trifecta-street-25')
+LOCATION = os.getenv('GOOGLE_CLOUD_LOCATION', 'us-central1')
+
+PROJECT_DOC_MAP = {
+    "ai-room-designer": {
+        "filename": "ai_room_designer.txt",
+        "keywords": ["room designer", "ai room", "rooms through time", "redesign", "interior design", "gemini", "fal.ai"]
+    },
+    "astro_archive": {
+        "filename": "astro_archive.txt",
+        "keywords": ["astro archive", "nasa", "space data", "memory-aware", "agents", "coaching"]
+    },
+    "nasa_kg": {
+        "filename": "nasa_kg.txt",
+        "keywords": ["nasa knowledge graph", "neo4j", "biological", "astronaut", "health", "omics"]
+    },
+    "peata": {
+        "filename": "peata.txt",
+        "keywords": ["peata", "pet recovery", "rag", "image-matching", "lost pets"]
+    },
+    "planetrics": {
+        "filename": "planetrics.txt",
+        "keywords": ["planetrics", "exoplanet", "nasa", "plotly", "dashboard"]
+    },
+    "relic": {
+        "filename": "relic.txt",
+        "keywords": ["relic", "archaeological", "geospatial", "research", "srtm", "sentinel"]
+    },
+    "sesa": {
+        "filename": "sesa.txt",
+        "keywords": ["sesa", "multi-agent", "nasa proposal", "emotional awareness"]
+    },
+    "stargate": {
+        "filename": "stargate.txt",
+        "keywords": ["stargate", "gaming", "mentorship", "coaching", "bobot"]
+    },
+    "gaming_context": {
+        "filename": "gaming_context.txt",
+        "keywords": ["gaming", "game development", "unity", "unreal", "godot", "qa testing", "game testing", "streaming", "twitch", "youtube", "game jam", "raid shadow legends", "ghost of yotei", "game design", "indie games", "multiplayer", "vr games", "mobile games", "c#", "blueprint", "gdscript", "testral", "jira", "beta testing", "game analytics", "procedural generation", "game ai", "accessibility", "cross-platform"]
+    },
+    "content_creation_context": {
+        "filename": "content_creation_context.txt",
+        "keywords": ["content creation", "video production", "youtube", "streaming", "social media", "brand partnerships", "collaborations", "tutorials", "educational content", "adobe premiere", "obs studio", "camtasia", "figma", "canva", "notion", "trello", "buffer", "analytics", "linkedin posts", "technical writing", "documentation", "workshops", "mentorship", "community", "storytelling", "multi-platform", "engagement", "viral content", "thought leadership"]
+    }
+}
+
+# ============================================
+# SHARED HELPERS
+# ============================================
+
+_gcp_credentials_ready = False
+
+def ensure_gcp_credentials():
+    """Write GCP_SERVICE_ACCOUNT_JSON to a temp key file for the Google SDKs.
+
+    Called lazily by create_embeddings(), so workers that never embed
+    anything never touch the file. Runs once per process.
+    """
+    global _gcp_credentials_ready
+    if _gcp_credentials_ready:
+        return
+    if os.getenv("GCP_SERVICE_ACCOUNT_JSON"):
+        sa_info = json.loads(os.getenv("GCP_SERVICE_ACCOUNT_JSON"))
+        temp_path = "/tmp/temp_key.json"
+        # Private to this user, and swapped in atomically since workers race here
+        tmp = f"{temp_path}.{os.getpid()}"
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            json.dump(sa_info, f)
+        os.replace(tmp, temp_path)
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = temp_path
+    _gcp_credentials_ready = True
+
+def read_project_doc(project_key):
+    """Return the raw text for a project, or None if missing/empty"""
+    project_info = PROJECT_DOC_MAP.get(project_key)
+    if not project_info:
+        return None
+
+    doc_path = os.path.join(DOCS_DIR, project_info["filename"])
+    if not os.path.exists(doc_path):
+        print(f"⚠️ Doc not found: {doc_path}")
+        return None
+
+    with open(doc_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    if not text.strip():
+        print(f"⚠️ Document is empty: {project_info['filename']}")
+        return None
+
+    return text
+
+def split_document(text):
+    """Split a project document into chunks (same settings at build and query time)"""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=CHUNK_SEPARATORS
+    )
+    return splitter.split_text(text)
+
+def create_embeddings(model_name=EMBEDDING_MODEL, model_dir=None):
+    """Create the embeddings backend for a model name (local-tfidf-* or Vertex AI)
+
+    Fitted local models load their weights from `model_dir` (an index build).
+    """
+    if is_local_model(model_name):
+        return load_local_embeddings(model_name, model_dir)
+
+    ensure_gcp_credentials()
+    return vertex_embeddings(model_name, PROJECT_ID, LOCATION)
+
+def create_query_embeddings(model_name=EMBEDDING_MODEL, model_dir=None):
+    """Embeddings for the request path: query cache -> micro-batcher -> backend"""
+    from query_embedding_cache import CachedQueryEmbeddings
+
+    return CachedQueryEmbeddings(batch_query_embeddings(create_embeddings(model_name, model_dir)), model_name)
+
+# ============================================
+# READ-ONLY INDEX (loaded by workers)
+# ============================================
+
+class PrebuiltIndex:
+    """A loaded, read-only RAG index build: one matrix for every project's chunks
+
+    Each chunk carries its project as metadata; similarity_search takes a
+    Chroma-style `filter` to restrict the top-k to one or more projects.
+    Vectors are searched in RAG_VECTOR_DTYPE (float32 stays memory-mapped).
+    """
+
+    def __init__(self, path, manifest, embeddings, dtype=RAG_VECTOR_DTYPE):
+        self.path = path
+        self.manifest = manifest
+        self.embeddings = embeddings
+        self.chunks = manifest["chunks"]
+        self.build_id = manifest["build_id"]
+        self.model_name = manifest["embedding_model"]
+        self.chunk_projects = [None] * len(self.chunks)
+        for project_key, (start, end) in manifest["projects"].items():
+            self.chunk_projects[start:end] = [project_key] * (end - start)
+        self._query_embeddings = None
+        self.store = DocumentVectorStore(
+            self.chunks,
+            [{"project": project_key, "chunk": i} for i, project_key in enumerate(self.chunk_projects)],
+            embeddings,
+            self.embed_query,
+            dtype=dtype
+        )
+
+    def embed_query(self, query):
+        """Embed a query with the same model the index was built with (cached, micro-batched)"""
+        if self._query_embeddings is None:
+            self._query_embeddings = create_query_embeddings(self.model_name, model_dir=self.path)
+        vector = self._query_embeddings.embed_query_array(query)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def project_keys(self):
+        return [key for key, (start, end) in self.manifest["projects"].items() if end > start]
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        """Top-k (chunk, cosine score) over all chunks, or only the filtered projects'"""
+        return self.store.similarity_search_with_score(query, k=k, filter=filter)
+
+    def similarity_search(self, query, k=4, filter=None):
+        return self.store.similarity_search(query, k=k, filter=filter)
+
+def current_build_path(index_dir=INDEX_DIR):
+    """Resolve the active build directory from the CURRENT pointer"""
+    pointer = os.path.join(index_dir, "CURRENT")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, "r", encoding="utf-8") as f:
+        build_id = f.read().strip()
+    path = os.path.join(index_dir, build_id)
+    return path if os.path.isdir(path) else None
+
+def load_index(index_dir=INDEX_DIR):
+    """Load the current index build read-only, or return None if there isn't one"""
+    path = current_build_path(index_dir)
+    if path is None:
+        return None
+
+    try:
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("format_version") != INDEX_FORMAT_VERSION:
+            print(f"⚠️ RAG index format {manifest.get('format_version')} != {INDEX_FORMAT_VERSION}, ignoring {path}")
+            return None
+
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        if embeddings.shape[0] != len(manifest["chunks"]):
+            print(f"⚠️ RAG index at {path} is inconsistent, ignoring it")
+            return None
+
+        return PrebuiltIndex(path, manifest, embeddings)
+
+    except Exception as e:
+        print(f"❌ Failed to load RAG index from {path}: {e}")
+        return None
+
+# ============================================
+# OFFLINE BUILD
+# ============================================
+
+def docs_fingerprint():
+    """Hash of every project doc, so a stale build is easy to spot"""
+    digest = hashlib.sha256()
+    for project_key, project_info in sorted(PROJECT_DOC_MAP.items()):
+        doc_path = os.path.join(DOCS_DIR, project_info["filename"])
+        digest.update(project_key.encode("utf-8"))
+        if os.path.exists(doc_path):
+            with open(doc_path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def chunk_hash(text):
+    """Content hash that keys a chunk's embedding"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """Persistent (model, chunk hash) -> embedding store used by incremental builds"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, chunk_hash)
+            )"""
+        )
+
+    def get_many(self, model_name, hashes):
+        found = {}
+        unique = list(set(hashes))
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT chunk_hash, vector FROM embeddings WHERE model = ? AND chunk_hash IN ({','.join('?' * len(batch))})",
+                [model_name, *batch]
+            )
+            for hash_value, blob in rows:
+                found[hash_value] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model_name, items):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, chunk_hash, dimensions, vector) VALUES (?, ?, ?, ?)",
+            [(model_name, h, len(v), np.asarray(v, dtype=np.float32).tobytes()) for h, v in items]
+        )
+        self.conn.commit()
+
+    def retain_only(self, model_name, keep_hashes):
+        """Drop cached chunks of this model that no longer exist in any doc"""
+        keep = set(keep_hashes)
+        stale = [
+            (model_name, h) for (h,) in self.conn.execute(
+                "SELECT chunk_hash FROM embeddings WHERE model = ?", (model_name,)
+            ) if h not in keep
+        ]
+        self.conn.executemany("DELETE FROM embeddings WHERE model = ? AND chunk_hash = ?", stale)
+        self.conn.commit()
+        return len(stale)
+
+    def close(self):
+        self.conn.close()
+
+def embed_with_cache(index_dir, model_name, chunks, hashes):
+    """Embed chunks, reusing cached vectors and embedding only new/changed ones"""
+    cache = EmbeddingCache(os.path.join(index_dir, EMBEDDING_CACHE_FILE))
+    try:
+        cached = cache.get_many(model_name, hashes)
+
+        # Embed each distinct missing chunk once, in batches
+        missing = {}
+        for hash_value, chunk in zip(hashes, chunks):
+            if hash_value not in cached:
+                missing.setdefault(hash_value, chunk)
+
+        if missing:
+            print(f"🔮 Embedding {len(missing)} new/changed chunks with {model_name}...")
+            embeddings = create_embeddings(model_name)
+            pending = list(missing.items())
+            for i in range(0, len(pending), EMBED_BATCH_SIZE):
+                batch = pending[i:i + EMBED_BATCH_SIZE]
+                vectors = embeddings.embed_documents([chunk for _, chunk in batch])
+                new_items = [(h, np.asarray(v, dtype=np.float32)) for (h, _), v in zip(batch, vectors)]
+                cache.put_many(model_name, new_items)
+                cached.update(new_items)
+
+        dropped = cache.retain_only(model_name, hashes)
+    finally:
+        cache.close()
+
+    reused = sum(1 for h in set(hashes) if h not in missing)
+    print(f"♻️ Reused {reused} cached chunk embeddings, embedded {len(missing)}, dropped {dropped} stale")
+
+    vectors = np.stack([cached[h] for h in hashes]).astype(np.float32)
+    return vectors, {"reused": reused, "embedded": len(missing), "dropped": dropped}
+
+def build_index(index_dir=INDEX_DIR, model_name=EMBEDDING_MODEL, keep=2, force=False):
+    """Chunk every project doc, embed only new/changed chunks and publish a new build"""
+    fingerprint = docs_fingerprint()
+    current = load_index(index_dir)
+    if (not force and current is not None
+            and current.manifest.get("docs_fingerprint") == fingerprint
+            and current.manifest.get("requested_model", current.model_name) == model_name):
+        print(f"✅ RAG index {current.build_id} is already up to date, nothing to do")
+        return current.path
+
+    chunks = []
+    projects = {}
+    for project_key in PROJECT_DOC_MAP:
+        text = read_project_doc(project_key)
+        project_chunks = split_document(text) if text else []
+        projects[project_key] = [len(chunks), len(chunks) + len(project_chunks)]
+        chunks.extend(project_chunks)
+        print(f"✂️ {project_key}: {len(project_chunks)} chunks")
+
+    if not chunks:
+        raise RuntimeError("No project docs with content to index")
+
+    os.makedirs(index_dir, exist_ok=True)
+    hashes = [chunk_hash(chunk) for chunk in chunks]
+    local_model = None
+    if is_local_model(model_name):
+        # Local vectors cost milliseconds: fit IDF on exactly these chunks and embed them all
+        local_model = create_embeddings(model_name).fit(chunks)
+        print(f"🔮 Embedding {len(chunks)} chunks locally with {local_model.model_name}...")
+        vectors = np.asarray(local_model.embed_documents(chunks), dtype=np.float32)
+        stats = {"reused": 0, "embedded": len(chunks), "dropped": 0}
+    else:
+        vectors, stats = embed_with_cache(index_dir, model_name, chunks, hashes)
+
+    vectors = normalize_rows(vectors).astype(np.float32)
+
+    build_id = f"v{INDEX_FORMAT_VERSION}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{fingerprint[:8]}"
+    manifest = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "build_id": build_id,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "embedding_model": local_model.model_name if local_model else model_name,
+        "requested_model": model_name,
+        "dimensions": int(vectors.shape[1]),
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "docs_fingerprint": fingerprint,
+        "projects": projects,
+        "chunks": chunks,
+        "chunk_hashes": hashes,
+        "stats": stats,
+    }
+
+    staging = os.path.join(index_dir, f".{build_id}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    np.save(os.path.join(staging, "embeddings.npy"), vectors)
+    if local_model:
+        local_model.save(staging)
+    with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    final_path = os.path.join(index_dir, build_id)
+    shutil.rmtree(final_path, ignore_errors=True)
+    os.replace(staging, final_path)
+
+    # Swap the pointer atomically so a booting worker never sees half a build
+    pointer_tmp = os.path.join(index_dir, ".CURRENT.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(build_id)
+    os.replace(pointer_tmp, os.path.join(index_dir, "CURRENT"))
+
+    prune_builds(index_dir, keep=keep)
+    print(f"✅ RAG index {build_id} written to {final_path}")
+    return final_path
+
+def prune_builds(index_dir=INDEX_DIR, keep=2):
+    """Remove old build directories, keeping the newest `keep` (always the current one)"""
+    current = current_build_path(index_dir)
+    builds = sorted(
+        (name for name in os.listdir(index_dir)
+         if name.startswith("v") and os.path.isdir(os.path.join(index_dir, name))),
+        key=lambda name: os.path.getmtime(os.path.join(index_dir, name))
+    )
+    for name in builds[:-keep] if keep > 0 else builds:
+        path = os.path.join(index_dir, name)
+        if path != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the prebuilt RAG index")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    build = subcommands.add_parser("build", help="Chunk project_docs, embed new/changed chunks and publish a new build")
+    build.add_argument("--index-dir", default=INDEX_DIR)
+    build.add_argument("--model", default=EMBEDDING_MODEL, help="Vertex model or local-tfidf-<dims> (default from EMBEDDING_BACKEND)")
+    build.add_argument("--keep", type=int, default=2, help="Number of builds to keep on disk")
+    build.add_argument("--force", action="store_true", help="Publish a new build even if docs are unchanged")
+
+    info = subcommands.add_parser("info", help="Show the current build")
+    info.add_argument("--index-dir", default=INDEX_DIR)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from dotenv import load_dotenv
+        load_dotenv()
+        build_index(args.index_dir, model_name=args.model, keep=args.keep, force=args.force)
+        return 0
+
+    index = load_index(args.index_dir)
+    if index is None:
+        print(f"⚠️ No RAG index found in {args.index_dir}")
+        return 1
+
+    stale = index.manifest.get("docs_fingerprint") != docs_fingerprint()
+    print(f"📦 Build: {index.build_id} ({index.manifest['built_at']})")
+    print(f"🔮 Model: {index.model_name}, {index.manifest['dimensions']} dims, {len(index.chunks)} chunks")
+    stats = index.manifest.get("stats")
+    if stats:
+        print(f"♻️ Last build reused {stats['reused']}, embedded {stats['embedded']}, dropped {stats['dropped']}")
+    for project_key, (start, end) in index.manifest["projects"].items():
+        print(f"   - {project_key}: {end - start} chunks")
+    print("⚠️ project_docs changed since this build, run `python rag_index.py build`" if stale else "✅ Up to date with project_docs")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
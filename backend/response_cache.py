@@ -0,0 +1,207 @@
+"""
+In-process cache for generated chat responses.
+
+Most chat traffic is the same few dozen questions, so answers are cached by
+(portfolio_context, normalized message) with a TTL and LRU eviction once the
+cache is full. An optional semantic tier also serves a cached answer when a
+new question's embedding is close enough (cosine >= threshold) to one that
+was already answered in the same portfolio context.
+
+The cache is tied to a content fingerprint (system prompt + project docs);
+when the fingerprint changes every entry is dropped.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app_logging import get_logger
+
+log = get_logger("response_cache")
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_message(message):
+    """Case/whitespace/trailing-punctuation insensitive cache key text"""
+    text = _WHITESPACE.sub(" ", message.strip().lower())
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "vector")
+
+    def __init__(self, value, expires_at, vector):
+        self.value = value
+        self.expires_at = expires_at
+        self.vector = vector
+
+
+class ResponseCache:
+    """TTL + LRU response cache with an optional embedding-similarity tier"""
+
+    def __init__(self, max_entries=512, ttl_seconds=3600, semantic_threshold=None,
+                 embed_fn=None, fingerprint_check_interval=30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold if embed_fn else None
+        self.embed_fn = embed_fn
+        self.fingerprint_check_interval = fingerprint_check_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._fingerprint_checked_at = 0.0
+        # portfolio_context -> (keys, matrix) for the semantic tier, rebuilt lazily
+        self._semantic_views = {}
+        # Query vectors from recent misses, reused by the put() that follows
+        self._pending_vectors = OrderedDict()
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def semantic_enabled(self):
+        return self.semantic_threshold is not None
+
+    def validate(self, fingerprint_fn, force=False):
+        """Drop everything if the content fingerprint changed (checked at most every interval)"""
+        now = time.monotonic()
+        if not force and now - self._fingerprint_checked_at < self.fingerprint_check_interval:
+            return
+        self._fingerprint_checked_at = now
+        fingerprint = fingerprint_fn()
+        with self._lock:
+            if self._fingerprint is not None and fingerprint != self._fingerprint:
+                self._entries.clear()
+                self._semantic_views.clear()
+                self._pending_vectors.clear()
+                self.invalidations += 1
+            self._fingerprint = fingerprint
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._semantic_views.clear()
+            self._pending_vectors.clear()
+
+    def _embed(self, message):
+        vector = np.asarray(self.embed_fn(message), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, message, portfolio_context):
+        """Return (value, kind) where kind is 'exact', 'semantic' or None on a miss.
+
+        On a miss with the semantic tier enabled, the query vector is kept so
+        a following put() doesn't embed the same message twice.
+        """
+        key = (portfolio_context, normalize_message(message))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value, "exact"
+                self._remove(key)
+
+        if not self.semantic_enabled:
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        try:
+            vector = self._embed(message)
+        except Exception as e:
+            log.warning("response_cache_embedding_failed", extra={"error": str(e)})
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        with self._lock:
+            hit_key = self._nearest(portfolio_context, vector, now)
+            if hit_key is not None:
+                self._entries.move_to_end(hit_key)
+                self.semantic_hits += 1
+                return self._entries[hit_key].value, "semantic"
+            self.misses += 1
+            self._pending_vectors[key] = vector
+            while len(self._pending_vectors) > 64:
+                self._pending_vectors.popitem(last=False)
+            return None, None
+
+    def put(self, message, portfolio_context, value):
+        key = (portfolio_context, normalize_message(message))
+        vector = None
+        if self.semantic_enabled:
+            with self._lock:
+                vector = self._pending_vectors.pop(key, None)
+            if vector is None:
+                try:
+                    vector = self._embed(message)
+                except Exception as e:
+                    log.warning("response_cache_embedding_failed", extra={"error": str(e)})
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, time.monotonic() + self.ttl_seconds, vector)
+            if vector is not None:
+                self._semantic_views.pop(portfolio_context, None)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        if entry.vector is not None:
+            self._semantic_views.pop(key[0], None)
+
+    def _nearest(self, portfolio_context, vector, now):
+        view = self._semantic_views.get(portfolio_context)
+        if view is None:
+            keys = [k for k, e in self._entries.items() if k[0] == portfolio_context and e.vector is not None]
+            matrix = np.stack([self._entries[k].vector for k in keys]) if keys else None
+            view = (keys, matrix)
+            self._semantic_views[portfolio_context] = view
+
+        keys, matrix = view
+        if matrix is None or matrix.shape[1] != vector.shape[0]:
+            return None
+
+        scores = matrix @ vector
+        for i in np.argsort(-scores):
+            if scores[i] < self.semantic_threshold:
+                return None
+            entry = self._entries.get(keys[i])
+            if entry is not None and entry.expires_at > now:
+                return keys[i]
+        return None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "semantic_enabled": self.semantic_enabled,
+                "semantic_threshold": self.semantic_threshold,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
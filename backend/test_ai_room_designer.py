@@ -1,8 +1,8 @@
 import random
-from langchain_community.vectorstores import Chroma
-from langchain_google_vertexai import VertexAIEmbeddings
 from PyPDF2 import PdfReader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from rag_index import create_embeddings
+from vector_store import DocumentVectorStore
 
 def main():
     # 1. Load PDF
@@ -17,13 +17,10 @@ def main():
     chunks = splitter.split_text(text)
     print(f"Total chunks created: {len(chunks)}")
 
-    # 3. Generate embeddings using the UPDATED Vertex AI model
-    embeddings = VertexAIEmbeddings(
-        model_name="text-embedding-004",  # Updated model name
-        project="sesa-trifecta-street-25",  # Your GCP project ID
-        location="us-central1"
-    )
-    vectorstore = Chroma.from_texts(chunks, embedding=embeddings)
+    # 3. Generate embeddings with the configured backend
+    # (EMBEDDING_BACKEND=local runs offline, no GCP credentials needed)
+    embeddings = create_embeddings()
+    vectorstore = DocumentVectorStore.from_texts(chunks, embedding=embeddings)
 
     # 4. Test retrieval with Top-k random selection
     query = "What features does the AI Room Designer offer?"
@@ -145,17 +145,37 @@ function initAudio() {
     } catch (e) { console.warn('Audio init failed', e); }
 }
 
+// --- PRECOMPUTED LAYOUT (server-side force simulation, optional) ---
+let layoutPositions = null;   // {"project:<id>" | "skill:<id>": {x, y, z}}
+async function loadLayout(url) {
+    try {
+        const response = await fetch(url);
+        if (!response.ok) return null;
+        const layout = await response.json();
+        const positions = {};
+        layout.nodes.forEach(n => { positions[n.key] = { x: n.x, y: n.y, z: n.z }; });
+        return positions;
+    } catch (e) { return null; }
+}
+function initialPosition(kind, id, r0, spread) {
+    const p = layoutPositions && layoutPositions[kind + ':' + id];
+    if (p) return new THREE.Vector3(p.x, p.y, p.z);
+    const a = Math.random() * Math.PI * 2, b = (Math.random() - 0.5) * Math.PI, r = r0 + Math.random() * spread;
+    return new THREE.Vector3(Math.cos(a) * Math.cos(b) * r, Math.sin(b) * r * 0.5, Math.sin(a) * Math.cos(b) * r);
+}
+
 // --- LOAD PROJECTS (Railway + fallback) ---
 async function loadProjects() {
     try {
         const apiUrl = window.location.hostname === 'localhost'
             ? 'http://localhost:5000/api/projects'
             : 'https://portfolio-production-b1b4.up.railway.app/api/projects';
-        const response = await fetch(apiUrl);
+        const [response, layout] = await Promise.all([fetch(apiUrl), loadLayout(apiUrl.replace('/api/projects', '/api/graph/layout'))]);
         const data = await response.json();
         projectData = data.projects || data.nodes;
         skillData = data.skills || [];
         skillLinks = data.skill_links || [];
+        layoutPositions = layout;
     } catch (error) {
         projectData = [
             { id: "stargate", group: "Gaming", label: "Project Stargate", description: "Gaming mentorship personas", links: [{ type: "github", url: "https://github.com/gastondana627/Stargate-and-Bobot" }] },
@@ -194,7 +214,8 @@ async function loadProjects() {
     createProjectNodes();
     createSkillNodes();
     createSkillConnections();
-    reheat(1);
+    // A server-settled layout only needs the gentle simmer, not a full reheat
+    if (layoutPositions) params.alpha = params.alphaMin; else reheat(1);
     if (window.__GRAPH_FOCUS__) {
         setTimeout(function () {
             if (typeof window.zoomToProjectNode === 'function') window.zoomToProjectNode(window.__GRAPH_FOCUS__);
@@ -229,8 +250,7 @@ function createProjectNodes() {
         mesh.add(glow);
         const label = makeLabel(project.label || project.id, colors.outline);
         scene.add(label); scene.add(mesh);
-        const a = Math.random() * Math.PI * 2, b = (Math.random() - 0.5) * Math.PI, r = 7 + Math.random() * 4;
-        const pos = new THREE.Vector3(Math.cos(a) * Math.cos(b) * r, Math.sin(b) * r * 0.5, Math.sin(a) * Math.cos(b) * r);
+        const pos = initialPosition('project', project.id, 7, 4);
         mesh.position.copy(pos);
         mesh.userData = { project, id: project.id, outline, label, glow, kind: 'project', baseOpacity: 0.92 };
         projectNodes.push(mesh);
@@ -253,8 +273,7 @@ function createSkillNodes() {
         mesh.add(makeGlowSprite(colors.main, 2.2));
         const label = makeLabel(skill.name || skill.id, colors.outline);
         scene.add(label); scene.add(mesh);
-        const a = Math.random() * Math.PI * 2, b = (Math.random() - 0.5) * Math.PI, r = 4 + Math.random() * 4;
-        const pos = new THREE.Vector3(Math.cos(a) * Math.cos(b) * r, Math.sin(b) * r * 0.5, Math.sin(a) * Math.cos(b) * r);
+        const pos = initialPosition('skill', skill.id, 4, 4);
         mesh.position.copy(pos);
         mesh.userData = { skill, id: skill.id, outline, label, kind: 'skill', baseOpacity: 0.9 };
         skillNodes.push(mesh);
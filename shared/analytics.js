@@ -8,6 +8,11 @@ class PortfolioAnalytics {
         this.currentPortfolio = this.detectCurrentPortfolio();
         this.startTime = Date.now();
         this.events = [];
+        this.pendingEvents = [];
+        this.flushTimer = null;
+        this.batchEndpoint = '/api/analytics/batch';
+        this.batchSize = 20;
+        this.flushDelay = 5000;
         this.privacyConsent = this.checkPrivacyConsent();
         this.isEnabled = this.privacyConsent && !this.isDoNotTrack();
         
@@ -56,6 +61,7 @@ class PortfolioAnalytics {
     init() {
         this.trackPageView();
         this.setupEventListeners();
+        this.setupBatchFlushing();
         this.startSessionTracking();
         
         console.log('📊 Portfolio Analytics initialized for:', this.currentPortfolio);
@@ -365,8 +371,8 @@ class PortfolioAnalytics {
         // Store event locally
         this.events.push(event);
         
-        // Send to analytics endpoint (if available)
-        this.sendEvent(event);
+        // Queue for the next batch sent to the analytics endpoint
+        this.queueEvent(event);
         
         // Store in localStorage for offline capability
         this.storeEventLocally(event);
@@ -374,23 +380,70 @@ class PortfolioAnalytics {
         console.log('📊 Analytics Event:', eventName, eventData);
     }
 
-    // Send event to analytics endpoint
-    async sendEvent(event) {
+    // Queue an event; flushed when the batch is full or after flushDelay
+    queueEvent(event) {
+        this.pendingEvents.push(event);
+
+        if (this.pendingEvents.length >= this.batchSize) {
+            this.flushEvents();
+        } else if (!this.flushTimer) {
+            this.flushTimer = setTimeout(() => this.flushEvents(), this.flushDelay);
+        }
+    }
+
+    // Flush queued events when the page is hidden or unloading
+    setupBatchFlushing() {
+        document.addEventListener('visibilitychange', () => {
+            if (document.hidden) this.flushEvents(true);
+        });
+        window.addEventListener('pagehide', () => this.flushEvents(true));
+    }
+
+    // Send all queued events in one request
+    flushEvents(unloading = false) {
+        if (this.flushTimer) {
+            clearTimeout(this.flushTimer);
+            this.flushTimer = null;
+        }
+        if (this.pendingEvents.length === 0) return;
+
+        const batch = this.pendingEvents;
+        this.pendingEvents = [];
+        const ndjson = batch.map(event => JSON.stringify(event)).join('\n');
+
+        // sendBeacon survives page unload; text/plain avoids a CORS preflight
+        if (unloading && navigator.sendBeacon) {
+            const queued = navigator.sendBeacon(this.batchEndpoint, new Blob([ndjson], { type: 'text/plain' }));
+            if (queued) return;
+        }
+
+        this.sendEvents(ndjson);
+    }
+
+    // POST a batch (gzip-compressed where the browser supports it)
+    async sendEvents(ndjson) {
         try {
-            // Check if backend analytics endpoint exists
-            const response = await fetch('/api/analytics/track', {
+            const headers = { 'Content-Type': 'application/x-ndjson' };
+            let body = ndjson;
+
+            if (typeof CompressionStream !== 'undefined') {
+                const stream = new Blob([ndjson]).stream().pipeThrough(new CompressionStream('gzip'));
+                body = await new Response(stream).blob();
+                headers['Content-Encoding'] = 'gzip';
+            }
+
+            const response = await fetch(this.batchEndpoint, {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(event)
+                headers,
+                body,
+                keepalive: true
             });
 
             if (!response.ok) {
                 throw new Error('Analytics endpoint not available');
             }
         } catch (error) {
-            // Fallback: store locally if endpoint is not available
+            // Events are already in localStorage (storeEventLocally)
             console.log('Analytics endpoint not available, storing locally');
         }
     }